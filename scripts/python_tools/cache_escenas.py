@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente de capas fijas de escena
+Guarda en disco el fondo ya rasterizado de los generadores de GIF (escritorio,
+iconos, etiquetas, marco de la consola) bajo el hash de todo lo que lo
+determina. Las ejecuciones siguientes lo abren mapeado en memoria en lugar de
+volver a dibujarlo. El tamaño total está acotado con desalojo LRU.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+# Variable de entorno con el directorio de la caché
+CACHE_DIR_ENV = 'AGENT_GIF_CACHE'
+
+# Tamaño máximo de la caché en disco
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Directorio de AGENT_GIF_CACHE o ~/.cache/agent_gif/escenas"""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser('~'), '.cache', 'agent_gif', 'escenas')
+
+
+def scene_key(fingerprint):
+    """Hash SHA-256 de la huella (dict serializable; lo que no sea JSON se convierte con str)"""
+    payload = json.dumps(fingerprint, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SceneCache:
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Caché de arrays direccionada por contenido.
+        - directory: carpeta de los .npy (por defecto default_cache_dir())
+        - max_bytes: al guardar, se borran las entradas usadas hace más tiempo
+          hasta quedar por debajo
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def load(self, key):
+        """Array guardado bajo key, mapeado en memoria y de solo lectura, o None"""
+        path = self.path(key)
+        try:
+            array = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError):
+            # Entrada corrupta o a medio escribir: se descarta y se reconstruye
+            self._remove(path)
+            self.misses += 1
+            return None
+        # La fecha de modificación marca el último uso para el LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return array
+
+    def store(self, key, array):
+        """Guarda el array de forma atómica y desaloja lo necesario para respetar max_bytes"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(temporary, path)
+        self.evict(keep=key)
+        return path
+
+    def get_or_build(self, fingerprint, build):
+        """Array de la huella desde la caché; si no está, lo crea con build() y lo guarda"""
+        key = scene_key(fingerprint)
+        array = self.load(key)
+        if array is None:
+            array = build()
+            try:
+                self.store(key, array)
+            except OSError as e:
+                # Sin caché se sigue funcionando, solo que sin acelerar la próxima vez
+                print(f"⚠️ No se pudo guardar la escena en la caché: {e}", file=sys.stderr)
+        return array
+
+    def entries(self):
+        """(ruta, bytes, último uso) de cada entrada, de la usada hace más tiempo a la más reciente"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.npy')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Borra las entradas menos usadas hasta no pasar de max_bytes (nunca la de keep)"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        keep_path = self.path(keep) if keep else None
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path != keep_path and self._remove(path):
+                total -= size
+        return total
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            # En Windows no se puede borrar un archivo que otro proceso tiene mapeado
+            return False
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compositor de comparaciones sin matplotlib
+Coloca original, modificada y saturada una junto a otra con NumPy y PIL,
+con títulos, texto al pie y un recorte ampliado opcional de la región
+"""
+
+import functools
+import importlib.util
+import os
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_PANEL_TITLES = ('Original', 'Modificada (Ataque Adversarial)', 'Píxeles Modificados (Saturados)')
+DEFAULT_TITLE = 'Comparación: Ataque Adversarial de Píxeles'
+
+MARGIN = 20
+BACKGROUND = (255, 255, 255)
+TEXT_COLOR = (0, 0, 0)
+MAX_ZOOM = 8
+
+# Fuentes TrueType con acentos; la de PIL por defecto no tiene glifos como 'á' o 'í'
+# Clave: (negrita, monoespaciada)
+FONT_NAMES = {
+    (False, False): ('DejaVuSans.ttf', 'Arial.ttf', 'arial.ttf', 'LiberationSans-Regular.ttf'),
+    (True, False): ('DejaVuSans-Bold.ttf', 'Arial Bold.ttf', 'arialbd.ttf', 'LiberationSans-Bold.ttf'),
+    (False, True): ('DejaVuSansMono.ttf', 'Courier New.ttf', 'cour.ttf', 'LiberationMono-Regular.ttf'),
+    (True, True): ('DejaVuSansMono-Bold.ttf', 'Courier New Bold.ttf', 'courbd.ttf', 'LiberationMono-Bold.ttf'),
+}
+
+
+def _font_candidates(bold=False, monospace=False):
+    """Nombres de fuente del sistema y, si está instalada, la DejaVu que trae matplotlib"""
+    names = FONT_NAMES[(bool(bold), bool(monospace))]
+    candidates = list(names)
+    # Solo se localiza el paquete; no se importa matplotlib
+    spec = importlib.util.find_spec('matplotlib')
+    if spec is not None and spec.submodule_search_locations:
+        for location in spec.submodule_search_locations:
+            candidates.append(os.path.join(location, 'mpl-data', 'fonts', 'ttf', names[0]))
+    return candidates
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size, bold=False, monospace=False):
+    """Primera fuente TrueType disponible al tamaño y estilo pedidos, o la de PIL por defecto"""
+    for candidate in _font_candidates(bold, monospace):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _text_size(draw, text, font):
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    return right - left, bottom - top
+
+
+def _magnified_crop(image, area_coords, target_width):
+    """Recorte del área ampliado por vecino más cercano con un factor entero"""
+    start_x, start_y, end_x, end_y = area_coords
+    crop = image[start_y:end_y, start_x:end_x]
+    zoom = int(max(1, min(MAX_ZOOM, target_width // max(crop.shape[1], 1))))
+    return np.repeat(np.repeat(crop, zoom, axis=0), zoom, axis=1)
+
+
+def render_comparison(images, panel_titles=DEFAULT_PANEL_TITLES, title=DEFAULT_TITLE, caption='',
+                      zoom_area=None, output=None, compress_level=1):
+    """
+    Compone los paneles en una sola imagen RGB.
+    - images: arrays uint8 (H, W, 3), copiados píxel a píxel sin reescalar
+    - zoom_area: (start_x, start_y, end_x, end_y) a mostrar ampliado bajo cada panel
+    - output: ruta o archivo abierto donde guardar un PNG (opcional)
+
+    Retorna la imagen PIL compuesta.
+    """
+    title_font, panel_font, caption_font = load_font(22), load_font(16), load_font(14)
+    measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    title_h = _text_size(measure, title, title_font)[1] if title else 0
+    panel_title_h = max(_text_size(measure, t, panel_font)[1] for t in panel_titles) if panel_titles else 0
+    caption_h = _text_size(measure, caption, caption_font)[1] if caption else 0
+
+    panel_w = max(img.shape[1] for img in images)
+    panel_h = max(img.shape[0] for img in images)
+    crops = [_magnified_crop(img, zoom_area, panel_w) for img in images] if zoom_area else []
+    crop_h = max((crop.shape[0] for crop in crops), default=0)
+
+    width = MARGIN + len(images) * (panel_w + MARGIN)
+    panels_y = MARGIN + (title_h + MARGIN if title else 0) + (panel_title_h + MARGIN // 2 if panel_titles else 0)
+    crops_y = panels_y + panel_h + MARGIN
+    caption_y = crops_y + (crop_h + MARGIN if crops else 0)
+    height = caption_y + (caption_h + MARGIN if caption else 0)
+
+    # Los paneles se copian directamente en el lienzo: son exactos píxel a píxel
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[...] = BACKGROUND
+    for i, img in enumerate(images):
+        x = MARGIN + i * (panel_w + MARGIN)
+        canvas[panels_y:panels_y + img.shape[0], x:x + img.shape[1]] = img[..., :3]
+        if crops:
+            crop = crops[i]
+            crop_x = x + (panel_w - crop.shape[1]) // 2
+            canvas[crops_y:crops_y + crop.shape[0], crop_x:crop_x + crop.shape[1]] = crop[..., :3]
+
+    result = Image.fromarray(canvas)
+    draw = ImageDraw.Draw(result)
+    if title:
+        draw.text((width // 2, MARGIN), title, fill=TEXT_COLOR, font=title_font, anchor='mt')
+    for i, panel_title in enumerate(panel_titles or ()):
+        x = MARGIN + i * (panel_w + MARGIN) + panel_w // 2
+        draw.text((x, panels_y - MARGIN // 2), panel_title, fill=TEXT_COLOR, font=panel_font, anchor='mb')
+    if caption:
+        draw.text((width // 2, caption_y), caption, fill=TEXT_COLOR, font=caption_font, anchor='mt')
+
+    if output is not None:
+        result.save(output, format='PNG', compress_level=compress_level)
+    return result
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Diferencias dispersas entre una imagen base y su versión atacada
+Guarda solo índices de píxel, canales y deltas, en lugar de imágenes completas
+"""
+
+import numpy as np
+
+
+class PixelDiff:
+    def __init__(self, shape, indices, channels, deltas):
+        """
+        Diferencia dispersa sobre una imagen de forma shape (H, W, C).
+        - indices: índice plano de cada píxel cambiado (y * W + x)
+        - channels: canal de cada cambio
+        - deltas: cambio real (modificada - base) de cada entrada
+        """
+        self.shape = tuple(int(n) for n in shape)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.channels = np.asarray(channels, dtype=np.uint8)
+        self.deltas = np.asarray(deltas, dtype=np.int16)
+
+    @classmethod
+    def from_images(cls, base, modified):
+        """Construye la diferencia comparando dos imágenes completas"""
+        if base.shape != modified.shape:
+            raise ValueError(f"Formas distintas: {base.shape} vs {modified.shape}")
+        base3 = base.reshape(base.shape[0], base.shape[1], -1)
+        delta = modified.reshape(base3.shape).astype(np.int16) - base3
+        ys, xs, channels = np.nonzero(delta)
+        return cls(base3.shape, ys * base3.shape[1] + xs, channels, delta[ys, xs, channels])
+
+    @classmethod
+    def from_patch(cls, base, area_coords, patch):
+        """Construye la diferencia comparando solo el área (start_x, start_y, end_x, end_y)"""
+        start_x, start_y, end_x, end_y = area_coords
+        area = base[start_y:end_y, start_x:end_x]
+        delta = patch.astype(np.int16) - area.reshape(patch.shape)
+        ys, xs, channels = np.nonzero(delta)
+        indices = (ys + start_y) * base.shape[1] + (xs + start_x)
+        return cls(base.shape, indices, channels, delta[ys, xs, channels])
+
+    @classmethod
+    def concatenate(cls, diffs):
+        """Une diferencias disjuntas sobre la misma imagen en una sola"""
+        if not diffs:
+            raise ValueError("No hay diferencias que unir")
+        shape = diffs[0].shape
+        if any(diff.shape != shape for diff in diffs):
+            raise ValueError("Todas las diferencias deben ser de la misma forma de imagen")
+        return cls(shape,
+                   np.concatenate([diff.indices for diff in diffs]),
+                   np.concatenate([diff.channels for diff in diffs]),
+                   np.concatenate([diff.deltas for diff in diffs]))
+
+    def __len__(self):
+        return self.deltas.shape[0]
+
+    @property
+    def pixel_indices(self):
+        """Índices planos únicos de los píxeles tocados"""
+        return np.unique(self.indices)
+
+    @property
+    def coordinates(self):
+        """Coordenadas (x, y) únicas de los píxeles tocados"""
+        pixels = self.pixel_indices
+        return pixels % self.shape[1], pixels // self.shape[1]
+
+    def expanded(self, shape, offset):
+        """
+        Traslada una diferencia calculada sobre una región a una imagen mayor.
+        - shape: forma (H, W, C) de la imagen completa
+        - offset: posición (x, y) de la esquina superior izquierda de la región
+        """
+        offset_x, offset_y = offset
+        xs = self.indices % self.shape[1] + offset_x
+        ys = self.indices // self.shape[1] + offset_y
+        return PixelDiff(shape, ys * shape[1] + xs, self.channels, self.deltas)
+
+    def _pixels_view(self, image):
+        """
+        Vista (H, W, C) de la imagen que comparte su memoria, también si no es
+        contigua (p. ej. rgba[..., :3] o orden Fortran), donde reshape(-1) copiaría
+        """
+        view = image[..., None] if image.ndim == 2 else image
+        if view.shape != self.shape:
+            raise ValueError(f"La diferencia es para {self.shape}, la imagen es {image.shape}")
+        return view
+
+    def _positions(self):
+        return self.indices // self.shape[1], self.indices % self.shape[1], self.channels
+
+    def apply(self, image):
+        """Aplica la diferencia sobre la imagen base, en el sitio"""
+        view = self._pixels_view(image)
+        positions = self._positions()
+        view[positions] = np.clip(view[positions].astype(np.int16) + self.deltas, 0, 255)
+        return image
+
+    def revert(self, image):
+        """Deshace la diferencia sobre la imagen modificada, en el sitio"""
+        view = self._pixels_view(image)
+        positions = self._positions()
+        view[positions] = np.clip(view[positions].astype(np.int16) - self.deltas, 0, 255)
+        return image
+
+    def applied_to(self, base):
+        """Retorna una copia de la base con la diferencia aplicada"""
+        return self.apply(base.copy())
+
+    def saturated(self, base, color=(255, 0, 0), pixels=None):
+        """
+        Retorna la imagen modificada con los píxeles cambiados en un color sólido.
+        - pixels: coordenadas (xs, ys) a marcar; por defecto las de la diferencia
+        """
+        image = self.applied_to(base)
+        xs, ys = self.coordinates if pixels is None else pixels
+        image[ys, xs] = color
+        return image
+
+    def to_arrays(self):
+        """Arrays compactos para serializar"""
+        index_dtype = np.uint32 if self.shape[0] * self.shape[1] <= np.iinfo(np.uint32).max else np.uint64
+        return {
+            'shape': np.array(self.shape, dtype=np.int64),
+            'indices': self.indices.astype(index_dtype),
+            'channels': self.channels,
+            'deltas': self.deltas,
+        }
+
+    def save(self, path):
+        """Guarda la diferencia como .npz comprimido (acepta ruta o archivo abierto)"""
+        np.savez_compressed(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        """Carga una diferencia guardada con save"""
+        with np.load(path) as data:
+            return cls(data['shape'], data['indices'], data['channels'], data['deltas'])
+
+    @staticmethod
+    def save_many(path, diffs):
+        """Guarda muchas diferencias de la misma base en un único .npz con desplazamientos"""
+        if not diffs:
+            raise ValueError("No hay diferencias que guardar")
+        shape = diffs[0].shape
+        if any(diff.shape != shape for diff in diffs):
+            raise ValueError("Todas las diferencias deben ser de la misma forma de imagen")
+
+        arrays = [diff.to_arrays() for diff in diffs]
+        offsets = np.concatenate([[0], np.cumsum([len(diff) for diff in diffs])])
+        np.savez_compressed(
+            path,
+            shape=arrays[0]['shape'],
+            offsets=offsets.astype(np.int64),
+            indices=np.concatenate([a['indices'] for a in arrays]),
+            channels=np.concatenate([a['channels'] for a in arrays]),
+            deltas=np.concatenate([a['deltas'] for a in arrays]),
+        )
+
+    @classmethod
+    def load_many(cls, path):
+        """Carga la lista de diferencias guardada con save_many"""
+        with np.load(path) as data:
+            offsets = data['offsets']
+            indices, channels, deltas = data['indices'], data['channels'], data['deltas']
+            return [cls(data['shape'], indices[a:b], channels[a:b], deltas[a:b])
+                    for a, b in zip(offsets[:-1], offsets[1:])]
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Oráculo de distancia a la frontera de decisión g(x, u)
+Estima, para todas las direcciones a la vez, cuánto hay que avanzar desde x
+a lo largo de u para que el clasificador cambie de clase
+"""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class CacheDistancias:
+    def __init__(self, capacidad=100000):
+        """Caché LRU de distancias con clave (hash de la entrada, id de dirección)"""
+        self.capacidad = capacidad
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        """Retorna la distancia guardada o None, y la marca como usada recientemente"""
+        if clave not in self.entradas:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self.entradas.move_to_end(clave)
+        return self.entradas[clave]
+
+    def guardar(self, clave, distancia):
+        """Guarda una distancia expulsando la entrada menos usada si se llena"""
+        self.entradas[clave] = distancia
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.capacidad:
+            self.entradas.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+def hash_entrada(x):
+    """Hash estable del contenido, forma y tipo de un array de entrada"""
+    x = np.ascontiguousarray(x)
+    resumen = hashlib.sha1(str((x.shape, x.dtype.str)).encode())
+    resumen.update(x.tobytes())
+    return resumen.hexdigest()
+
+
+class ModeloSoftmaxLocal:
+    def __init__(self, pesos, sesgo=None):
+        """
+        Clasificador lineal/softmax en NumPy para probar el oráculo sin red.
+        - pesos: matriz (D, C)
+        - sesgo: vector (C,)
+        """
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.sesgo = np.zeros(self.pesos.shape[1]) if sesgo is None else np.asarray(sesgo, dtype=np.float64)
+
+    def logits(self, X):
+        return np.atleast_2d(X) @ self.pesos + self.sesgo
+
+    def probabilidades(self, X):
+        z = self.logits(X)
+        z -= z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def __call__(self, X):
+        """Retorna la clase predicha de cada fila de X"""
+        return np.argmax(self.logits(X), axis=1)
+
+
+class OraculoDistancias:
+    def __init__(self, clasificador, distancia_inicial=1e-2, distancia_max=1e3,
+                 tolerancia=1e-4, tam_lote=1024, capacidad_cache=100000):
+        """
+        Inicializa el oráculo.
+        - clasificador: callable que recibe un lote (M, D) y retorna clases (M,)
+          o puntuaciones (M, C), de las que se toma el argmax
+        - distancia_inicial, distancia_max: rango de la búsqueda exponencial
+        - tolerancia: ancho final del intervalo de bisección
+        - tam_lote: máximo de puntos por llamada al clasificador y de direcciones
+          buscadas a la vez (acota la memoria a (tam_lote, D))
+        """
+        self.clasificador = clasificador
+        self.distancia_inicial = distancia_inicial
+        self.distancia_max = distancia_max
+        self.tolerancia = tolerancia
+        self.tam_lote = tam_lote
+        self.cache = CacheDistancias(capacidad_cache)
+        self.llamadas_clasificador = 0
+        self.puntos_evaluados = 0
+
+    def _clasificar(self, X):
+        """Clasifica un lote de puntos en llamadas de como mucho tam_lote filas"""
+        etiquetas = []
+        for inicio in range(0, X.shape[0], self.tam_lote):
+            salida = np.asarray(self.clasificador(X[inicio:inicio + self.tam_lote]))
+            if salida.ndim == 2:
+                salida = np.argmax(salida, axis=1)
+            etiquetas.append(salida)
+            self.llamadas_clasificador += 1
+        self.puntos_evaluados += X.shape[0]
+        return np.concatenate(etiquetas) if etiquetas else np.empty(0, dtype=np.int64)
+
+    def _cambia_clase(self, x, U, t, clase):
+        """Indica, para cada dirección, si x + t·u ya no es de la clase original"""
+        return self._clasificar(x + t[:, None] * U) != clase
+
+    def _buscar(self, x, U, clase):
+        """Búsqueda exponencial seguida de bisección, vectorizada sobre direcciones"""
+        n = U.shape[0]
+        bajo = np.zeros(n)
+        alto = np.full(n, np.inf)
+
+        # Búsqueda exponencial: duplicar t hasta cruzar la frontera; la última
+        # prueba se hace justo en distancia_max
+        t = np.full(n, self.distancia_inicial)
+        activas = np.arange(n)
+        while activas.size:
+            cruza = self._cambia_clase(x, U[activas], t[activas], clase)
+            alto[activas[cruza]] = t[activas[cruza]]
+            pendientes = activas[~cruza]
+            bajo[pendientes] = t[pendientes]
+            activas = pendientes[t[pendientes] < self.distancia_max]
+            t[activas] = np.minimum(t[activas] * 2, self.distancia_max)
+
+        # Bisección conjunta de todos los intervalos encontrados
+        activas = np.flatnonzero(np.isfinite(alto) & (alto - bajo > self.tolerancia))
+        while activas.size:
+            medio = (bajo[activas] + alto[activas]) / 2
+            cruza = self._cambia_clase(x, U[activas], medio, clase)
+            alto[activas[cruza]] = medio[cruza]
+            bajo[activas[~cruza]] = medio[~cruza]
+            activas = activas[alto[activas] - bajo[activas] > self.tolerancia]
+
+        return alto
+
+    def distancias(self, x, direcciones, ids=None):
+        """
+        Estima g(x, u_i) para cada fila de direcciones.
+        - x: entrada (se aplana a D)
+        - direcciones: matriz (N, D)
+        - ids: identificador de cada dirección para la caché; por defecto el hash
+          del contenido de cada fila, así que dos bancos distintos no comparten entradas
+
+        Retorna un vector (N,) con la menor distancia encontrada que cambia la
+        clase (con precisión tolerancia), o inf si no cambia antes de distancia_max.
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if ids is None:
+            ids = [hash_entrada(fila) for fila in direcciones]
+        else:
+            ids = np.asarray(ids).tolist()
+        clave_x = hash_entrada(x)
+
+        resultado = np.empty(direcciones.shape[0])
+        faltantes = []
+        for i, id_direccion in enumerate(ids):
+            guardada = self.cache.obtener((clave_x, id_direccion))
+            if guardada is None:
+                faltantes.append(i)
+            else:
+                resultado[i] = guardada
+
+        if faltantes:
+            faltantes = np.array(faltantes)
+            clase = self._clasificar(x[None, :])[0]
+            # Por tramos de tam_lote direcciones: la copia en float64 y los puntos
+            # x + t·u de cada paso nunca pasan de (tam_lote, D)
+            for inicio in range(0, faltantes.size, self.tam_lote):
+                tramo = faltantes[inicio:inicio + self.tam_lote]
+                U = np.asarray(direcciones[tramo], dtype=np.float64)
+                resultado[tramo] = self._buscar(x, U, clase)
+            for i in faltantes.tolist():
+                self.cache.guardar((clave_x, ids[i]), resultado[i])
+
+        return resultado
+
+    def estadisticas(self):
+        """Contadores de llamadas al clasificador y de la caché"""
+        return {
+            'llamadas_clasificador': self.llamadas_clasificador,
+            'puntos_evaluados': self.puntos_evaluados,
+            'aciertos_cache': self.cache.aciertos,
+            'fallos_cache': self.cache.fallos,
+            'entradas_cache': len(self.cache),
+        }
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Escritura de GIF en streaming, frame a frame
+Los frames pasan del renderizador al codificador sin guardarse en disco ni
+acumularse en una lista: la memoria queda acotada a una ventana de frames
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+# Frames en vuelo entre el renderizador y el codificador
+DEFAULT_WINDOW = 4
+
+# Con optimize, la paleta compartida tiene 255 colores y el índice 255 es el transparente
+PALETTE_COLORS = 255
+TRANSPARENT_INDEX = 255
+
+# Error medio por canal (0-255) a partir del cual se calcula una paleta nueva
+MAX_PALETTE_ERROR = 6.0
+
+# Disposición "no desechar": el frame siguiente se dibuja sobre el anterior
+DISPOSAL_KEEP = 1
+
+
+class GifStreamWriter:
+    def __init__(self, output, size, duration=100, loop=0, optimize=True, max_palette_error=MAX_PALETTE_ERROR):
+        """
+        GIF animado que se escribe a medida que llegan los frames.
+        - output: ruta o archivo binario abierto; una ruta se escribe en un temporal
+          que solo la reemplaza al cerrar bien (abort lo descarta)
+        - size: (ancho, alto) de todos los frames
+        - duration: milisegundos por frame
+        - loop: repeticiones (0 = infinito, None = sin bloque de repetición)
+        - optimize: paleta adaptativa compartida, solo el rectángulo que cambia con
+          los píxeles iguales transparentes, y frames repetidos fusionados
+          alargando la duración del anterior. Sin optimize, cada frame completo
+          lleva su propia paleta local.
+        - max_palette_error: error medio de cuantización que provoca una paleta nueva
+        """
+        self.size = tuple(size)
+        self.duration = duration
+        self.loop = loop
+        self.optimize = optimize
+        self.max_palette_error = max_palette_error
+        self._owns_file = isinstance(output, (str, os.PathLike))
+        self._path = os.fspath(output) if self._owns_file else None
+        self._temporary = f'{self._path}.{os.getpid()}.tmp' if self._owns_file else None
+        self._fp = open(self._temporary, 'wb') if self._owns_file else output
+
+        self.frames = 0
+        self.dropped_frames = 0
+        self.palettes = 0
+        self.bytes_written = 0
+        self.frame_bytes = []
+        self.encode_seconds = 0.0
+
+        self._header_written = False
+        self._global_palette = None
+        self._palette = None
+        self._palette_rgb = None
+        self._previous = None
+        # Frame codificable a la espera de saber si los siguientes lo repiten
+        self._pending = None
+
+    def _write(self, data):
+        self._fp.write(data)
+        self.bytes_written += len(data)
+
+    def _write_header(self, palette_bytes=None):
+        """Cabecera con la paleta global (si hay) y el bloque de repetición"""
+        flags = 0
+        if palette_bytes:
+            palette_bytes = palette_bytes + bytes(768 - len(palette_bytes))
+            flags = 0x80 | 7
+        self._write(b'GIF89a' + struct.pack('<HHBBB', self.size[0], self.size[1], flags, 0, 0))
+        if palette_bytes:
+            self._write(palette_bytes)
+        if self.loop is not None:
+            self._write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', self.loop) + b'\x00')
+        self._header_written = True
+
+    def _new_palette(self, array):
+        """Paleta adaptativa de PALETTE_COLORS colores calculada sobre un frame completo"""
+        palette = Image.fromarray(array).quantize(PALETTE_COLORS).getpalette()[:3 * PALETTE_COLORS]
+        palette += [0] * (3 * PALETTE_COLORS - len(palette))
+        self._palette = Image.new('P', (1, 1))
+        self._palette.putpalette(palette)
+        self._palette_rgb = np.array(palette, dtype=np.int16).reshape(-1, 3)
+        self.palettes += 1
+        if self._global_palette is None:
+            self._global_palette = self._palette
+
+    def _quantize(self, array):
+        """Índices de la paleta activa, sin tramado para que las zonas fijas no parpadeen"""
+        indices = Image.fromarray(array).quantize(palette=self._palette, dither=Image.Dither.NONE)
+        return np.asarray(indices)
+
+    def _flush_pending(self):
+        if self._pending is None:
+            return
+        image, offset, params = self._pending
+        before = self.bytes_written
+        for chunk in GifImagePlugin.getdata(image, offset, **params):
+            self._write(chunk)
+        self.frame_bytes.append(self.bytes_written - before)
+        self._pending = None
+
+    def _queue_frame(self, image, offset=(0, 0), **params):
+        """Deja el frame pendiente y escribe el anterior, cuya duración ya es definitiva"""
+        self._flush_pending()
+        params['duration'] = self.duration
+        self._pending = (image, offset, params)
+
+    def write(self, frame):
+        """Cuantiza y codifica un frame RGB (array (H, W, 3) o imagen PIL)"""
+        start = time.perf_counter()
+        array = np.asarray(frame.convert('RGB') if isinstance(frame, Image.Image) else frame, dtype=np.uint8)
+        array = array[..., :3]
+        if (array.shape[1], array.shape[0]) != self.size:
+            raise ValueError(f"Frame de tamaño {(array.shape[1], array.shape[0])}, el GIF es de {self.size}")
+        self.frames += 1
+
+        if not self.optimize:
+            if not self._header_written:
+                self._write_header()
+            self._queue_frame(Image.fromarray(array).quantize(256), include_color_table=True)
+        else:
+            self._write_optimized(array)
+        self.encode_seconds += time.perf_counter() - start
+
+    def _write_optimized(self, array):
+        height, width = array.shape[:2]
+        changed = None
+        box = (0, 0, width, height)
+
+        if self._previous is not None:
+            changed = np.any(array != self._previous, axis=2)
+            rows = np.flatnonzero(changed.any(axis=1))
+            if rows.size == 0:
+                # Frame repetido: se alarga el pendiente en lugar de escribir otro
+                self._pending[2]['duration'] += self.duration
+                self.dropped_frames += 1
+                return
+            cols = np.flatnonzero(changed.any(axis=0))
+            box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+        if self._palette is None:
+            self._new_palette(array)
+            self._write_header(bytes(self._palette.getpalette()))
+
+        left, top, right, bottom = box
+        crop = array[top:bottom, left:right]
+        indices = self._quantize(crop)
+
+        if changed is not None:
+            region_changed = changed[top:bottom, left:right]
+            error = np.abs(self._palette_rgb[indices[region_changed]] - crop[region_changed]).mean()
+            if error > self.max_palette_error:
+                # Colores nuevos que la paleta no cubre: paleta nueva y frame completo
+                self._new_palette(array)
+                box, crop, changed = (0, 0, width, height), array, None
+                left, top = 0, 0
+                indices = self._quantize(array)
+            else:
+                # Lo que no cambia se deja transparente y se ve el frame anterior
+                indices = indices.copy()
+                indices[~region_changed] = TRANSPARENT_INDEX
+
+        image = Image.fromarray(indices)
+        image.putpalette(self._palette.getpalette())
+        self._queue_frame(image, (left, top), disposal=DISPOSAL_KEEP, transparency=TRANSPARENT_INDEX,
+                          include_color_table=self._palette is not self._global_palette)
+
+        if self._previous is None:
+            self._previous = array.copy()
+        else:
+            np.copyto(self._previous, array)
+
+    def stats(self):
+        """Bytes y tiempo de codificación del GIF escrito hasta ahora"""
+        return {
+            'frames': self.frames,
+            'written_frames': len(self.frame_bytes) + (self._pending is not None),
+            'dropped_frames': self.dropped_frames,
+            'palettes': self.palettes,
+            'bytes': self.bytes_written,
+            'bytes_per_frame': self.bytes_written / self.frames if self.frames else 0.0,
+            'encode_seconds': self.encode_seconds,
+        }
+
+    def close(self):
+        """
+        Escribe el frame pendiente y el final del GIF, y cierra el archivo si lo abrió
+        el escritor; solo entonces el GIF completo sustituye al destino
+        """
+        if self._fp is None:
+            return
+        try:
+            self._flush_pending()
+            if not self._header_written:
+                self._write_header()
+            self._write(b';')
+            self._fp.flush()
+        except BaseException:
+            self.abort()
+            raise
+        if self._owns_file:
+            self._fp.close()
+            os.replace(self._temporary, self._path)
+        self._fp = None
+
+    def abort(self):
+        """Deja el GIF a medias: borra el temporal sin tocar el destino (no cierra archivos ajenos)"""
+        if self._fp is None:
+            return
+        if self._owns_file:
+            self._fp.close()
+            try:
+                os.remove(self._temporary)
+            except OSError:
+                pass
+        self._fp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_gif_stream(frames, output, duration=100, loop=0, dump_dir=None, window=DEFAULT_WINDOW,
+                     progress=None, optimize=True):
+    """
+    Consume un iterable de frames RGB y los escribe en un GIF sin retenerlos.
+    Un hilo codifica mientras el iterable renderiza el siguiente frame; como
+    mucho hay window frames en la cola, copiados porque los renderizadores
+    reutilizan su buffer.
+    - dump_dir: guarda además cada frame como PNG (opcional)
+    - progress: callback progress(frames escritos)
+    - optimize: ver GifStreamWriter
+    Retorna las estadísticas del escritor (bytes por frame, tiempo de
+    codificación, frames fusionados...) más los segundos totales.
+    """
+    if dump_dir:
+        os.makedirs(dump_dir, exist_ok=True)
+
+    pending = queue.Queue(maxsize=window)
+    errors = []
+    done = object()
+    state = {'writer': None}
+
+    def encode():
+        try:
+            while True:
+                frame = pending.get()
+                if frame is done:
+                    return
+                if state['writer'] is None:
+                    state['writer'] = GifStreamWriter(output, (frame.shape[1], frame.shape[0]), duration, loop,
+                                                     optimize)
+                if dump_dir:
+                    Image.fromarray(frame).save(
+                        os.path.join(dump_dir, f'frame_{state["writer"].frames:03d}.png'), compress_level=1)
+                state['writer'].write(frame)
+                if progress:
+                    progress(state['writer'].frames)
+        except Exception as e:
+            errors.append(e)
+            # Vacía la cola para que el productor no se quede bloqueado
+            while pending.get() is not done:
+                pass
+
+    start = time.perf_counter()
+    encoder = threading.Thread(target=encode, daemon=True)
+    encoder.start()
+    completed = False
+    try:
+        for frame in frames:
+            if errors:
+                break
+            pending.put(np.array(frame, dtype=np.uint8)[..., :3])
+        completed = True
+    finally:
+        pending.put(done)
+        encoder.join()
+        if state['writer'] is not None:
+            # Si el productor o el codificador fallan no queda un GIF truncado en el destino
+            if completed and not errors:
+                state['writer'].close()
+            else:
+                state['writer'].abort()
+    if errors:
+        raise errors[0]
+
+    writer = state['writer']
+    stats = writer.stats() if writer else {'frames': 0, 'written_frames': 0, 'dropped_frames': 0, 'palettes': 0,
+                                           'bytes': 0, 'bytes_per_frame': 0.0, 'encode_seconds': 0.0}
+    stats['seconds'] = time.perf_counter() - start
+    return stats
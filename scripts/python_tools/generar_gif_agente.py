@@ -5,26 +5,63 @@ Generador de GIF para Presentación - Agent.exe
 Crea un GIF animado mostrando el comportamiento del agente
 """
 
+import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import numpy as np
-from matplotlib.animation import FuncAnimation
-try:
-    from matplotlib.animation import PillowWriter as Writer
-except ImportError:
-    from matplotlib.animation import FFMpegWriter as Writer
+import argparse
 import random
 import time
 
+from cache_escenas import SceneCache
+from flujo_gif import write_gif_stream
+from raster_escena import RENDERERS, RasterCanvas
+from trayectoria_cursor import DEFAULT_SPEED, EASINGS, plan_trajectory
+
+# Acciones del agente y su razonamiento en la consola
+ACTIONS = {
+    "Taking Screenshot": "Capturando pantalla actual...",
+    "Moving Mouse": "Navegando a elemento objetivo...",
+    "Left Click": "Haciendo clic en aplicación...",
+    "Type Text": "Escribiendo contenido...",
+    "Right Click": "Abriendo menú contextual...",
+    "Double Click": "Ejecutando aplicación...",
+    "Scroll": "Desplazando contenido...",
+    "Key Press": "Presionando tecla Enter...",
+}
+
+# Segundos que el cursor se queda en cada objetivo ejecutando la acción
+HOLD_RANGE = (0.8, 1.6)
+
+# Versión del dibujo de la escena fija (invalida la caché de escenas al cambiarlo)
+SCENE_VERSION = 1
+
 class AgentGifGenerator:
-    def __init__(self):
-        self.fig, self.ax = plt.subplots(1, 1, figsize=(12, 8))
-        self.frames = []
-        self.current_step = 0
+    def __init__(self, renderer='matplotlib', easing='ease_in_out', seed=None, scene_cache=None):
+        """
+        - renderer: 'matplotlib' (artistas con blitting) o 'raster' (NumPy + PIL,
+          sin pasar por matplotlib al generar los frames)
+        - easing: curva de aceleración del cursor entre objetivos (ver EASINGS)
+        - seed: semilla de los objetivos del agente, para repetir la misma animación
+        - scene_cache: SceneCache opcional con la escena fija ya rasterizada de
+          ejecuciones anteriores
+        """
+        if renderer not in RENDERERS:
+            raise ValueError(f"Motor de render desconocido: {renderer} (usa uno de {RENDERERS})")
+        if easing not in EASINGS:
+            raise ValueError(f"Curva desconocida: {easing} (usa una de {tuple(EASINGS)})")
+        self.renderer = renderer
+        self.easing = easing
+        self.scene_cache = scene_cache
+        self.rng = random.Random(seed)
+        self.fig, self.ax = plt.subplots(1, 1, figsize=(12, 8)) if renderer == 'matplotlib' else (None, None)
+        self.trajectory = None
+        self.raster_canvas = None
         self.mouse_x = 640
         self.mouse_y = 400
 
         # Configurar el área de la pantalla simulada
+        self.title = 'AGENT.EXE - Simulador Autónomo'
         self.screen_width = 1280
         self.screen_height = 800
 
@@ -34,12 +71,26 @@ class AgentGifGenerator:
         self.cursor_color = '#ff0000'
         self.action_color = '#ffff00'
 
+        # Consola simulada
+        self.console_y = 150
+        self.console_height = 120
+
+        # Iconos del escritorio
+        self.icon_positions = [
+            (100, 700, '📁 Documentos'),
+            (200, 700, '🌐 Navegador'),
+            (300, 700, '📝 Bloc de notas'),
+            (400, 700, '📊 Excel'),
+            (100, 600, '🎵 Música'),
+            (200, 600, '🖼️ Imagen.png')
+        ]
+
     def setup_plot(self):
         """Configura la apariencia del plot"""
         self.ax.set_xlim(0, self.screen_width)
         self.ax.set_ylim(0, self.screen_height)
         self.ax.set_facecolor(self.bg_color)
-        self.ax.set_title('AGENT.EXE - Simulador Autónomo',
+        self.ax.set_title(self.title,
                          color='white', fontsize=16, fontweight='bold')
 
         # Remover ejes
@@ -59,16 +110,7 @@ class AgentGifGenerator:
         self.ax.add_patch(taskbar)
 
         # Iconos del escritorio
-        icon_positions = [
-            (100, 700, '📁 Documentos'),
-            (200, 700, '🌐 Navegador'),
-            (300, 700, '📝 Bloc de notas'),
-            (400, 700, '📊 Excel'),
-            (100, 600, '🎵 Música'),
-            (200, 600, '🖼️ Imagen.png')
-        ]
-
-        for x, y, label in icon_positions:
+        for x, y, label in self.icon_positions:
             # Icono
             icon = patches.Rectangle((x-25, y-25), 50, 50,
                                    facecolor='#4a4a4a', edgecolor='white')
@@ -78,108 +120,269 @@ class AgentGifGenerator:
             self.ax.text(x, y-40, label, ha='center', va='center',
                         color='white', fontsize=8)
 
+    def cursor_vertices(self, x, y):
+        """Vértices del polígono del cursor con la punta en (x, y)"""
+        return [(x, y), (x+15, y-10), (x+8, y-8), (x+10, y-15)]
+
     def draw_cursor(self, x, y):
         """Dibuja el cursor del mouse"""
         # Cursor principal
-        cursor = patches.Polygon([(x, y), (x+15, y-10), (x+8, y-8), (x+10, y-15)],
-                               facecolor=self.cursor_color, edgecolor='white')
+        cursor = patches.Polygon(self.cursor_vertices(x, y),
+                               facecolor=self.cursor_color, edgecolor='white', animated=True)
         return cursor
 
     def draw_action_indicator(self, x, y, action_type):
         """Dibuja indicador de acción"""
         # Círculo de acción
-        circle = patches.Circle((x, y), 30, facecolor='yellow', alpha=0.5)
+        circle = patches.Circle((x, y), 30, facecolor='yellow', alpha=0.5, animated=True)
 
         # Texto de acción
         action_text = self.ax.text(x, y-50, action_type, ha='center', va='center',
-                                 color=self.action_color, fontsize=12, fontweight='bold')
+                                 color=self.action_color, fontsize=12, fontweight='bold', animated=True)
 
         return circle, action_text
 
-    def draw_console_output(self, step_info):
-        """Dibuja la salida de la consola simulada"""
-        console_y = 150
-        console_height = 120
-
+    def draw_console_background(self):
+        """Dibuja el fondo fijo de la consola y crea sus líneas de texto vacías"""
         # Fondo de consola
-        console_bg = patches.Rectangle((20, console_y), self.screen_width-40, console_height,
+        console_bg = patches.Rectangle((20, self.console_y), self.screen_width-40, self.console_height,
                                      facecolor='black', edgecolor=self.text_color, alpha=0.8)
         self.ax.add_patch(console_bg)
 
-        # Texto de la consola
-        console_lines = [
-            f"[{self.current_step}] REASONING: {step_info['reasoning']}",
-            f"[{self.current_step}] ACTION: {step_info['action']}",
-            f"[{self.current_step}] COORDINATES: ({step_info['x']}, {step_info['y']})",
-            f"[{self.current_step}] STATUS: {step_info['status']}"
+        # Texto de la consola (se actualiza en cada frame)
+        self.console_texts = [
+            self.ax.text(30, self.console_y + self.console_height - 20 - i*20, '',
+                        color=self.text_color, fontsize=10, fontfamily='monospace', animated=True)
+            for i in range(4)
         ]
 
-        for i, line in enumerate(console_lines):
-            self.ax.text(30, console_y + console_height - 20 - i*20, line,
-                        color=self.text_color, fontsize=10, fontfamily='monospace')
-
-    def generate_step_data(self):
-        """Genera datos para cada paso de la animación"""
-        actions = [
-            ("Taking Screenshot", "Capturando pantalla actual..."),
-            ("Moving Mouse", "Navegando a elemento objetivo..."),
-            ("Left Click", "Haciendo clic en aplicación..."),
-            ("Type Text", "Escribiendo contenido..."),
-            ("Right Click", "Abriendo menú contextual..."),
-            ("Double Click", "Ejecutando aplicación..."),
-            ("Scroll", "Desplazando contenido..."),
-            ("Key Press", "Presionando tecla Enter...")
+    def console_lines(self, step_info):
+        """Líneas de la consola simulada para el paso actual"""
+        step = step_info['step']
+        return [
+            f"[{step}] REASONING: {step_info['reasoning']}",
+            f"[{step}] ACTION: {step_info['action']}",
+            f"[{step}] COORDINATES: ({step_info['target_x']}, {step_info['target_y']})",
+            f"[{step}] STATUS: {step_info['status']}"
         ]
 
-        action, reasoning = random.choice(actions)
-        x = random.randint(100, self.screen_width-100)
-        y = random.randint(100, self.screen_height-100)
-
-        return {
-            'action': action,
-            'reasoning': reasoning,
-            'x': x,
-            'y': y,
-            'status': 'Ejecutando...' if self.current_step % 3 != 0 else 'Completado ✓'
-        }
-
-    def animate(self, frame):
-        """Función de animación para cada frame"""
+    def draw_console_output(self, step_info):
+        """Actualiza la salida de la consola simulada"""
+        for text, line in zip(self.console_texts, self.console_lines(step_info)):
+            text.set_text(line)
+
+    def init_scene(self):
+        """
+        Dibuja una sola vez la escena fija (ejes, escritorio, fondo de consola) y
+        crea los artistas animados. Retorna la lista de artistas animados.
+        """
         self.ax.clear()
         self.setup_plot()
         self.draw_desktop_elements()
+        self.draw_console_background()
+
+        self.cursor = self.draw_cursor(self.mouse_x, self.mouse_y)
+        self.ax.add_patch(self.cursor)
+        self.action_circle, self.action_text = self.draw_action_indicator(0, 0, '')
+        self.ax.add_patch(self.action_circle)
+        self.info_text = self.ax.text(10, self.screen_height-20, '',
+                                      color='white', fontsize=12, fontweight='bold', animated=True)
+
+        self.animated_artists = [self.action_circle, self.cursor, *self.console_texts,
+                                 self.action_text, self.info_text]
+        return self.animated_artists
+
+    def generate_keyframes(self, seconds):
+        """
+        Fotogramas clave (acción, x, y, espera) al azar que cubren al menos
+        seconds segundos de animación a la velocidad del cursor
+        """
+        keyframes = []
+        x, y = self.mouse_x, self.mouse_y
+        elapsed = 0.0
+        while elapsed < seconds:
+            action = self.rng.choice(list(ACTIONS))
+            target_x = self.rng.randint(100, self.screen_width-100)
+            target_y = self.rng.randint(100, self.screen_height-100)
+            hold = self.rng.uniform(*HOLD_RANGE)
+            keyframes.append((action, target_x, target_y, hold))
+            elapsed += np.hypot(target_x - x, target_y - y) / DEFAULT_SPEED + hold
+            x, y = target_x, target_y
+        return keyframes
+
+    def plan(self, frames_total, fps):
+        """Calcula de una vez la trayectoria del cursor y el estado de todos los frames"""
+        keyframes = self.generate_keyframes(frames_total / fps)
+        self.trajectory = plan_trajectory(keyframes, fps, start=(self.mouse_x, self.mouse_y),
+                                          easing=self.easing, frames=frames_total)
+        return self.trajectory
+
+    def frame_state(self, frame):
+        """Datos del paso en el frame (solo indexa la trayectoria planificada)"""
+        state = self.trajectory.state(frame)
+        state['reasoning'] = ACTIONS[state['action']]
+        state['status'] = 'Completado ✓' if state['acting'] else 'Ejecutando...'
+        return state
+
+    def info_line(self, step):
+        return f"Paso: {step} | Agente: ACTIVO | Modo: AUTÓNOMO"
 
-        # Generar datos del paso actual
-        step_data = self.generate_step_data()
-
-        # Animar movimiento del cursor
-        target_x, target_y = step_data['x'], step_data['y']
-
-        # Interpolación suave del cursor
-        alpha = 0.3
-        self.mouse_x += alpha * (target_x - self.mouse_x)
-        self.mouse_y += alpha * (target_y - self.mouse_y)
-
-        # Dibujar cursor
-        cursor = self.draw_cursor(self.mouse_x, self.mouse_y)
-        self.ax.add_patch(cursor)
-
-        # Si estamos cerca del objetivo, mostrar acción
-        distance = np.sqrt((self.mouse_x - target_x)**2 + (self.mouse_y - target_y)**2)
-        if distance < 50:
-            circle, action_text = self.draw_action_indicator(target_x, target_y, step_data['action'])
-            self.ax.add_patch(circle)
-            self.current_step += 1
-
-        # Dibujar salida de consola
+    def animate(self, frame):
+        """Actualiza en el sitio los artistas animados para el frame y los retorna"""
+        return self.update_artists(self.frame_state(frame))
+
+    def update_artists(self, step_data):
+        """Actualiza en el sitio los artistas animados con los datos de un paso y los retorna"""
+        show_action = step_data['acting']
+        target_x, target_y = step_data['target_x'], step_data['target_y']
+
+        # Mover cursor
+        self.cursor.set_xy(self.cursor_vertices(step_data['x'], step_data['y']))
+
+        # Indicador de acción
+        self.action_circle.set_visible(show_action)
+        self.action_text.set_visible(show_action)
+        if show_action:
+            self.action_circle.set_center((target_x, target_y))
+            self.action_text.set_position((target_x, target_y-50))
+            self.action_text.set_text(step_data['action'])
+
+        # Actualizar salida de consola
         self.draw_console_output(step_data)
 
         # Información en la esquina
-        info_text = f"Paso: {self.current_step} | Agente: ACTIVO | Modo: AUTÓNOMO"
-        self.ax.text(10, self.screen_height-20, info_text,
-                    color='white', fontsize=12, fontweight='bold')
+        self.info_text.set_text(self.info_line(step_data['step']))
+
+        return self.animated_artists
 
-        return self.ax.patches + self.ax.texts
+    def scene_fingerprint(self):
+        """Parámetros que determinan la escena fija (clave de la caché de escenas)"""
+        return {
+            'scene': 'agent',
+            'version': SCENE_VERSION,
+            'screen_size': (self.screen_width, self.screen_height),
+            'colors': (self.bg_color, self.text_color),
+            'console': (self.console_y, self.console_height),
+            'icons': self.icon_positions,
+            'title': self.title,
+        }
+
+    def blit_background(self):
+        """
+        Región fija de la figura para el blitting. Con caché, los píxeles se
+        copian de la escena guardada en lugar de dibujar la figura entera.
+        """
+        canvas = self.fig.canvas
+        if self.scene_cache is None:
+            canvas.draw()
+        else:
+            def draw_background():
+                canvas.draw()
+                return np.asarray(canvas.buffer_rgba())
+            fingerprint = dict(self.scene_fingerprint(), renderer='matplotlib',
+                               matplotlib_version=matplotlib.__version__,
+                               figure=(tuple(self.fig.get_size_inches()), self.fig.dpi),
+                               rcparams=dict(plt.rcParams))
+            pixels = self.scene_cache.get_or_build(fingerprint, draw_background)
+            canvas.get_renderer()
+            np.copyto(np.asarray(canvas.buffer_rgba()), pixels)
+        return canvas.copy_from_bbox(self.fig.bbox)
+
+    def build_raster_scene(self):
+        """
+        Rasteriza una vez la escena fija con el mismo diseño que la figura de
+        matplotlib (12x8 pulgadas a 100 dpi) y prepara los sprites animados
+        """
+        # Posición por defecto de unos ejes de matplotlib en una figura de 1200x800
+        canvas = RasterCanvas((self.screen_width, self.screen_height), (1200, 800), (150, 96, 930, 616),
+                              figure_color='white', axes_color=self.bg_color)
+        canvas.build_static(self.draw_raster_static, self.scene_cache, renderer='raster',
+                            **self.scene_fingerprint())
+
+        self.raster_canvas = canvas
+        self.cursor_sprite = canvas.polygon_sprite(self.cursor_vertices(0, 0), self.cursor_color, 'white')
+        self.action_sprite = canvas.circle_sprite(30, 'yellow', alpha=0.5)
+        return canvas
+
+    def draw_raster_static(self, canvas):
+        """Dibuja en el fondo del lienzo el escritorio, la consola y los textos fijos"""
+        # Barra de tareas e iconos
+        canvas.add_static(canvas.rectangle_sprite(self.screen_width, 50, '#1e1e1e', 'white'), 0, 0)
+        icon = canvas.rectangle_sprite(50, 50, '#4a4a4a', 'white')
+        for x, y, _ in self.icon_positions:
+            canvas.add_static(icon, x-25, y-25)
+
+        # Fondo de consola y marco de los ejes
+        canvas.add_static(canvas.rectangle_sprite(self.screen_width-40, self.console_height, 'black',
+                                                  self.text_color, alpha=0.8), 20, self.console_y)
+        canvas.add_axes_border('white', 2)
+
+        # Textos fijos: etiquetas y título (6 pt por encima de los ejes, como set_title)
+        for x, y, label in self.icon_positions:
+            canvas.add_static_text(x, y-40, label, ha='center', va='center', color='white', fontsize=8)
+        canvas.add_static_pixels(canvas.text_sprite(self.title, fontsize=16, color='white',
+                                                    bold=True, ha='center'),
+                                 150 + 930 / 2, 96 - canvas.points_to_pixels(6))
+
+    def render_raster_frame(self, frame):
+        """Compone el frame sobre el fondo rasterizado; retorna el buffer del lienzo"""
+        return self.render_raster_state(self.frame_state(frame))
+
+    def render_raster_state(self, step_data):
+        """Compone sobre el fondo rasterizado los datos de un paso; retorna el buffer del lienzo"""
+        canvas = self.raster_canvas
+        show_action = step_data['acting']
+        target_x, target_y = step_data['target_x'], step_data['target_y']
+
+        buffer = canvas.begin_frame()
+        if show_action:
+            canvas.draw(self.action_sprite, target_x, target_y)
+        canvas.draw(self.cursor_sprite, step_data['x'], step_data['y'])
+        for i, line in enumerate(self.console_lines(step_data)):
+            canvas.draw_text(30, self.console_y + self.console_height - 20 - i*20, line,
+                             color=self.text_color, fontsize=10, monospace=True)
+        if show_action:
+            canvas.draw_text(target_x, target_y-50, step_data['action'], ha='center', va='center',
+                             color=self.action_color, fontsize=12, bold=True)
+        canvas.draw_text(10, self.screen_height-20, self.info_line(step_data['step']), color='white',
+                         fontsize=12, bold=True)
+        return buffer
+
+    def iter_frames(self, frames=None):
+        """
+        Genera los frames como arrays RGB (H, W, 3). El buffer se reutiliza entre
+        frames: hay que copiarlo para conservarlo.
+        - frames: índices de los frames a renderizar, en cualquier orden (por
+          defecto todos los de la trayectoria planificada con plan)
+        """
+        if self.trajectory is None:
+            raise ValueError("No hay trayectoria: llama antes a plan(frames_total, fps)")
+        if frames is None:
+            frames = range(len(self.trajectory))
+        return self.iter_states(self.frame_state(frame) for frame in frames)
+
+    def iter_states(self, states):
+        """
+        Renderiza un frame por cada dict de datos de paso (ver frame_state).
+        - matplotlib: la escena fija se rasteriza una vez y en cada frame solo se
+          redibujan los artistas animados (blitting)
+        - raster: se componen sprites sobre un fondo precalculado, sin matplotlib
+        """
+        if self.renderer == 'raster':
+            self.build_raster_scene()
+            for step_data in states:
+                yield self.render_raster_state(step_data)
+            return
+
+        self.init_scene()
+        canvas = self.fig.canvas
+        background = self.blit_background()
+
+        for step_data in states:
+            canvas.restore_region(background)
+            for artist in self.update_artists(step_data):
+                self.fig.draw_artist(artist)
+            yield np.asarray(canvas.buffer_rgba())[..., :3]
 
     def create_gif(self, filename='agent_demo.gif', duration=10, fps=5):
         """Crea el GIF animado"""
@@ -187,20 +390,20 @@ class AgentGifGenerator:
         print(f"📁 Archivo: {filename}")
         print(f"⏱️  Duración: {duration} segundos")
         print(f"🎞️  FPS: {fps}")
+        print(f"🖌️  Motor de render: {self.renderer}")
 
-        # Configurar animación
         frames_total = duration * fps
-        anim = FuncAnimation(self.fig, self.animate, frames=frames_total,
-                           interval=1000/fps, blit=False, repeat=True)
-
-        # Configurar writer
-        writer = Writer(fps=fps)
 
         # Guardar GIF
         try:
-            anim.save(filename, writer=writer)
-            print(f"✅ GIF creado exitosamente: {filename}")
-            print(f"📊 Frames generados: {frames_total}")
+            # Los frames van directamente del renderizador al codificador
+            self.plan(frames_total, fps)
+            stats = write_gif_stream(self.iter_frames(), filename, duration=int(1000 / fps))
+            print(f"✅ GIF creado exitosamente: {filename} ({stats['bytes'] / 1e6:.2f} MB en {stats['seconds']:.1f}s)")
+            print(f"📊 Frames generados: {frames_total} ({stats['dropped_frames']} repetidos fusionados, "
+                  f"{stats['bytes_per_frame'] / 1e3:.1f} KB/frame, codificación {stats['encode_seconds']:.1f}s)")
+            if self.raster_canvas is not None:
+                print(f"🔤 Caché de textos: {self.raster_canvas.text_cache.summary()}")
             return True
         except Exception as e:
             print(f"❌ Error creando GIF: {e}")
@@ -238,10 +441,23 @@ class AgentGifGenerator:
         else:
             print("❌ Opción no válida")
 
-def main():
+def main(argv=None):
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Generador de GIF para presentación - Agent.exe")
+    parser.add_argument('--renderer', choices=RENDERERS, default='matplotlib',
+                        help="Motor de render de los frames")
+    parser.add_argument('--easing', choices=tuple(EASINGS), default='ease_in_out',
+                        help="Curva de aceleración del cursor entre objetivos")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla para repetir exactamente la misma animación")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Carpeta de la caché de escenas (por defecto $AGENT_GIF_CACHE o ~/.cache/agent_gif)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Dibujar siempre la escena fija, sin caché en disco")
+    args = parser.parse_args(argv)
     try:
-        generator = AgentGifGenerator()
+        generator = AgentGifGenerator(renderer=args.renderer, easing=args.easing, seed=args.seed,
+                                      scene_cache=None if args.no_cache else SceneCache(args.cache_dir))
         generator.create_presentation_gif()
 
     except KeyboardInterrupt:
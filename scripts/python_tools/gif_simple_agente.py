@@ -8,12 +8,62 @@ Versión simplificada que funciona con cualquier instalación de Python
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import numpy as np
+import argparse
 import random
 import os
-from datetime import datetime
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from PIL import Image
+
+from cache_escenas import SceneCache
+from flujo_gif import write_gif_stream
+from raster_escena import RENDERERS, RasterCanvas
+
+ACTIONS_SEQUENCE = [
+    ("Taking Screenshot", "📸", "Capturando estado actual de la pantalla"),
+    ("Analyzing Screen", "🧠", "Procesando elementos visuales detectados"),
+    ("Mouse Move", "🖱️", "Navegando a coordenadas objetivo"),
+    ("Left Click", "👆", "Ejecutando clic en elemento identificado"),
+    ("Typing Text", "⌨️", "Escribiendo contenido requerido"),
+    ("Keyboard Shortcut", "⌨️", "Ejecutando comando de teclado"),
+    ("Scroll Action", "📜", "Desplazando contenido de la pantalla"),
+    ("Right Click", "👆", "Abriendo menú contextual"),
+    ("Double Click", "👆", "Ejecutando aplicación seleccionada"),
+    ("Task Complete", "✅", "Tarea completada exitosamente")
+]
+
+# Duración de cada frame en el GIF; también separa las marcas de tiempo de la consola
+FRAME_DURATION_MS = 800
+
+DESKTOP_ICONS = [
+    (120, 720, "📁", "Documentos"),
+    (250, 720, "🌐", "Browser"),
+    (380, 720, "📝", "Notepad"),
+    (510, 720, "📊", "Excel"),
+    (640, 720, "🖼️", "Imagen.png"),
+    (120, 600, "⚙️", "Settings"),
+    (250, 600, "🎵", "Media"),
+    (380, 600, "📂", "Files")
+]
+
+# Versión del dibujo de la escena fija (invalida la caché de escenas al cambiarlo)
+SCENE_VERSION = 1
 
 class SimpleAgentVisualizer:
-    def __init__(self):
+    def __init__(self, renderer='matplotlib', scene_cache=None):
+        """
+        - renderer: 'matplotlib' (figura reutilizada) o 'raster' (NumPy + PIL
+          sobre un fondo precalculado, sin matplotlib)
+        - scene_cache: SceneCache opcional con el fondo raster de ejecuciones anteriores
+        """
+        if renderer not in RENDERERS:
+            raise ValueError(f"Motor de render desconocido: {renderer} (usa uno de {RENDERERS})")
+        self.renderer = renderer
+        self.scene_cache = scene_cache
+        self.raster_canvas = None
+        self._figure = None
+
         # Configuración básica
         self.screen_width = 1280
         self.screen_height = 800
@@ -25,10 +75,21 @@ class SimpleAgentVisualizer:
         self.cursor_color = '#ff4444'
         self.action_color = '#ffaa00'
 
+        # Consola de logs
+        self.console_x, self.console_y = 50, 50
+        self.console_width, self.console_height = self.screen_width - 100, 150
+
         plt.style.use('dark_background')
 
-    def create_static_demo_frames(self, num_frames=20):
-        """Crea frames estáticos para mostrar el comportamiento del agente"""
+    def create_static_demo_frames(self, num_frames=20, workers=1, seed=None, progress=None, start_time=None):
+        """
+        Crea frames estáticos para mostrar el comportamiento del agente.
+        - workers: procesos en paralelo (backend Agg, una figura reutilizada por proceso)
+        - seed: semilla base; cada frame usa su propia semilla derivada, así que los
+          PNG son idénticos byte a byte con cualquier número de procesos
+        - progress: callback progress(hechos, total) llamado al terminar cada frame
+        - start_time: hora de la primera línea de consola (por defecto, ahora)
+        """
 
         print("🎬 Generando frames de demo...")
 
@@ -36,65 +97,226 @@ class SimpleAgentVisualizer:
         if not os.path.exists('agent_frames'):
             os.makedirs('agent_frames')
 
-        actions_sequence = [
-            ("Taking Screenshot", "📸", "Capturando estado actual de la pantalla"),
-            ("Analyzing Screen", "🧠", "Procesando elementos visuales detectados"),
-            ("Mouse Move", "🖱️", "Navegando a coordenadas objetivo"),
-            ("Left Click", "👆", "Ejecutando clic en elemento identificado"),
-            ("Typing Text", "⌨️", "Escribiendo contenido requerido"),
-            ("Keyboard Shortcut", "⌨️", "Ejecutando comando de teclado"),
-            ("Scroll Action", "📜", "Desplazando contenido de la pantalla"),
-            ("Right Click", "👆", "Abriendo menú contextual"),
-            ("Double Click", "👆", "Ejecutando aplicación seleccionada"),
-            ("Task Complete", "✅", "Tarea completada exitosamente")
-        ]
-
-        for frame_num in range(num_frames):
-            fig, ax = plt.subplots(1, 1, figsize=(14, 10))
-
-            # Configurar plot
-            ax.set_xlim(0, self.screen_width)
-            ax.set_ylim(0, self.screen_height)
-            ax.set_facecolor(self.bg_color)
-            ax.set_title('AGENT.EXE - Demostración de Funcionamiento',
-                        color='white', fontsize=18, fontweight='bold', pad=20)
-
-            # Remover ejes
-            ax.set_xticks([])
-            ax.set_yticks([])
-
-            # Dibujar escritorio simulado
-            self.draw_desktop(ax)
-
-            # Generar acción actual
-            action_idx = frame_num % len(actions_sequence)
-            action_name, icon, description = actions_sequence[action_idx]
-
-            # Coordenadas aleatorias para esta acción
-            x = random.randint(200, self.screen_width - 200)
-            y = random.randint(200, self.screen_height - 200)
-
-            # Dibujar cursor y acción
-            self.draw_cursor_and_action(ax, x, y, action_name, icon)
-
-            # Dibujar consola de logs
-            self.draw_console(ax, frame_num, action_name, x, y, description)
-
-            # Información del sistema
-            self.draw_system_info(ax, frame_num)
-
-            # Guardar frame
-            filename = f'agent_frames/frame_{frame_num:03d}.png'
-            plt.tight_layout()
-            plt.savefig(filename, dpi=100, bbox_inches='tight',
-                       facecolor=self.bg_color, edgecolor='none')
-            plt.close()
-
-            print(f"✅ Frame {frame_num + 1}/{num_frames} generado")
+        # Con seed=None se sortea la entropía una vez y se reparte a todos los frames
+        entropy = np.random.SeedSequence(seed).entropy
+        start_time = start_time or datetime.now()
+
+        if workers <= 1:
+            for done, frame_num in enumerate(range(num_frames), 1):
+                self.render_frame(frame_num, entropy, start_time)
+                if progress:
+                    progress(done, num_frames)
+        else:
+            cache_dir = self.scene_cache.directory if self.scene_cache else None
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_frame_worker,
+                                     initargs=(self.renderer, cache_dir)) as executor:
+                futures = [executor.submit(_render_frame_job, frame_num, entropy, start_time)
+                           for frame_num in range(num_frames)]
+                for done, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if progress:
+                        progress(done, num_frames)
 
         print(f"\n🎉 {num_frames} frames generados en la carpeta 'agent_frames'")
         self.create_gif_instructions()
 
+    def frame_spec(self, frame_num, entropy, start_time):
+        """Acción, coordenadas y hora del frame, derivadas solo de su índice y de la semilla"""
+        action_name, icon, description = ACTIONS_SEQUENCE[frame_num % len(ACTIONS_SEQUENCE)]
+
+        # Coordenadas aleatorias con un generador propio del frame
+        rng = random.Random(int(np.random.SeedSequence([entropy, frame_num]).generate_state(1)[0]))
+        x = rng.randint(200, self.screen_width - 200)
+        y = rng.randint(200, self.screen_height - 200)
+
+        timestamp = start_time + timedelta(milliseconds=frame_num * FRAME_DURATION_MS)
+        return action_name, icon, description, x, y, timestamp
+
+    def render_frame(self, frame_num, entropy, start_time):
+        """Renderiza y guarda un frame; retorna la ruta del PNG"""
+        action_name, icon, description, x, y, timestamp = self.frame_spec(frame_num, entropy, start_time)
+
+        filename = f'agent_frames/frame_{frame_num:03d}.png'
+        if self.renderer == 'raster':
+            frame = self.render_raster_frame(frame_num, action_name, icon, description, x, y, timestamp)
+            Image.fromarray(frame).save(filename, compress_level=1)
+        else:
+            self.render_matplotlib_frame(filename, frame_num, action_name, icon, description, x, y, timestamp)
+        return filename
+
+    def figure(self):
+        """Figura y ejes reutilizados entre frames"""
+        if self._figure is None:
+            self._figure = plt.subplots(1, 1, figsize=(14, 10))
+            self._figure[0].set_facecolor(self.bg_color)
+        return self._figure
+
+    def draw_matplotlib_frame(self, frame_num, action_name, icon, description, x, y, timestamp):
+        """Dibuja un frame en la figura reutilizada de matplotlib; retorna la figura"""
+        fig, ax = self.figure()
+        ax.clear()
+
+        # Configurar plot
+        ax.set_xlim(0, self.screen_width)
+        ax.set_ylim(0, self.screen_height)
+        ax.set_facecolor(self.bg_color)
+        ax.set_title('AGENT.EXE - Demostración de Funcionamiento',
+                    color='white', fontsize=18, fontweight='bold', pad=20)
+
+        # Remover ejes
+        ax.set_xticks([])
+        ax.set_yticks([])
+
+        # Dibujar escritorio simulado
+        self.draw_desktop(ax)
+
+        # Dibujar cursor y acción
+        self.draw_cursor_and_action(ax, x, y, action_name, icon)
+
+        # Dibujar consola de logs
+        self.draw_console(ax, frame_num, action_name, x, y, description, timestamp)
+
+        # Información del sistema
+        self.draw_system_info(ax, frame_num)
+
+        fig.tight_layout()
+        return fig
+
+    def render_matplotlib_frame(self, filename, frame_num, action_name, icon, description, x, y, timestamp):
+        """Dibuja un frame con matplotlib y lo guarda como PNG"""
+        fig = self.draw_matplotlib_frame(frame_num, action_name, icon, description, x, y, timestamp)
+        fig.savefig(filename, dpi=100, bbox_inches='tight',
+                    facecolor=self.bg_color, edgecolor='none')
+
+    def _tight_crop_box(self, fig):
+        """Caja en píxeles equivalente a bbox_inches='tight' sobre el lienzo ya dibujado"""
+        renderer = fig.canvas.get_renderer()
+        bbox = fig.get_tightbbox(renderer).padded(plt.rcParams['savefig.pad_inches'])
+        x0, y0, x1, y1 = bbox.extents * fig.dpi
+        width, height = fig.canvas.get_width_height()
+        # El lienzo tiene el origen arriba; matplotlib, abajo
+        return (max(0, int(np.floor(x0))), max(0, int(np.floor(height - y1))),
+                min(width, int(np.ceil(x1))), min(height, int(np.ceil(height - y0))))
+
+    def iter_demo_frames(self, num_frames=20, seed=None, start_time=None):
+        """
+        Genera los frames como arrays RGB (H, W, 3) sin pasar por disco. El buffer
+        se reutiliza entre frames: hay que copiarlo para conservarlo. Con matplotlib
+        el recorte ajustado se fija en el primer frame para que todos midan lo mismo.
+        """
+        entropy = np.random.SeedSequence(seed).entropy
+        start_time = start_time or datetime.now()
+        crop_box = None
+
+        for frame_num in range(num_frames):
+            action_name, icon, description, x, y, timestamp = self.frame_spec(frame_num, entropy, start_time)
+            if self.renderer == 'raster':
+                yield self.render_raster_frame(frame_num, action_name, icon, description, x, y, timestamp)
+                continue
+
+            fig = self.draw_matplotlib_frame(frame_num, action_name, icon, description, x, y, timestamp)
+            fig.canvas.draw()
+            if crop_box is None:
+                crop_box = self._tight_crop_box(fig)
+            left, top, right, bottom = crop_box
+            yield np.asarray(fig.canvas.buffer_rgba())[top:bottom, left:right, :3]
+
+    def create_gif_streaming(self, filename='agent_demo.gif', num_frames=20, seed=None, start_time=None,
+                             save_frames=False, progress=None):
+        """
+        Crea el GIF enviando cada frame renderizado directamente al codificador,
+        con memoria constante sea cual sea el número de frames.
+        - save_frames: guarda también los PNG intermedios en 'agent_frames'
+        - progress: callback progress(hechos, total)
+        """
+        print("🎬 Generando GIF en streaming...")
+        frames = self.iter_demo_frames(num_frames, seed, start_time)
+        try:
+            stats = write_gif_stream(frames, filename, duration=FRAME_DURATION_MS,
+                                     dump_dir='agent_frames' if save_frames else None,
+                                     progress=(lambda done: progress(done, num_frames)) if progress else None)
+        except Exception as e:
+            print(f"❌ Error creando GIF: {e}")
+            return None
+        print(f"✅ GIF creado: {filename} ({stats['frames']} frames, {stats['bytes'] / 1e6:.2f} MB, "
+              f"{stats['seconds']:.1f}s)")
+        print(f"📊 {stats['bytes_per_frame'] / 1e3:.1f} KB/frame, {stats['dropped_frames']} frames repetidos fusionados, "
+              f"codificación {stats['encode_seconds']:.1f}s")
+        if self.raster_canvas is not None:
+            print(f"🔤 Caché de textos: {self.raster_canvas.text_cache.summary()}")
+        return stats
+
+    def build_raster_scene(self):
+        """
+        Rasteriza una vez la escena fija con el mismo encuadre que los PNG de
+        matplotlib (14x10 pulgadas a 100 dpi recortadas con bbox_inches='tight')
+        """
+        canvas = RasterCanvas((self.screen_width, self.screen_height), (1390, 990), (10, 58, 1371, 923),
+                              figure_color=self.bg_color, axes_color=self.bg_color)
+        canvas.build_static(self.draw_raster_static, self.scene_cache, **self.scene_fingerprint())
+
+        self.raster_canvas = canvas
+        self.cursor_sprite = canvas.polygon_sprite([(0, 0), (20, -15), (10, -10), (15, -25)],
+                                                   self.cursor_color, 'white', linewidth=2)
+        self.action_sprite = canvas.circle_sprite(50, self.action_color, self.action_color,
+                                                  linewidth=3, alpha=0.3)
+        return canvas
+
+    def scene_fingerprint(self):
+        """Parámetros que determinan la escena fija (clave de la caché de escenas)"""
+        return {
+            'scene': 'simple',
+            'version': SCENE_VERSION,
+            'screen_size': (self.screen_width, self.screen_height),
+            'colors': (self.bg_color, self.text_color),
+            'console': (self.console_x, self.console_y, self.console_width, self.console_height),
+            'icons': DESKTOP_ICONS,
+        }
+
+    def draw_raster_static(self, canvas):
+        """Dibuja en el fondo del lienzo el escritorio, el marco de la consola y los textos fijos"""
+        # Barra de tareas, iconos y fondo de consola
+        canvas.add_static(canvas.rectangle_sprite(self.screen_width, 60, '#333333', 'white', linewidth=2), 0, 0)
+        icon_bg = canvas.rectangle_sprite(70, 70, '#2d2d2d', 'white', linewidth=1)
+        for x, y, _, _ in DESKTOP_ICONS:
+            canvas.add_static(icon_bg, x-35, y-35)
+        canvas.add_static(canvas.rectangle_sprite(self.console_width, self.console_height, 'black',
+                                                  self.text_color, linewidth=2, alpha=0.9),
+                          self.console_x, self.console_y)
+        canvas.add_axes_border('white', 0.8)
+
+        # Textos fijos
+        for x, y, emoji, label in DESKTOP_ICONS:
+            canvas.add_static_text(x, y+5, emoji, ha='center', va='center', color='white', fontsize=24)
+            canvas.add_static_text(x, y-50, label, ha='center', va='center', color='white', fontsize=9, bold=True)
+        canvas.add_static_text(self.console_x + 10, self.console_y + self.console_height - 20,
+                               "AGENT.EXE - Console Output", color='white', fontsize=12, bold=True)
+        canvas.add_static_pixels(canvas.text_sprite('AGENT.EXE - Demostración de Funcionamiento', fontsize=18,
+                                                    color='white', bold=True, ha='center'),
+                                 10 + 1371 / 2, 58 - canvas.points_to_pixels(20))
+
+    def render_raster_frame(self, frame_num, action_name, icon, description, x, y, timestamp):
+        """Compone un frame sobre el fondo rasterizado; retorna el buffer RGB reutilizado"""
+        canvas = self.raster_canvas or self.build_raster_scene()
+        buffer = canvas.begin_frame()
+
+        # Cursor y acción
+        canvas.draw(self.cursor_sprite, x, y)
+        canvas.draw(self.action_sprite, x, y)
+        canvas.draw_text(x, y-80, f"{icon} {action_name}", ha='center', va='center',
+                         color=self.action_color, fontsize=14, bold=True,
+                         boxcolor='black', boxalpha=0.8, boxpad=0.5, boxedge='white')
+        canvas.draw_text(x, y-110, f"({x}, {y})", ha='center', va='center', color='white', fontsize=11,
+                         boxcolor='#333333', boxalpha=0.8, boxpad=0.3, boxedge='white')
+
+        # Consola e información del sistema
+        for i, log in enumerate(self.console_logs(frame_num, action_name, x, y, description, timestamp)):
+            canvas.draw_text(self.console_x + 15, self.console_y + self.console_height - 50 - i*25, log,
+                             color=self.text_color, fontsize=10, monospace=True)
+        canvas.draw_text(20, self.screen_height - 30, self.system_info_text(frame_num), color='white',
+                         fontsize=12, bold=True, boxcolor='#1a1a1a', boxalpha=0.8, boxpad=0.5, boxedge='white')
+        return buffer
+
     def draw_desktop(self, ax):
         """Dibuja elementos del escritorio"""
         # Barra de tareas
@@ -103,18 +325,7 @@ class SimpleAgentVisualizer:
         ax.add_patch(taskbar)
 
         # Iconos del escritorio
-        icons = [
-            (120, 720, "📁", "Documentos"),
-            (250, 720, "🌐", "Browser"),
-            (380, 720, "📝", "Notepad"),
-            (510, 720, "📊", "Excel"),
-            (640, 720, "🖼️", "Imagen.png"),
-            (120, 600, "⚙️", "Settings"),
-            (250, 600, "🎵", "Media"),
-            (380, 600, "📂", "Files")
-        ]
-
-        for x, y, emoji, label in icons:
+        for x, y, emoji, label in DESKTOP_ICONS:
             # Fondo del icono
             icon_bg = patches.Rectangle((x-35, y-35), 70, 70,
                                       facecolor='#2d2d2d', edgecolor='white', linewidth=1)
@@ -150,10 +361,10 @@ class SimpleAgentVisualizer:
                 color='white', fontsize=11,
                 bbox=dict(boxstyle="round,pad=0.3", facecolor='#333333', alpha=0.8))
 
-    def draw_console(self, ax, step, action, x, y, description):
+    def draw_console(self, ax, step, action, x, y, description, timestamp):
         """Dibuja la ventana de consola con logs"""
-        console_x, console_y = 50, 50
-        console_width, console_height = self.screen_width - 100, 150
+        console_x, console_y = self.console_x, self.console_y
+        console_width, console_height = self.console_width, self.console_height
 
         # Fondo de consola
         console_bg = patches.Rectangle((console_x, console_y), console_width, console_height,
@@ -167,31 +378,34 @@ class SimpleAgentVisualizer:
                 color='white', fontsize=12, fontweight='bold')
 
         # Logs simulados
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        logs = [
+        for i, log in enumerate(self.console_logs(step, action, x, y, description, timestamp)):
+            ax.text(console_x + 15, console_y + console_height - 50 - i*25, log,
+                   color=self.text_color, fontsize=10, fontfamily='monospace')
+
+    def console_logs(self, step, action, x, y, description, timestamp):
+        """Líneas de log de la consola para el paso"""
+        timestamp = timestamp.strftime("%H:%M:%S.%f")[:-3]
+        return [
             f"[{step+1:02d}] {timestamp} - REASONING: {description}",
             f"[{step+1:02d}] {timestamp} - ACTION: {action}",
             f"[{step+1:02d}] {timestamp} - COORDINATES: Moving to ({x}, {y})",
             f"[{step+1:02d}] {timestamp} - STATUS: {'Executing...' if step % 3 else 'Completed ✓'}"
         ]
 
-        for i, log in enumerate(logs):
-            ax.text(console_x + 15, console_y + console_height - 50 - i*25, log,
-                   color=self.text_color, fontsize=10, fontfamily='monospace')
-
-    def draw_system_info(self, ax, step):
-        """Dibuja información del sistema"""
-        info_y = self.screen_height - 30
-
-        # Información del agente
+    def system_info_text(self, step):
+        """Línea de información del agente"""
         info_items = [
             f"👁️ Step: {step + 1}",
             f"🤖 Agent: ACTIVE",
             f"🎯 Mode: AUTONOMOUS",
             f"⚡ Status: RUNNING"
         ]
+        return " | ".join(info_items)
 
-        info_text = " | ".join(info_items)
+    def draw_system_info(self, ax, step):
+        """Dibuja información del sistema"""
+        info_y = self.screen_height - 30
+        info_text = self.system_info_text(step)
         ax.text(20, info_y, info_text, color='white', fontsize=12, fontweight='bold',
                bbox=dict(boxstyle="round,pad=0.5", facecolor='#1a1a1a', alpha=0.8))
 
@@ -219,42 +433,76 @@ class SimpleAgentVisualizer:
         print("="*60)
 
     def create_gif_from_frames(self):
-        """Crea GIF desde los frames (requiere PIL)"""
-        try:
-            from PIL import Image
-            import glob
+        """Crea GIF desde los frames de 'agent_frames', abriéndolos de uno en uno"""
+        import glob
 
-            frames = []
-            frame_files = sorted(glob.glob('agent_frames/frame_*.png'))
+        frame_files = sorted(glob.glob('agent_frames/frame_*.png'))
+        if not frame_files:
+            print("❌ No se encontraron frames")
+            return
 
+        def frames():
             for frame_file in frame_files:
-                img = Image.open(frame_file)
-                frames.append(img)
-
-            if frames:
-                frames[0].save(
-                    'agent_demo.gif',
-                    save_all=True,
-                    append_images=frames[1:],
-                    duration=800,  # 0.8 segundos por frame
-                    loop=0
-                )
-                print("✅ GIF creado: agent_demo.gif")
-            else:
-                print("❌ No se encontraron frames")
-
-        except ImportError:
-            print("❌ PIL no está instalado. Usa las opciones online.")
+                with Image.open(frame_file) as img:
+                    yield np.asarray(img.convert('RGB'))
+
+        try:
+            write_gif_stream(frames(), 'agent_demo.gif', duration=FRAME_DURATION_MS)  # 0.8 segundos por frame
+            print("✅ GIF creado: agent_demo.gif")
         except Exception as e:
             print(f"❌ Error creando GIF: {e}")
 
-def main():
+# Visualizador de cada proceso trabajador (una figura o escena raster por proceso)
+_worker_visualizer = None
+
+def _init_frame_worker(renderer, cache_dir=None):
+    """Inicializa el proceso trabajador con el backend Agg y su propio visualizador"""
+    global _worker_visualizer
+    plt.switch_backend('Agg')
+    _worker_visualizer = SimpleAgentVisualizer(renderer=renderer,
+                                               scene_cache=SceneCache(cache_dir) if cache_dir else None)
+
+def _render_frame_job(frame_num, entropy, start_time):
+    """Renderiza un frame en el proceso trabajador"""
+    return _worker_visualizer.render_frame(frame_num, entropy, start_time)
+
+def print_progress(done, total):
+    """Callback de progreso que reescribe una única línea de la consola"""
+    sys.stdout.write(f"\r⏳ Frames: {done}/{total}")
+    if done == total:
+        sys.stdout.write("\n")
+    sys.stdout.flush()
+
+def main(argv=None):
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Generador de demo visual - Agent.exe")
+    parser.add_argument('--renderer', choices=RENDERERS, default='matplotlib',
+                        help="Motor de render de los frames")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Procesos para renderizar frames en paralelo")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla para repetir exactamente la misma demo")
+    parser.add_argument('--stream', type=int, default=None, metavar='FRAMES',
+                        help="Crear agent_demo.gif en streaming con FRAMES frames, sin preguntas")
+    parser.add_argument('--save-frames', action='store_true',
+                        help="Con --stream, guardar también los PNG en 'agent_frames'")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Carpeta de la caché de escenas (por defecto $AGENT_GIF_CACHE o ~/.cache/agent_gif)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Dibujar siempre la escena fija, sin caché en disco")
+    args = parser.parse_args(argv)
     try:
         print("🚀 AGENT.EXE - GENERADOR DE DEMO VISUAL")
         print("="*50)
 
-        visualizer = SimpleAgentVisualizer()
+        visualizer = SimpleAgentVisualizer(renderer=args.renderer,
+                                           scene_cache=None if args.no_cache else SceneCache(args.cache_dir))
+
+        # Modo streaming: del renderizador al GIF sin pasar por disco
+        if args.stream is not None:
+            visualizer.create_gif_streaming(num_frames=args.stream, seed=args.seed,
+                                            save_frames=args.save_frames, progress=print_progress)
+            return
 
         # Preguntar cuántos frames
         try:
@@ -263,7 +511,8 @@ def main():
             num_frames = 20
 
         # Generar frames
-        visualizer.create_static_demo_frames(num_frames)
+        visualizer.create_static_demo_frames(num_frames, workers=args.workers, seed=args.seed,
+                                             progress=print_progress)
 
         # Preguntar si crear GIF automáticamente
         create_gif = input("\n¿Intentar crear GIF automáticamente? (y/n): ").lower().strip()
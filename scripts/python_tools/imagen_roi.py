@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura y escritura de una región de interés sin decodificar la imagen completa
+Los formatos sin compresión (BMP, PPM, TIFF sin comprimir con sus tiras contiguas,
+.npy) se mapean en memoria y solo se tocan las filas de la región; el resto pasa por PIL
+"""
+
+import os
+import shutil
+
+import numpy as np
+from PIL import Image
+
+# Modo raw de PIL -> (bytes por píxel, posición de R, G y B dentro del píxel)
+RAW_CHANNEL_LAYOUTS = {
+    'RGB': (3, [0, 1, 2]),
+    'BGR': (3, [2, 1, 0]),
+    'RGBX': (4, [0, 1, 2]),
+    'RGBA': (4, [0, 1, 2]),
+    'BGRX': (4, [2, 1, 0]),
+    'BGRA': (4, [2, 1, 0]),
+}
+
+
+class RoiImageSource:
+    def __init__(self, path):
+        """Lee solo la cabecera de la imagen y detecta si su ráster se puede mapear en memoria"""
+        self.path = path
+        self.raw_layout = None
+
+        if path.lower().endswith('.npy'):
+            array = np.load(path, mmap_mode='r')
+            if array.ndim != 3 or array.shape[2] != 3 or array.dtype != np.uint8:
+                raise ValueError(f"{path}: se esperaba un array uint8 (H, W, 3), recibido {array.dtype} {array.shape}")
+            self.format = 'NPY'
+            self.mode = 'RGB'
+            self.size = (array.shape[1], array.shape[0])
+            return
+
+        with Image.open(path) as img:
+            self.format = img.format
+            self.mode = img.mode
+            self.size = img.size
+            self.raw_layout = self._find_raw_layout(img)
+
+    @property
+    def shape(self):
+        """Forma (H, W, 3) de la imagen RGB completa, sin decodificarla"""
+        return (self.size[1], self.size[0], 3)
+
+    @property
+    def memory_mapped(self):
+        """Indica si la región se lee y escribe directamente sobre el archivo"""
+        return self.format == 'NPY' or self.raw_layout is not None
+
+    def _find_raw_layout(self, img):
+        """
+        Distribución del ráster en el archivo si es un único bloque sin comprimir.
+        Las tiras de un TIFF cuentan como un bloque si cubren el ancho completo y
+        están seguidas en el archivo, en orden y sin huecos.
+        """
+        if not img.tile:
+            return None
+        first = img.tile[0]
+        if first[0] != 'raw':
+            return None
+
+        args = first[3] if isinstance(first[3], tuple) else (first[3], 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if rawmode not in RAW_CHANNEL_LAYOUTS:
+            return None
+
+        bytes_per_pixel, channel_order = RAW_CHANNEL_LAYOUTS[rawmode]
+        width, height = img.size
+        stride = stride or width * bytes_per_pixel
+        if len(img.tile) > 1 and orientation < 0:
+            return None
+        next_row = 0
+        for tile in img.tile:
+            if tile[0] != 'raw' or tile[3] != first[3]:
+                return None
+            start_x, start_y, end_x, end_y = tile[1]
+            if (start_x, start_y, end_x) != (0, next_row, width) or tile[2] != first[2] + start_y * stride:
+                return None
+            next_row = end_y
+        if next_row != height:
+            return None
+
+        return {
+            'offset': first[2],
+            'stride': stride,
+            'bytes_per_pixel': bytes_per_pixel,
+            'channel_order': channel_order,
+            'bottom_up': orientation < 0,
+            'height': height,
+        }
+
+    def _map_rows(self, path, mode, box):
+        """Mapea solo las filas del archivo que cubren la región; retorna (mapa, filas invertidas)"""
+        start_x, start_y, end_x, end_y = box
+        layout = self.raw_layout
+        height, stride = layout['height'], layout['stride']
+
+        # En archivos de abajo a arriba (BMP) la fila y está en la posición height-1-y
+        first_row = height - end_y if layout['bottom_up'] else start_y
+        rows = np.memmap(path, dtype=np.uint8, mode=mode, offset=layout['offset'] + first_row * stride,
+                         shape=(end_y - start_y, stride))
+        bpp = layout['bytes_per_pixel']
+        pixels = rows[:, start_x * bpp:end_x * bpp].reshape(end_y - start_y, end_x - start_x, bpp)
+        return rows, (pixels[::-1] if layout['bottom_up'] else pixels)
+
+    def _check_box(self, box):
+        start_x, start_y, end_x, end_y = box
+        width, height = self.size
+        if not (0 <= start_x < end_x <= width and 0 <= start_y < end_y <= height):
+            raise ValueError(f"Región {box} fuera de la imagen {self.size}")
+
+    def read_region(self, box):
+        """
+        Retorna la región (start_x, start_y, end_x, end_y) como array uint8 (h, w, 3).
+        Con formatos mapeables solo se leen las filas de la región; con formatos
+        comprimidos PIL decodifica la imagen completa antes de recortar.
+        """
+        self._check_box(box)
+        start_x, start_y, end_x, end_y = box
+
+        if self.format == 'NPY':
+            return np.array(np.load(self.path, mmap_mode='r')[start_y:end_y, start_x:end_x])
+
+        if self.raw_layout is not None:
+            rows, pixels = self._map_rows(self.path, 'r', box)
+            region = np.array(pixels[..., self.raw_layout['channel_order']])
+            del rows
+            return region
+
+        with Image.open(self.path) as img:
+            region = img.crop(box)
+            if region.mode != 'RGB':
+                region = region.convert('RGB')
+            return np.array(region)
+
+    def write_region(self, box, patch, output_path=None):
+        """
+        Escribe el parche en la región de una copia del archivo (o del propio archivo
+        si output_path es None). Con formatos mapeables se copian los bytes y solo se
+        reescriben las filas de la región; si no, se decodifica, pega y recodifica.
+        """
+        self._check_box(box)
+        start_x, start_y, end_x, end_y = box
+        patch = np.asarray(patch, dtype=np.uint8)
+        if patch.shape != (end_y - start_y, end_x - start_x, 3):
+            raise ValueError(f"Parche de forma {patch.shape} no encaja en la región {box}")
+
+        output_path = output_path or self.path
+        same_format = os.path.splitext(output_path)[1].lower() == os.path.splitext(self.path)[1].lower()
+
+        if self.memory_mapped and same_format:
+            if os.path.abspath(output_path) != os.path.abspath(self.path):
+                shutil.copyfile(self.path, output_path)
+
+            if self.format == 'NPY':
+                array = np.load(output_path, mmap_mode='r+')
+                array[start_y:end_y, start_x:end_x] = patch
+                array.flush()
+                del array
+            else:
+                rows, pixels = self._map_rows(output_path, 'r+', box)
+                pixels[..., self.raw_layout['channel_order']] = patch
+                rows.flush()
+                del rows
+            return output_path
+
+        if self.format == 'NPY':
+            img = Image.fromarray(np.load(self.path, mmap_mode='r'))
+        else:
+            img = Image.open(self.path)
+            img.load()
+        patch_image = Image.fromarray(patch)
+        if img.mode == 'P':
+            # Con convert('P') PIL usaría su paleta web: se ajusta a la paleta del propio archivo
+            patch_image = patch_image.quantize(palette=img, dither=Image.Dither.NONE)
+        else:
+            patch_image = patch_image.convert(img.mode)
+        img.paste(patch_image, box)
+        img.save(output_path)
+        return output_path
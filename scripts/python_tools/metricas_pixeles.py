@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas de calidad de una perturbación de píxeles
+Todo se calcula con operaciones de arrays sobre la diferencia dispersa; el SSIM
+solo se evalúa en las ventanas que tocan los píxeles cambiados
+"""
+
+import numpy as np
+
+from diff_pixeles import PixelDiff
+from saliencia_roi import integral_image, window_sums
+
+# Constantes estándar del SSIM para imágenes de 8 bits
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+
+def _changed_bbox(diff):
+    """Caja (start_x, start_y, end_x, end_y) que contiene todos los píxeles cambiados"""
+    xs, ys = diff.coordinates
+    return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
+
+
+def _ssim_map(x, y, window):
+    """Mapa SSIM de todas las ventanas window x window de dos canales float64"""
+    area = float(window * window)
+
+    def mean(values):
+        return window_sums(integral_image(values), window) / area
+
+    mu_x, mu_y = mean(x), mean(y)
+    var_x = mean(x * x) - mu_x * mu_x
+    var_y = mean(y * y) - mu_y * mu_y
+    cov = mean(x * y) - mu_x * mu_y
+    return (((2 * mu_x * mu_y + SSIM_C1) * (2 * cov + SSIM_C2))
+            / ((mu_x * mu_x + mu_y * mu_y + SSIM_C1) * (var_x + var_y + SSIM_C2)))
+
+
+def global_ssim(original, modified):
+    """SSIM con una sola ventana del tamaño de la imagen, promediado por canal"""
+    x = original.reshape(original.shape[0] * original.shape[1], -1).astype(np.float64)
+    y = modified.reshape(x.shape).astype(np.float64)
+    mu_x, mu_y = x.mean(axis=0), y.mean(axis=0)
+    var_x, var_y = x.var(axis=0), y.var(axis=0)
+    cov = ((x - mu_x) * (y - mu_y)).mean(axis=0)
+    ssim = (((2 * mu_x * mu_y + SSIM_C1) * (2 * cov + SSIM_C2))
+            / ((mu_x * mu_x + mu_y * mu_y + SSIM_C1) * (var_x + var_y + SSIM_C2)))
+    return float(ssim.mean())
+
+
+def windowed_ssim(original, diff, window=7):
+    """
+    SSIM medio por ventanas (filtro de caja con imágenes integrales), promediado
+    por canal. Las ventanas que no tocan ningún píxel cambiado valen 1 exactamente,
+    así que solo se calculan las que rodean a la caja de cambios. Si la imagen es
+    más pequeña que la ventana se usa el SSIM global.
+    """
+    h, w = original.shape[:2]
+    if len(diff) == 0:
+        return 1.0
+    if window > min(h, w):
+        return global_ssim(original, diff.applied_to(original))
+    total_windows = (h - window + 1) * (w - window + 1)
+
+    start_x, start_y, end_x, end_y = _changed_bbox(diff)
+    start_x, start_y = max(0, start_x - window + 1), max(0, start_y - window + 1)
+    end_x, end_y = min(w, end_x + window - 1), min(h, end_y + window - 1)
+
+    # Región original y la misma región con la diferencia aplicada
+    region = original[start_y:end_y, start_x:end_x].reshape(end_y - start_y, end_x - start_x, -1)
+    modified = region.copy()
+    xs, ys = diff.indices % diff.shape[1] - start_x, diff.indices // diff.shape[1] - start_y
+    PixelDiff(region.shape, ys * region.shape[1] + xs, diff.channels, diff.deltas).apply(modified)
+
+    ssim_sum = 0.0
+    for channel in range(region.shape[2]):
+        ssim = _ssim_map(region[..., channel].astype(np.float64), modified[..., channel].astype(np.float64), window)
+        ssim_sum += ssim.sum() + (total_windows - ssim.size)
+    return float(ssim_sum / (region.shape[2] * total_windows))
+
+
+def delta_histograms(diff):
+    """Histograma de deltas por canal como lista de [delta, cuenta] (solo deltas presentes)"""
+    histograms = {}
+    for channel in range(diff.shape[2]):
+        deltas = diff.deltas[diff.channels == channel].astype(np.int32)
+        counts = np.bincount(deltas + 255, minlength=511)
+        present = np.flatnonzero(counts)
+        histograms[str(channel)] = [[int(d - 255), int(counts[d])] for d in present]
+    return histograms
+
+
+def compute_metrics(original, modified=None, diff=None, modified_pixels=None, ssim_window=7):
+    """
+    Calcula las métricas de la perturbación como dict serializable a JSON.
+    - original: imagen base uint8 (H, W, C)
+    - modified / diff: imagen modificada o su PixelDiff (basta con uno)
+    - modified_pixels: array estructurado (x, y, change) para intensidades y colisiones
+
+    Incluye normas L0 / L2 / L∞, MSE, PSNR, SSIM por ventanas, histogramas de
+    deltas por canal y el número de píxeles sorteados más de una vez. Con imágenes
+    idénticas el PSNR es infinito y se guarda como None (JSON estricto no admite inf).
+    """
+    if diff is None:
+        if modified is None:
+            raise ValueError("Se necesita la imagen modificada o su diferencia")
+        diff = PixelDiff.from_images(original, modified)
+
+    deltas = diff.deltas.astype(np.float64)
+    squared = float(np.dot(deltas, deltas))
+    mse = squared / original.size
+    metrics = {
+        'l0_pixels': int(diff.pixel_indices.size),
+        'l0_values': len(diff),
+        'l2': float(np.sqrt(squared)),
+        'linf': int(np.abs(diff.deltas).max()) if len(diff) else 0,
+        'mse': mse,
+        'psnr': float(10 * np.log10(255.0 ** 2 / mse)) if mse > 0 else None,
+        'ssim': windowed_ssim(original, diff, ssim_window),
+        'delta_histograms': delta_histograms(diff),
+    }
+
+    if modified_pixels is not None and len(modified_pixels):
+        changes = modified_pixels['change']
+        intensities = np.abs(changes)
+        _, hits = np.unique(modified_pixels['y'].astype(np.int64) * original.shape[1] + modified_pixels['x'],
+                            return_counts=True)
+        metrics.update({
+            'drawn_pixels': int(len(modified_pixels)),
+            'mean_intensity': float(intensities.mean()),
+            'max_intensity': int(intensities.max()),
+            'min_intensity': int(intensities.min()),
+            'positive_changes': int(np.count_nonzero(changes > 0)),
+            'negative_changes': int(np.count_nonzero(changes <= 0)),
+            'collisions': int(np.count_nonzero(hits > 1)),
+            'repeated_hits': int((hits - 1).sum()),
+        })
+    return metrics
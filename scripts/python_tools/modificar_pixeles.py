@@ -8,21 +8,95 @@ Selecciona un área de 50x50 píxeles y modifica aleatoriamente algunos píxeles
 import numpy as np
 import matplotlib.pyplot as plt
 from PIL import Image
-import random
+import argparse
+import contextlib
+import glob
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from comparacion_rapida import render_comparison
+from diff_pixeles import PixelDiff
+from imagen_roi import RoiImageSource
+from metricas_pixeles import compute_metrics
+from perfil_etapas import StageProfiler, maybe_stage, print_summary, summarize, write_trace
+from saliencia_roi import select_salient_areas
+
+# Registro compacto de cada píxel modificado: posición y cambio de intensidad
+MODIFIED_PIXEL_DTYPE = np.dtype([('x', np.int32), ('y', np.int32), ('change', np.int16)])
 
 class PixelModifier:
-    def __init__(self, image_path):
-        """Inicializa con la ruta de la imagen"""
+    def __init__(self, image_path, seed=None, profiler=None):
+        """
+        Inicializa con la ruta de la imagen y una semilla opcional para reproducibilidad.
+        - profiler: StageProfiler opcional que mide cada etapa del proceso
+        """
         self.image_path = image_path
+        self.profiler = profiler
         self.original_image = None
-        self.modified_image = None
-        self.saturated_image = None
-        self.modified_pixels = []
-
-    def load_image(self):
-        """Carga la imagen desde el archivo"""
+        self.image_source = None
+        self.region = None
+        self.diff = None
+        self.area_coords = None
+        self.intensity_range = None
+        # (número de teselas, lado) tras modify_tiles; None en un ataque de un área
+        self.tiles = None
+        self.modified_pixels = np.empty(0, dtype=MODIFIED_PIXEL_DTYPE)
+        # La secuencia de semillas permite derivar generadores independientes por tesela
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+        self._modified_image = None
+        self._saturated_image = None
+
+    @property
+    def modified_image(self):
+        """Imagen modificada, derivada de la diferencia la primera vez que se pide"""
+        if self._modified_image is None and self.diff is not None:
+            self._modified_image = self.diff.applied_to(self.original_image)
+        return self._modified_image
+
+    @modified_image.setter
+    def modified_image(self, image):
+        self._modified_image = image
+        self._saturated_image = None
+
+    @property
+    def saturated_image(self):
+        """Imagen con los píxeles modificados en rojo, derivada bajo demanda"""
+        if self._saturated_image is None and self.diff is not None and len(self.modified_pixels):
+            self._saturated_image = self.modified_image.copy()
+            self._saturated_image[self.modified_pixels['y'], self.modified_pixels['x']] = [255, 0, 0]
+        return self._saturated_image
+
+    @saturated_image.setter
+    def saturated_image(self, image):
+        self._saturated_image = image
+
+    @property
+    def image_shape(self):
+        """Forma de la imagen completa, aunque solo se haya cargado una región"""
+        if self.image_source is not None:
+            return self.image_source.shape
+        if self.original_image is not None:
+            return self.original_image.shape
+        return None
+
+    def load_image(self, lazy=False):
+        """
+        Carga la imagen desde el archivo.
+        Con lazy=True solo se leen los metadatos; la región de interés se decodifica
+        después con load_region (o automáticamente al modificar píxeles).
+        """
         try:
+            if lazy:
+                self.image_source = RoiImageSource(self.image_path)
+                mapped = "mapeada en memoria" if self.image_source.memory_mapped else "vía PIL"
+                print(f"✅ Metadatos cargados: {self.image_source.shape} ({self.image_source.format}, {mapped})")
+                return True
+
             # Cargar imagen
             img = Image.open(self.image_path)
             # Convertir a RGB si no lo está
@@ -36,13 +110,57 @@ class PixelModifier:
             print(f"❌ Error cargando imagen: {e}")
             return False
 
+    def load_region(self, area_coords):
+        """
+        Decodifica solo la región (start_x, start_y, end_x, end_y) de la imagen.
+        A partir de aquí original_image, modified_image, saturated_image y
+        modified_pixels están en coordenadas de la región.
+        """
+        if self.image_source is None:
+            self.image_source = RoiImageSource(self.image_path)
+        self.original_image = self.image_source.read_region(area_coords)
+        self.region = tuple(int(c) for c in area_coords)
+        self.diff = None
+        self.modified_image = None
+        print(f"✅ Región cargada: {self.original_image.shape} de {self.image_source.shape}")
+        return True
+
+    def _to_region_coords(self, area_coords):
+        """Traduce un área en coordenadas de la imagen completa a coordenadas de la región"""
+        region_x, region_y, region_end_x, region_end_y = self.region
+        start_x, start_y, end_x, end_y = area_coords
+        if start_x < region_x or start_y < region_y or end_x > region_end_x or end_y > region_end_y:
+            raise ValueError(f"El área {area_coords} no está dentro de la región cargada {self.region}")
+        return (start_x - region_x, start_y - region_y, end_x - region_x, end_y - region_y)
+
+    def full_image_diff(self):
+        """Diferencia en coordenadas de la imagen completa (también en modo región)"""
+        if self.diff is None or self.region is None:
+            return self.diff
+        return self.diff.expanded(self.image_shape, self.region[:2])
+
+    def save_modified_image(self, output_path):
+        """
+        Guarda la imagen modificada. En modo región el parche se inserta en una copia
+        del archivo original sin decodificar el resto (si el formato lo permite).
+        """
+        if self.modified_image is None:
+            print("❌ Primero debes modificar píxeles")
+            return False
+        if self.region is not None:
+            self.image_source.write_region(self.region, self.modified_image, output_path)
+        else:
+            Image.fromarray(self.modified_image).save(output_path)
+        print(f"💾 Imagen modificada guardada como: {output_path}")
+        return True
+
     def select_center_area(self, area_size=50):
         """Selecciona un área cuadrada del centro de la imagen"""
-        if self.original_image is None:
+        if self.image_shape is None:
             print("❌ Primero debes cargar la imagen")
             return None
 
-        h, w = self.original_image.shape[:2]
+        h, w = self.image_shape[:2]
 
         # Calcular centro
         center_y, center_x = h // 2, w // 2
@@ -59,16 +177,88 @@ class PixelModifier:
 
         return (start_x, start_y, end_x, end_y)
 
-    def modify_pixels_randomly(self, area_coords, modification_percentage=30, intensity_range=(0, 10)):
+    def select_salient_areas(self, area_size=50, top_k=1, strategy='gradient', step=1):
+        """
+        Selecciona las top_k áreas cuadradas más salientes (gradiente o varianza local)
+        que no se solapan. Cada área tiene el formato de select_center_area.
+        """
+        if self.original_image is None or self.region is not None:
+            print("❌ Primero debes cargar la imagen completa")
+            return None
+
+        areas = select_salient_areas(self.original_image, area_size, top_k, strategy, step)
+        for start_x, start_y, end_x, end_y in areas:
+            print(f"📍 Área saliente ({strategy}): ({start_x}, {start_y}) a ({end_x}, {end_y})")
+        return areas
+
+    def select_area(self, area_size=50, strategy='center'):
+        """Selecciona un área con la estrategia indicada: center, gradient o variance"""
+        if strategy == 'center':
+            return self.select_center_area(area_size)
+        areas = self.select_salient_areas(area_size, top_k=1, strategy=strategy)
+        return areas[0] if areas else None
+
+    def _draw_pixel_changes(self, area_coords, pixels_to_modify, intensity_range,
+                            num_variants=1, unique_pixels=False, rng=None):
+        """Sortea posiciones, intensidades y signos de num_variants variantes de una vez"""
+        rng = rng or self.rng
+        start_x, start_y, end_x, end_y = area_coords
+        area_width = end_x - start_x
+        area_height = end_y - start_y
+        shape = (num_variants, pixels_to_modify)
+
+        if unique_pixels:
+            # Muestreo sin reemplazo: los primeros n índices de una permutación por variante
+            if pixels_to_modify > area_width * area_height:
+                raise ValueError("No hay suficientes píxeles en el área para muestrear sin reemplazo")
+            flat = np.argsort(rng.random((num_variants, area_width * area_height)), axis=1)
+            flat = flat[:, :pixels_to_modify]
+            xs = start_x + flat % area_width
+            ys = start_y + flat // area_width
+        else:
+            xs = rng.integers(start_x, end_x, size=shape)
+            ys = rng.integers(start_y, end_y, size=shape)
+
+        intensity_changes = rng.integers(intensity_range[0], intensity_range[1] + 1, size=shape)
+        negative = rng.random(shape) < 0.5
+
+        pixels = np.empty(shape, dtype=MODIFIED_PIXEL_DTYPE)
+        pixels['x'] = xs
+        pixels['y'] = ys
+        pixels['change'] = np.where(negative, -intensity_changes, intensity_changes)
+        return pixels
+
+    def _perturbed_areas(self, area_coords, pixels):
+        """Aplica los cambios (K, n) al área y devuelve K parches uint8 (K, h, w, 3)"""
+        start_x, start_y, end_x, end_y = area_coords
+        num_variants = pixels.shape[0]
+        area = self.original_image[start_y:end_y, start_x:end_x]
+
+        # Los píxeles repetidos acumulan sus cambios antes de saturar
+        area_changes = np.zeros((num_variants, end_y - start_y, end_x - start_x), dtype=np.int32)
+        variant_index = np.arange(num_variants)[:, None]
+        np.add.at(area_changes, (variant_index, pixels['y'] - start_y, pixels['x'] - start_x), pixels['change'])
+
+        # Más allá de ±255 el resultado satura igual, así que los cambios caben en int16
+        # y el parche (K, h, w, 3) se calcula en int16 en lugar de int32
+        np.clip(area_changes, -255, 255, out=area_changes)
+        return np.clip(area.astype(np.int16) + area_changes.astype(np.int16)[..., None], 0, 255).astype(np.uint8)
+
+    def modify_pixels_randomly(self, area_coords, modification_percentage=30, intensity_range=(0, 10),
+                               unique_pixels=False):
         """Modifica aleatoriamente un porcentaje de píxeles en el área"""
+        if self.original_image is None and self.image_source is not None:
+            self.load_region(area_coords)
         if self.original_image is None:
             print("❌ Primero debes cargar la imagen")
             return False
 
+        if self.region is not None:
+            area_coords = self._to_region_coords(area_coords)
         start_x, start_y, end_x, end_y = area_coords
-
-        # Crear copia de la imagen original (convertir a int32 para evitar overflow)
-        self.modified_image = self.original_image.astype(np.int32)
+        self.area_coords = tuple(area_coords)
+        self.intensity_range = tuple(intensity_range)
+        self.tiles = None
 
         # Calcular número de píxeles en el área
         area_width = end_x - start_x
@@ -79,55 +269,176 @@ class PixelModifier:
         print(f"🎯 Píxeles totales en área: {total_pixels}")
         print(f"🔧 Píxeles a modificar: {pixels_to_modify} ({modification_percentage}%)")
 
-        # Generar posiciones aleatorias para modificar
-        self.modified_pixels = []
+        pixels = self._draw_pixel_changes(area_coords, pixels_to_modify, intensity_range,
+                                          unique_pixels=unique_pixels)
+        self.modified_pixels = pixels[0]
 
-        for _ in range(pixels_to_modify):
-            # Posición aleatoria dentro del área
-            x = random.randint(start_x, end_x - 1)
-            y = random.randint(start_y, end_y - 1)
-
-            # Modificación aleatoria de intensidad
-            intensity_change = random.randint(intensity_range[0], intensity_range[1])
+        # Solo se guarda la diferencia; las imágenes completas se derivan al pedirlas
+        patch = self._perturbed_areas(area_coords, pixels)[0]
+        self.diff = PixelDiff.from_patch(self.original_image, area_coords, patch)
+        self.modified_image = None
 
-            # Decidir si sumar o restar
-            if random.choice([True, False]):
-                intensity_change = -intensity_change
+        print(f"✅ {len(self.modified_pixels)} píxeles modificados")
+        return True
 
-            # Aplicar modificación a cada canal RGB
-            for channel in range(3):
-                original_value = int(self.modified_image[y, x, channel])
-                new_value = original_value + intensity_change
-                # Mantener en rango válido [0, 255]
-                new_value = max(0, min(255, new_value))
-                self.modified_image[y, x, channel] = new_value
+    def generate_variants(self, num_variants, area_coords=None, modification_percentage=30,
+                          intensity_range=(0, 10), unique_pixels=False, lazy=False, as_diffs=False):
+        """
+        Genera num_variants variantes adversariales de la imagen en una sola pasada.
+        Retorna (variantes, variant_pixels): variantes es un array uint8 (K, H, W, 3),
+        un generador que produce cada variante bajo demanda (lazy=True) o una lista
+        de PixelDiff contra la imagen original (as_diffs=True); variant_pixels es un
+        array estructurado (K, n) con los cambios de cada variante.
+        area_coords va en coordenadas de la imagen completa; en modo región (o con
+        la imagen cargada con lazy=True) las variantes y sus píxeles quedan en
+        coordenadas de la región, como en modify_pixels_randomly.
+        """
+        if self.original_image is None and self.image_source is None and not self.load_image():
+            return None
 
-            # Guardar información del píxel modificado
-            self.modified_pixels.append((x, y, intensity_change))
+        if area_coords is None:
+            area_coords = self.select_center_area(50)
+        if self.original_image is None:
+            self.load_region(area_coords)
+        if self.region is not None:
+            area_coords = self._to_region_coords(area_coords)
+        start_x, start_y, end_x, end_y = area_coords
 
-        # Convertir de vuelta a uint8
-        self.modified_image = self.modified_image.astype(np.uint8)
+        total_pixels = (end_x - start_x) * (end_y - start_y)
+        pixels_to_modify = int(total_pixels * modification_percentage / 100)
+        variant_pixels = self._draw_pixel_changes(area_coords, pixels_to_modify, intensity_range,
+                                                  num_variants=num_variants, unique_pixels=unique_pixels)
+        patches = self._perturbed_areas(area_coords, variant_pixels)
+
+        print(f"🧬 {num_variants} variantes con {pixels_to_modify} píxeles modificados cada una")
+
+        if as_diffs:
+            diffs = [PixelDiff.from_patch(self.original_image, area_coords, patch) for patch in patches]
+            return diffs, variant_pixels
+
+        if lazy:
+            def variants():
+                for patch in patches:
+                    variant = self.original_image.copy()
+                    variant[start_y:end_y, start_x:end_x] = patch
+                    yield variant
+            return variants(), variant_pixels
+
+        variants = np.repeat(self.original_image[None], num_variants, axis=0)
+        variants[:, start_y:end_y, start_x:end_x] = patches
+        return variants, variant_pixels
+
+    def tile_grid(self, tile_size=50):
+        """Áreas de la cuadrícula de teselas que cubre la imagen (las del borde pueden ser menores)"""
+        h, w = self.original_image.shape[:2]
+        return {(row, col): (x, y, min(x + tile_size, w), min(y + tile_size, h))
+                for row, y in enumerate(range(0, h, tile_size))
+                for col, x in enumerate(range(0, w, tile_size))}
+
+    def modify_tiles(self, tile_size=50, modification_percentage=30, intensity_range=(0, 10),
+                     tiles=None, unique_pixels=False, workers=None):
+        """
+        Modifica de forma independiente todas las teselas de la cuadrícula (o las de
+        tiles, una lista de (fila, columna)) en un pool de hilos. Cada tesela usa su
+        propio generador derivado de la semilla y de sus coordenadas, así que el
+        resultado no depende del número de hilos ni de qué otras teselas se pidan.
+        Retorna el informe con estadísticas por tesela y agregadas.
+        """
+        if self.original_image is None or self.region is not None:
+            print("❌ Primero debes cargar la imagen completa")
+            return None
 
-        print(f"✅ {len(self.modified_pixels)} píxeles modificados")
-        return True
+        grid = self.tile_grid(tile_size)
+        selected = sorted(grid) if tiles is None else [tuple(tile) for tile in tiles]
+        missing = [tile for tile in selected if tile not in grid]
+        if missing:
+            raise ValueError(f"Teselas fuera de la cuadrícula: {missing}")
+        if not selected:
+            raise ValueError("No hay teselas que modificar")
+
+        # La semilla de cada tesela sale de sus coordenadas, no de su posición en la lista
+        tile_seeds = [np.random.SeedSequence(self.seed_sequence.entropy,
+                                             spawn_key=self.seed_sequence.spawn_key + tile)
+                      for tile in selected]
+        modified = self.original_image.copy()
+
+        def perturb_tile(tile, seed):
+            area_coords = grid[tile]
+            start_x, start_y, end_x, end_y = area_coords
+            pixels_to_modify = int((end_x - start_x) * (end_y - start_y) * modification_percentage / 100)
+            pixels = self._draw_pixel_changes(area_coords, pixels_to_modify, intensity_range,
+                                              unique_pixels=unique_pixels, rng=np.random.default_rng(seed))
+            patch = self._perturbed_areas(area_coords, pixels)[0]
+            # Cada hilo escribe en su propia tesela: no hay solapamiento entre escrituras
+            modified[start_y:end_y, start_x:end_x] = patch
+            diff = PixelDiff.from_patch(self.original_image, area_coords, patch)
+            intensities = np.abs(pixels[0]['change'])
+            stats = {
+                'tile': tile,
+                'area': area_coords,
+                'modified_pixels': int(pixels_to_modify),
+                'changed_values': len(diff),
+                'mean_intensity': float(intensities.mean()) if pixels_to_modify else 0.0,
+                'max_intensity': int(intensities.max()) if pixels_to_modify else 0,
+            }
+            return pixels[0], diff, stats
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(perturb_tile, selected, tile_seeds))
+        seconds = time.perf_counter() - start
+
+        self.modified_pixels = np.concatenate([pixels for pixels, _, _ in results])
+        self.diff = PixelDiff.concatenate([diff for _, diff, _ in results])
+        self.modified_image = modified
+        # Para los textos de las comparaciones: caja que abarca las teselas tocadas
+        areas = np.array([grid[tile] for tile in selected])
+        self.area_coords = (int(areas[:, 0].min()), int(areas[:, 1].min()),
+                            int(areas[:, 2].max()), int(areas[:, 3].max()))
+        self.intensity_range = tuple(intensity_range)
+        self.tiles = (len(selected), tile_size)
+
+        tile_stats = [stats for _, _, stats in results]
+        total_pixels = sum(stats['modified_pixels'] for stats in tile_stats)
+        report = {
+            'tiles': len(tile_stats),
+            'tile_size': tile_size,
+            'modified_pixels': total_pixels,
+            'changed_values': sum(stats['changed_values'] for stats in tile_stats),
+            'mean_intensity': (float(np.abs(self.modified_pixels['change']).mean()) if total_pixels else 0.0),
+            'max_intensity': max((stats['max_intensity'] for stats in tile_stats), default=0),
+            'seconds': seconds,
+            'tile_stats': tile_stats,
+        }
+
+        print(f"🧩 {report['tiles']} teselas modificadas | {total_pixels} píxeles | {seconds:.3f}s")
+        return report
 
     def create_saturated_version(self):
         """Crea versión saturada donde los píxeles modificados se ven claramente"""
-        if self.modified_image is None or not self.modified_pixels:
+        if self.diff is None or len(self.modified_pixels) == 0:
             print("❌ Primero debes modificar píxeles")
             return False
 
-        # Crear copia de la imagen modificada
-        self.saturated_image = self.modified_image.copy()
-
-        # Saturar los píxeles modificados
-        for x, y, _ in self.modified_pixels:
-            # Hacer el píxel completamente rojo para que sea visible
-            self.saturated_image[y, x] = [255, 0, 0]  # Rojo intenso
+        # La imagen saturada (píxeles modificados en rojo) se deriva al pedirla
+        self.saturated_image = None
 
         print(f"🔴 {len(self.modified_pixels)} píxeles saturados en rojo")
         return True
 
+    def _comparison_caption(self):
+        """Texto bajo las comparaciones con el área (o las teselas) y la intensidad del último ataque"""
+        caption = f"{len(self.modified_pixels)} píxeles alterados"
+        if self.tiles is not None:
+            num_tiles, tile_size = self.tiles
+            caption = f"Teselas modificadas: {num_tiles} de {tile_size}x{tile_size} píxeles | {caption}"
+        elif self.area_coords is not None:
+            start_x, start_y, end_x, end_y = self.area_coords
+            caption = f"Área modificada: {end_x - start_x}x{end_y - start_y} píxeles | {caption}"
+        if self.intensity_range is not None:
+            caption += f" | Intensidad: {self.intensity_range[0]}-{self.intensity_range[1]}"
+        return caption
+
     def create_subplot_comparison(self):
         """Crea subplot con las 3 imágenes para comparación"""
         if any(img is None for img in [self.original_image, self.modified_image, self.saturated_image]):
@@ -157,8 +468,7 @@ class PixelModifier:
                     fontsize=16, fontweight='bold', y=0.98)
 
         # Información adicional
-        info_text = f"Área modificada: 50x50 píxeles | {len(self.modified_pixels)} píxeles alterados | Intensidad: 0-10%"
-        fig.text(0.5, 0.02, info_text, ha='center', fontsize=12, style='italic')
+        fig.text(0.5, 0.02, self._comparison_caption(), ha='center', fontsize=12, style='italic')
 
         # Ajustar layout
         plt.tight_layout()
@@ -174,71 +484,307 @@ class PixelModifier:
 
         return True
 
+    def create_fast_comparison(self, output_filename='pixel_attack_comparison.png', magnify=True):
+        """
+        Crea la comparación de las 3 imágenes sin matplotlib (NumPy + PIL).
+        Los paneles son copias exactas de las imágenes; con magnify se añade debajo
+        el área modificada ampliada. output_filename puede ser una ruta, un archivo
+        abierto o None para solo devolver la imagen PIL.
+        """
+        if any(img is None for img in [self.original_image, self.modified_image, self.saturated_image]):
+            print("❌ Faltan imágenes para crear la comparación")
+            return None
+
+        comparison = render_comparison(
+            [self.original_image, self.modified_image, self.saturated_image],
+            caption=self._comparison_caption(),
+            zoom_area=self.area_coords if magnify else None,
+            output=output_filename,
+        )
+        if isinstance(output_filename, str):
+            print(f"💾 Comparación guardada como: {output_filename}")
+        return comparison
+
     def analyze_changes(self):
-        """Analiza los cambios realizados"""
-        if not self.modified_pixels:
+        """Analiza los cambios realizados y retorna las métricas como dict"""
+        if len(self.modified_pixels) == 0:
             print("❌ No hay píxeles modificados para analizar")
-            return
+            return None
+
+        metrics = compute_metrics(self.original_image, diff=self.diff, modified_pixels=self.modified_pixels)
 
         print("\n" + "="*60)
         print("📊 ANÁLISIS DE MODIFICACIONES")
         print("="*60)
 
         # Estadísticas de intensidad
-        intensities = [abs(change) for _, _, change in self.modified_pixels]
-        avg_intensity = np.mean(intensities)
-        max_intensity = max(intensities)
-        min_intensity = min(intensities)
-
-        print(f"🔢 Píxeles modificados: {len(self.modified_pixels)}")
-        print(f"📈 Intensidad promedio: {avg_intensity:.2f}")
-        print(f"📊 Intensidad máxima: {max_intensity}")
-        print(f"📉 Intensidad mínima: {min_intensity}")
+        print(f"🔢 Píxeles modificados: {metrics['drawn_pixels']}")
+        print(f"📈 Intensidad promedio: {metrics['mean_intensity']:.2f}")
+        print(f"📊 Intensidad máxima: {metrics['max_intensity']}")
+        print(f"📉 Intensidad mínima: {metrics['min_intensity']}")
 
         # Distribución de cambios
-        positive_changes = sum(1 for _, _, change in self.modified_pixels if change > 0)
-        negative_changes = len(self.modified_pixels) - positive_changes
+        print(f"⬆️ Aumentos de intensidad: {metrics['positive_changes']}")
+        print(f"⬇️ Reducciones de intensidad: {metrics['negative_changes']}")
 
-        print(f"⬆️ Aumentos de intensidad: {positive_changes}")
-        print(f"⬇️ Reducciones de intensidad: {negative_changes}")
+        # Magnitud de la perturbación
+        print(f"🎯 L0: {metrics['l0_pixels']} píxeles / {metrics['l0_values']} valores")
+        print(f"📐 L2: {metrics['l2']:.2f} | L∞: {metrics['linf']}")
+        psnr = '∞' if metrics['psnr'] is None else f"{metrics['psnr']:.2f}"
+        print(f"🔍 PSNR: {psnr} dB | SSIM: {metrics['ssim']:.6f}")
+        print(f"🔁 Píxeles sorteados más de una vez: {metrics['collisions']}")
 
         print("="*60)
+        return metrics
 
-    def run_complete_process(self):
-        """Ejecuta el proceso completo"""
+    def _stage(self, name, **args):
+        """Etapa medida por el perfilador, o un bloque sin medir si no hay perfilador"""
+        return maybe_stage(self.profiler, name, **args)
+
+    def run_complete_process(self, roi_strategy='center', renderer='matplotlib'):
+        """Ejecuta el proceso completo (renderer='fast' compone la comparación sin matplotlib)"""
         print("🚀 INICIANDO MODIFICACIÓN DE PÍXELES")
         print("="*50)
 
         # 1. Cargar imagen
-        if not self.load_image():
-            return False
+        with self._stage('load'):
+            if not self.load_image():
+                return False
 
-        # 2. Seleccionar área central
-        area_coords = self.select_center_area(50)
+        # 2. Seleccionar área (central o la más saliente)
+        with self._stage('select_area', strategy=roi_strategy):
+            area_coords = self.select_area(50, roi_strategy)
         if area_coords is None:
             return False
 
         # 3. Modificar píxeles aleatoriamente
-        if not self.modify_pixels_randomly(area_coords, modification_percentage=30, intensity_range=(0, 10)):
-            return False
+        with self._stage('modify'):
+            if not self.modify_pixels_randomly(area_coords, modification_percentage=30, intensity_range=(0, 10)):
+                return False
 
         # 4. Crear versión saturada
-        if not self.create_saturated_version():
-            return False
+        with self._stage('saturate'):
+            if not self.create_saturated_version():
+                return False
 
         # 5. Analizar cambios
-        self.analyze_changes()
+        with self._stage('analyze'):
+            self.analyze_changes()
 
         # 6. Crear subplot de comparación
-        if not self.create_subplot_comparison():
-            return False
+        with self._stage('plot', renderer=renderer):
+            if renderer == 'fast':
+                if self.create_fast_comparison() is None:
+                    return False
+            elif not self.create_subplot_comparison():
+                return False
 
         print("\n🎉 ¡Proceso completado exitosamente!")
         return True
 
-def main():
+def _process_image_job(job):
+    """
+    Procesa una imagen en modo lote (se ejecuta en un proceso trabajador).
+    Un fallo se retorna como {'input', 'error'} para que el resto del lote siga.
+    """
+    try:
+        return _run_image_job(job)
+    except Exception as e:
+        return {'input': job['input'], 'error': f"{type(e).__name__}: {e}"}
+
+def _run_image_job(job):
+    """Carga, modifica, guarda y mide una imagen del lote"""
+    start = time.perf_counter()
+    profiler = None
+    if job['trace']:
+        profiler = StageProfiler(trace_memory=job['trace_memory'], metadata={'image': job['input']})
+    modifier = PixelModifier(job['input'], seed=np.random.SeedSequence([job['seed'], job['index']]),
+                             profiler=profiler)
+
+    output_path = job['output']
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    try:
+        # La salida de consola por imagen se descarta; el proceso principal informa del total.
+        # Solo se decodifica la región de interés y el parche se inserta en la salida
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Las estrategias por saliencia necesitan la imagen completa
+            with modifier._stage('load'):
+                if not modifier.load_image(lazy=job['roi'] == 'center'):
+                    return {'input': job['input'], 'error': 'No se pudo cargar la imagen'}
+            with modifier._stage('select_area', strategy=job['roi']):
+                area_coords = modifier.select_area(job['area_size'], job['roi'])
+            with modifier._stage('modify'):
+                modifier.modify_pixels_randomly(area_coords, job['percentage'], job['intensity_range'])
+            with modifier._stage('save'):
+                modifier.save_modified_image(output_path)
+            if job['comparison']:
+                with modifier._stage('plot', renderer='fast'):
+                    modifier.create_fast_comparison(os.path.splitext(output_path)[0] + '_comparison.png')
+
+        base_path = os.path.splitext(output_path)[0]
+        if job['save_diff']:
+            with modifier._stage('save_diff'):
+                modifier.full_image_diff().save(base_path + '.npz')
+
+        # En modo región MSE, PSNR y SSIM se refieren a la región cargada
+        with modifier._stage('analyze'):
+            metrics = compute_metrics(modifier.original_image, diff=modifier.diff,
+                                      modified_pixels=modifier.modified_pixels)
+        metrics['scope'] = 'region' if modifier.region is not None else 'image'
+        stats = {
+            'input': job['input'],
+            'output': output_path,
+            'shape': list(modifier.image_shape),
+            'area': list(area_coords),
+            'modified_pixels': int(len(modifier.modified_pixels)),
+            'changed_values': int(len(modifier.diff)),
+            'mean_intensity': metrics.get('mean_intensity', 0.0),
+            'max_intensity': metrics.get('max_intensity', 0),
+            'metrics': metrics,
+            'input_bytes': os.path.getsize(job['input']),
+            'seconds': time.perf_counter() - start,
+        }
+        if job['save_stats']:
+            with open(base_path + '.json', 'w', encoding='utf-8') as f:
+                json.dump(stats, f, indent=2, allow_nan=False)
+    finally:
+        if profiler is not None:
+            profiler.close()
+
+    # Los registros de etapas viajan al proceso principal, que escribe una única traza
+    if profiler is not None:
+        stats['trace'] = profiler.records
+    return stats
+
+def _output_path(pattern, input_path):
+    """Ruta de salida a partir del patrón con {stem}, {name}, {ext} y {dir}"""
+    name = os.path.basename(input_path)
+    stem, ext = os.path.splitext(name)
+    return pattern.format(stem=stem, name=name, ext=ext, dir=os.path.dirname(input_path))
+
+def run_batch(input_patterns, output_pattern, area_size=50, percentage=30, intensity_range=(0, 10),
+              workers=None, max_in_flight=None, seed=0, save_diff=True, save_stats=True, roi='center',
+              comparison=False, trace_path=None, trace_memory=False):
+    """
+    Procesa todas las imágenes que casan con los patrones sin interacción ni GUI.
+    Usa un pool de procesos con como mucho max_in_flight imágenes en curso.
+    - trace_path: escribe la traza por etapas de todas las imágenes (.json para
+      Chrome trace-event, otra extensión para líneas JSON) y resume p50/p95
+    - trace_memory: mide también el pico de memoria de cada etapa con tracemalloc
+    Retorna el resumen con imágenes/s y MB/s.
+    """
+    input_paths = sorted({path for pattern in input_patterns for path in glob.glob(pattern, recursive=True)})
+    if not input_paths:
+        print("❌ No se encontraron imágenes para los patrones indicados")
+        return None
+
+    # Dos entradas con la misma ruta de salida se pisarían la imagen y las estadísticas
+    sources = {}
+    for path in input_paths:
+        sources.setdefault(os.path.normpath(_output_path(output_pattern, path)), []).append(path)
+    collisions = {output: paths for output, paths in sources.items() if len(paths) > 1}
+    if collisions:
+        for output, paths in collisions.items():
+            print(f"❌ {', '.join(paths)} -> {output}")
+        print("❌ Varias imágenes tienen la misma salida; añade {ext} o {dir} al patrón de --output")
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    print(f"🚀 Procesando {len(input_paths)} imágenes con {workers} procesos")
+
+    jobs = ({
+        'index': index,
+        'input': path,
+        'output': _output_path(output_pattern, path),
+        'seed': seed,
+        'area_size': area_size,
+        'roi': roi,
+        'comparison': comparison,
+        'percentage': percentage,
+        'intensity_range': tuple(intensity_range),
+        'save_diff': save_diff,
+        'save_stats': save_stats,
+        'trace': trace_path is not None,
+        'trace_memory': trace_memory,
+    } for index, path in enumerate(input_paths))
+
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for job in jobs:
+            # Cola acotada: no se envía una imagen nueva hasta que haya hueco
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results.extend(future.result() for future in done)
+            pending.add(executor.submit(_process_image_job, job))
+        results.extend(future.result() for future in wait(pending).done)
+    seconds = time.perf_counter() - start
+
+    processed = [r for r in results if 'error' not in r]
+    for failed in (r for r in results if 'error' in r):
+        print(f"❌ {failed['input']}: {failed['error']}")
+
+    megabytes = sum(r['input_bytes'] for r in processed) / 1e6
+    summary = {
+        'images': len(processed),
+        'failed': len(results) - len(processed),
+        'seconds': seconds,
+        'images_per_second': len(processed) / seconds if seconds > 0 else 0.0,
+        'mb_per_second': megabytes / seconds if seconds > 0 else 0.0,
+    }
+    print(f"✅ {summary['images']} imágenes en {seconds:.2f}s | "
+          f"{summary['images_per_second']:.1f} imágenes/s | {summary['mb_per_second']:.2f} MB/s")
+
+    if trace_path is not None:
+        records = [record for r in processed for record in r.pop('trace', [])]
+        write_trace(trace_path, records)
+        summary['stages'] = summarize(records)
+        print_summary(summary['stages'])
+        print(f"💾 Traza guardada en: {trace_path}")
+    return summary
+
+def parse_args(argv=None):
+    """Argumentos del modo lote"""
+    parser = argparse.ArgumentParser(description="Ataque adversarial de píxeles sobre lotes de imágenes")
+    parser.add_argument('--input', action='append', required=True,
+                        help="Patrón glob de imágenes de entrada (se puede repetir)")
+    parser.add_argument('--output', default='salida/{stem}_adversarial.png',
+                        help="Patrón de salida con {stem}, {name}, {ext} o {dir}")
+    parser.add_argument('--area-size', type=int, default=50)
+    parser.add_argument('--roi', choices=('center', 'gradient', 'variance'), default='center',
+                        help="Estrategia de selección del área")
+    parser.add_argument('--percentage', type=float, default=30)
+    parser.add_argument('--intensity', type=int, nargs=2, default=(0, 10), metavar=('MIN', 'MAX'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-diff', action='store_true', help="No guardar la diferencia .npz")
+    parser.add_argument('--no-stats', action='store_true', help="No guardar las estadísticas .json")
+    parser.add_argument('--comparison', action='store_true',
+                        help="Guardar también la comparación de la región (sin matplotlib)")
+    parser.add_argument('--trace', default=None, metavar='PATH',
+                        help="Traza por etapas: .json (Chrome trace-event) o .jsonl (líneas JSON)")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Medir el pico de memoria de cada etapa con tracemalloc")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Función principal"""
     try:
+        # Con argumentos se ejecuta el modo lote, sin menús ni ventanas
+        if argv or (argv is None and len(sys.argv) > 1):
+            args = parse_args(argv)
+            plt.switch_backend('Agg')
+            run_batch(args.input, args.output, area_size=args.area_size, percentage=args.percentage,
+                      intensity_range=args.intensity, workers=args.workers,
+                      max_in_flight=args.max_in_flight, seed=args.seed,
+                      save_diff=not args.no_diff, save_stats=not args.no_stats, roi=args.roi,
+                      comparison=args.comparison, trace_path=args.trace, trace_memory=args.trace_memory)
+            return
+
         # Buscar imagen.png en la raíz
         image_path = "imagen.png"
 
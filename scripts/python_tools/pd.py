@@ -1,5 +1,231 @@
+import glob
+import os
+import time
+
 import numpy as np
 
+TAM_BLOQUE_POR_DEFECTO = 4096
+
+
+def _preparar_entradas(perturbaciones, direcciones, distancias, dtype):
+    """Convierte las entradas a arrays 2D/1D del tipo pedido y valida formas"""
+    deltas = np.atleast_2d(np.asarray(perturbaciones, dtype=dtype))
+    U = np.asarray(direcciones)
+    g = np.asarray(distancias, dtype=dtype).ravel()
+
+    if U.ndim != 2:
+        raise ValueError(f"direcciones debe ser una matriz (N, D), recibido {U.shape}")
+    if U.shape[0] != g.shape[0]:
+        raise ValueError(f"{U.shape[0]} direcciones pero {g.shape[0]} distancias")
+    if deltas.shape[1] != U.shape[1]:
+        raise ValueError(f"dimensión de perturbación {deltas.shape[1]} != dimensión de direcciones {U.shape[1]}")
+
+    return deltas, U, g
+
+
+def _actualizar_maximo(mejor_valor, mejor_indice, amenazas, desplazamiento):
+    """Fusiona el máximo de un bloque (B, n) con el máximo acumulado por muestra"""
+    indice_bloque = np.argmax(amenazas, axis=1)
+    valor_bloque = amenazas[np.arange(amenazas.shape[0]), indice_bloque]
+    # Estrictamente mayor: ante empates se conserva la primera dirección, como max()
+    mejora = valor_bloque > mejor_valor
+    mejor_valor[mejora] = valor_bloque[mejora]
+    mejor_indice[mejora] = indice_bloque[mejora] + desplazamiento
+
+
+def _actualizar_top_k(top_valores, top_indices, amenazas, desplazamiento, k):
+    """Fusiona las k mayores amenazas de un bloque con el top-k acumulado"""
+    n = amenazas.shape[1]
+    indices = np.broadcast_to(np.arange(desplazamiento, desplazamiento + n), amenazas.shape)
+    valores = np.concatenate([top_valores, amenazas], axis=1)
+    indices = np.concatenate([top_indices, indices], axis=1)
+
+    if valores.shape[1] > k:
+        parte = np.argpartition(-valores, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(valores, parte, axis=1)
+        indices = np.take_along_axis(indices, parte, axis=1)
+
+    return valores, indices
+
+
+def _ordenar_top_k(top_valores, top_indices):
+    """Ordena el top-k de mayor a menor amenaza"""
+    orden = np.argsort(-top_valores, axis=1, kind='stable')
+    return np.take_along_axis(top_valores, orden, axis=1), np.take_along_axis(top_indices, orden, axis=1)
+
+
+def calcular_amenaza_pd_lote(perturbaciones, direcciones, distancias, top_k=None,
+                             tam_bloque=TAM_BLOQUE_POR_DEFECTO, dtype=np.float32):
+    """
+    Calcula la amenaza PD de un lote de perturbaciones en forma matricial.
+    - perturbaciones: array (B, D) (o (D,)) con las perturbaciones delta
+    - direcciones: matriz (N, D) con las direcciones inseguras normalizadas u_i
+    - distancias: vector (N,) con las distancias g(x, u_i)
+    - top_k: si se indica, devuelve también las k mayores amenazas por muestra
+    - tam_bloque: filas de U multiplicadas a la vez; la memoria pico es B x tam_bloque
+    - dtype: tipo de cálculo (float32 por defecto)
+
+    Retorna (amenaza_max, indice_max), ambos de forma (B,). Con top_k añade
+    (valores_top, indices_top) de forma (B, k), ordenados de mayor a menor.
+    """
+    deltas, U, g = _preparar_entradas(perturbaciones, direcciones, distancias, dtype)
+    B, N = deltas.shape[0], U.shape[0]
+    if N == 0:
+        raise ValueError("Se necesita al menos una dirección insegura")
+    if tam_bloque < 1:
+        raise ValueError("tam_bloque debe ser positivo")
+
+    mejor_valor = np.full(B, -np.inf, dtype=dtype)
+    mejor_indice = np.zeros(B, dtype=np.int64)
+    if top_k is not None:
+        k = min(int(top_k), N)
+        top_valores = np.empty((B, 0), dtype=dtype)
+        top_indices = np.empty((B, 0), dtype=np.int64)
+
+    for inicio in range(0, N, tam_bloque):
+        fin = min(inicio + tam_bloque, N)
+        # Proyección escalar de cada δ sobre cada u del bloque, dividida por g
+        amenazas = deltas @ U[inicio:fin].astype(dtype, copy=False).T
+        amenazas /= g[inicio:fin]
+
+        _actualizar_maximo(mejor_valor, mejor_indice, amenazas, inicio)
+        if top_k is not None:
+            top_valores, top_indices = _actualizar_top_k(top_valores, top_indices, amenazas, inicio, k)
+
+    if top_k is None:
+        return mejor_valor, mejor_indice
+
+    top_valores, top_indices = _ordenar_top_k(top_valores, top_indices)
+    return mejor_valor, mejor_indice, top_valores, top_indices
+
+
+def guardar_banco_direcciones(directorio, direcciones, distancias, filas_por_fragmento=None):
+    """
+    Guarda un banco de direcciones como fragmentos .npy en un directorio.
+    Cada fragmento i son dos archivos: direcciones_{i:05d}.npy (n, D) y
+    distancias_{i:05d}.npy (n,). Retorna la lista de fragmentos escritos.
+    """
+    U = np.asarray(direcciones)
+    g = np.asarray(distancias).ravel()
+    if U.shape[0] != g.shape[0]:
+        raise ValueError(f"{U.shape[0]} direcciones pero {g.shape[0]} distancias")
+
+    os.makedirs(directorio, exist_ok=True)
+    filas = filas_por_fragmento or max(U.shape[0], 1)
+    fragmentos = []
+    for i, inicio in enumerate(range(0, U.shape[0], filas)):
+        ruta_u = os.path.join(directorio, f'direcciones_{i:05d}.npy')
+        ruta_g = os.path.join(directorio, f'distancias_{i:05d}.npy')
+        np.save(ruta_u, np.ascontiguousarray(U[inicio:inicio + filas]))
+        np.save(ruta_g, np.ascontiguousarray(g[inicio:inicio + filas]))
+        fragmentos.append((ruta_u, ruta_g))
+    return fragmentos
+
+
+def listar_fragmentos_banco(ruta_direcciones, ruta_distancias=None):
+    """
+    Retorna la lista ordenada de pares (ruta_U, ruta_g) de un banco.
+    - ruta_direcciones: directorio de fragmentos o archivo .npy (N, D)
+    - ruta_distancias: archivo .npy (N,) cuando ruta_direcciones es un archivo
+    """
+    if os.path.isdir(ruta_direcciones):
+        rutas_u = sorted(glob.glob(os.path.join(ruta_direcciones, 'direcciones_*.npy')))
+        fragmentos = []
+        for ruta_u in rutas_u:
+            sufijo = os.path.basename(ruta_u)[len('direcciones_'):]
+            ruta_g = os.path.join(ruta_direcciones, 'distancias_' + sufijo)
+            if not os.path.exists(ruta_g):
+                raise FileNotFoundError(f"Falta el archivo de distancias: {ruta_g}")
+            fragmentos.append((ruta_u, ruta_g))
+        if not fragmentos:
+            raise FileNotFoundError(f"No hay fragmentos direcciones_*.npy en {ruta_direcciones}")
+        return fragmentos
+
+    if ruta_distancias is None:
+        raise ValueError("ruta_distancias es obligatoria cuando las direcciones son un único archivo")
+    return [(ruta_direcciones, ruta_distancias)]
+
+
+def _leer_cabecera_npy(ruta):
+    """Lee forma, dtype y desplazamiento de datos de un archivo .npy sin cargarlo"""
+    with open(ruta, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            forma, orden_fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            forma, orden_fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        desplazamiento = f.tell()
+
+    if orden_fortran and len(forma) > 1:
+        raise ValueError(f"{ruta}: se requiere orden C para leer por filas")
+    return forma, dtype, desplazamiento
+
+
+def _bloques_memmap(ruta, tam_bloque):
+    """
+    Recorre un .npy por bloques de filas con un np.memmap nuevo por bloque.
+    Al liberar cada mapeo las páginas dejan de contar en la memoria residente.
+    """
+    forma, dtype, desplazamiento = _leer_cabecera_npy(ruta)
+    filas = forma[0]
+    bytes_por_fila = dtype.itemsize * int(np.prod(forma[1:], dtype=np.int64))
+
+    for inicio in range(0, filas, tam_bloque):
+        n = min(tam_bloque, filas - inicio)
+        bloque = np.memmap(ruta, dtype=dtype, mode='r', shape=(n,) + tuple(forma[1:]),
+                           offset=desplazamiento + inicio * bytes_por_fila)
+        yield inicio, bloque
+        del bloque
+
+
+def calcular_amenaza_pd_streaming(perturbaciones, ruta_direcciones, ruta_distancias=None,
+                                  tam_bloque=TAM_BLOQUE_POR_DEFECTO, dtype=np.float32):
+    """
+    Calcula la amenaza PD leyendo el banco de direcciones desde disco.
+    - perturbaciones: array (B, D) (o (D,)) con las perturbaciones delta
+    - ruta_direcciones: directorio de fragmentos o archivo .npy (N, D)
+    - ruta_distancias: archivo .npy (N,) si ruta_direcciones es un archivo
+    - tam_bloque: filas leídas por bloque; fija la memoria pico sea cual sea N
+
+    Retorna (amenaza_max, indice_max, estadisticas), donde estadisticas incluye
+    el número de direcciones recorridas, los segundos y direcciones por segundo.
+    """
+    if tam_bloque < 1:
+        raise ValueError("tam_bloque debe ser positivo")
+
+    deltas = np.atleast_2d(np.asarray(perturbaciones, dtype=dtype))
+    B = deltas.shape[0]
+    mejor_valor = np.full(B, -np.inf, dtype=dtype)
+    mejor_indice = np.zeros(B, dtype=np.int64)
+
+    desplazamiento = 0
+    inicio_tiempo = time.perf_counter()
+    for ruta_u, ruta_g in listar_fragmentos_banco(ruta_direcciones, ruta_distancias):
+        forma_u, _, _ = _leer_cabecera_npy(ruta_u)
+        forma_g, _, _ = _leer_cabecera_npy(ruta_g)
+        if len(forma_u) != 2 or forma_u[1] != deltas.shape[1] or forma_g != (forma_u[0],):
+            raise ValueError(f"{ruta_u}: forma {forma_u} incompatible con la perturbación o con {forma_g}")
+
+        bloques = zip(_bloques_memmap(ruta_u, tam_bloque), _bloques_memmap(ruta_g, tam_bloque))
+        for (inicio, U), (_, g) in bloques:
+            amenazas = deltas @ U.astype(dtype, copy=False).T
+            amenazas /= g.astype(dtype, copy=False)
+            _actualizar_maximo(mejor_valor, mejor_indice, amenazas, desplazamiento + inicio)
+        desplazamiento += forma_u[0]
+
+    if desplazamiento == 0:
+        raise ValueError("El banco de direcciones está vacío")
+
+    segundos = time.perf_counter() - inicio_tiempo
+    estadisticas = {
+        'direcciones': desplazamiento,
+        'perturbaciones': B,
+        'segundos': segundos,
+        'direcciones_por_segundo': desplazamiento / segundos if segundos > 0 else float('inf'),
+    }
+    return mejor_valor, mejor_indice, estadisticas
+
+
 def calcular_amenaza_pd(perturbacion, direcciones_inseguras, distancias):
     """
     Calcula la amenaza PD de una perturbación dada.
@@ -9,32 +235,34 @@ def calcular_amenaza_pd(perturbacion, direcciones_inseguras, distancias):
 
     Retorna el valor de amenaza d_PD.
     """
-    amenazas = []
-    for u, g in zip(direcciones_inseguras, distancias):
-        proyeccion = np.dot(perturbacion, u)  # Proyección escalar de δ sobre u
-        amenaza = proyeccion / g
-        amenazas.append(amenaza)
-    return max(amenazas)
-
-# Simulemos datos
-np.random.seed(42)  # Para reproducibilidad
-imagen = np.random.rand(5)  # "Imagen" en 5D
-perturbacion = np.array([0.1, -0.05, 0.0, 0.02, 0.03])  # Perturbación pequeña
-
-# Direcciones inseguras simuladas (normalizadas, como en el paper)
-direcciones_inseguras = [
-    np.array([1, 0, 0, 0, 0]),
-    np.array([0, 1, 0, 0, 0]),
-    np.array([0, 0, 1, 0, 0]),
-    np.array([0, 0, 0, 1, 0]),
-    np.array([0, 0, 0, 0, 1])
-]
-
-# Distancias g(x,u) simuladas (cuán lejos está el cambio de clase)
-distancias = [0.2, 0.1, 0.3, 0.15, 0.25]
-
-# Calculamos la amenaza PD
-amenaza = calcular_amenaza_pd(perturbacion, direcciones_inseguras, distancias)
-
-print("Amenaza PD:", amenaza)
-print("Interpretación: Si >1, puede cambiar la clase; si <1, es segura en este modelo.")
+    amenaza, _ = calcular_amenaza_pd_lote(perturbacion, direcciones_inseguras, distancias, dtype=np.float64)
+    return amenaza[0]
+
+
+def main():
+    """Ejemplo con datos simulados"""
+    np.random.seed(42)  # Para reproducibilidad
+    imagen = np.random.rand(5)  # "Imagen" en 5D
+    perturbacion = np.array([0.1, -0.05, 0.0, 0.02, 0.03])  # Perturbación pequeña
+
+    # Direcciones inseguras simuladas (normalizadas, como en el paper)
+    direcciones_inseguras = [
+        np.array([1, 0, 0, 0, 0]),
+        np.array([0, 1, 0, 0, 0]),
+        np.array([0, 0, 1, 0, 0]),
+        np.array([0, 0, 0, 1, 0]),
+        np.array([0, 0, 0, 0, 1])
+    ]
+
+    # Distancias g(x,u) simuladas (cuán lejos está el cambio de clase)
+    distancias = [0.2, 0.1, 0.3, 0.15, 0.25]
+
+    # Calculamos la amenaza PD
+    amenaza = calcular_amenaza_pd(perturbacion, direcciones_inseguras, distancias)
+
+    print("Amenaza PD:", amenaza)
+    print("Interpretación: Si >1, puede cambiar la clase; si <1, es segura en este modelo.")
+
+
+if __name__ == "__main__":
+    main()
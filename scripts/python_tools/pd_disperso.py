@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Amenaza PD para perturbaciones dispersas (pocos píxeles modificados)
+Calcula las proyecciones solo sobre las coordenadas tocadas y permite
+actualizarlas de forma incremental entre iteraciones de un ataque
+"""
+
+import numpy as np
+
+
+def perturbacion_desde_imagenes(original, modificada, coordenadas=None, escala=1.0):
+    """
+    Construye una perturbación dispersa (indices, valores) a partir de dos imágenes.
+    - original, modificada: arrays (H, W, C) con la misma forma
+    - coordenadas: pares (x, y) a revisar, p. ej. PixelModifier.modified_pixels;
+      si es None se compara la imagen completa
+    - escala: factor aplicado a las diferencias (p. ej. 1/255)
+
+    Los índices son planos sobre la imagen aplanada en orden C: (y*W + x)*C + canal.
+    """
+    if original.shape != modificada.shape:
+        raise ValueError(f"Formas distintas: {original.shape} vs {modificada.shape}")
+    h, w = original.shape[:2]
+    canales = original.shape[2] if original.ndim == 3 else 1
+
+    if coordenadas is None:
+        diferencia = modificada.astype(np.int32).ravel() - original.astype(np.int32).ravel()
+        indices = np.flatnonzero(diferencia)
+        return indices, diferencia[indices] * escala
+
+    if getattr(coordenadas, 'dtype', None) is not None and coordenadas.dtype.names:
+        xs, ys = coordenadas['x'].astype(np.int64), coordenadas['y'].astype(np.int64)
+    else:
+        xy = np.array([(c[0], c[1]) for c in coordenadas], dtype=np.int64).reshape(-1, 2)
+        xs, ys = xy[:, 0], xy[:, 1]
+    pixeles = np.unique(ys * w + xs)
+    indices = (pixeles[:, None] * canales + np.arange(canales)).ravel()
+    diferencia = modificada.reshape(-1)[indices].astype(np.int32) - original.reshape(-1)[indices].astype(np.int32)
+    tocados = diferencia != 0
+    return indices[tocados], diferencia[tocados] * escala
+
+
+def _agrupar(indices, valores):
+    """Suma valores con índices repetidos y devuelve índices únicos ordenados"""
+    indices = np.asarray(indices, dtype=np.int64).ravel()
+    valores = np.asarray(valores, dtype=np.float64).ravel()
+    if indices.shape != valores.shape:
+        raise ValueError(f"{indices.shape[0]} índices pero {valores.shape[0]} valores")
+    unicos, inverso = np.unique(indices, return_inverse=True)
+    return unicos, np.bincount(inverso, weights=valores, minlength=unicos.shape[0])
+
+
+def calcular_amenaza_pd_dispersa(indices, valores, direcciones, distancias):
+    """
+    Calcula la amenaza PD de una perturbación dispersa.
+    - indices: coordenadas planas tocadas por la perturbación
+    - valores: valor de δ en esas coordenadas (los repetidos se suman)
+    - direcciones: matriz (N, D) de direcciones inseguras u_i
+    - distancias: vector (N,) de g(x, u_i)
+
+    Coste O(k·N) para k coordenadas en lugar de O(D·N). Retorna (amenaza_max, indice_max).
+    """
+    indices, valores = _agrupar(indices, valores)
+    g = np.asarray(distancias, dtype=np.float64).ravel()
+    proyecciones = np.asarray(direcciones[:, indices], dtype=np.float64) @ valores
+    amenazas = proyecciones / g
+    indice = int(np.argmax(amenazas))
+    return amenazas[indice], indice
+
+
+class AmenazaPDIncremental:
+    def __init__(self, direcciones, distancias, transponer=True):
+        """
+        Mantiene en caché las proyecciones <δ, u_i> de la perturbación actual.
+        - direcciones: matriz (N, D) de direcciones inseguras u_i
+        - distancias: vector (N,) de g(x, u_i)
+        - transponer: guarda U^T contiguo (D, N) para que leer k coordenadas
+          sean k filas consecutivas en memoria (duplica la memoria del banco)
+        """
+        self.distancias = np.asarray(distancias, dtype=np.float64).ravel()
+        if direcciones.shape[0] != self.distancias.shape[0]:
+            raise ValueError(f"{direcciones.shape[0]} direcciones pero {self.distancias.shape[0]} distancias")
+
+        self.direcciones = direcciones
+        self.columnas = np.ascontiguousarray(direcciones.T) if transponer else None
+        self.perturbacion = np.zeros(direcciones.shape[1])
+        self.proyecciones = np.zeros(direcciones.shape[0])
+
+    def _columnas(self, indices):
+        """Submatriz (k, N) con las coordenadas pedidas de todas las direcciones"""
+        if self.columnas is not None:
+            return np.asarray(self.columnas[indices], dtype=np.float64)
+        return np.asarray(self.direcciones[:, indices], dtype=np.float64).T
+
+    def reiniciar(self, indices=None, valores=None):
+        """Fija la perturbación actual (vacía por defecto) y recalcula las proyecciones"""
+        self.perturbacion[:] = 0
+        self.proyecciones[:] = 0
+        if indices is not None:
+            self.aplicar_incrementos(indices, valores)
+
+    def aplicar_incrementos(self, indices, incrementos):
+        """Suma incrementos a δ en k coordenadas y actualiza las proyecciones en O(k·N)"""
+        indices, incrementos = _agrupar(indices, incrementos)
+        self.proyecciones += incrementos @ self._columnas(indices)
+        self.perturbacion[indices] += incrementos
+
+    def fijar_valores(self, indices, valores):
+        """Asigna nuevos valores de δ en k coordenadas (índices únicos)"""
+        indices = np.asarray(indices, dtype=np.int64).ravel()
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        if np.unique(indices).shape[0] != indices.shape[0]:
+            raise ValueError("fijar_valores requiere índices únicos")
+        self.aplicar_incrementos(indices, valores - self.perturbacion[indices])
+
+    def probar_incrementos(self, indices, incrementos):
+        """Amenaza (max, argmax) que resultaría de aplicar los incrementos, sin aplicarlos"""
+        indices, incrementos = _agrupar(indices, incrementos)
+        amenazas = (self.proyecciones + incrementos @ self._columnas(indices)) / self.distancias
+        indice = int(np.argmax(amenazas))
+        return amenazas[indice], indice
+
+    def amenaza(self):
+        """Retorna (amenaza_max, indice_max) de la perturbación actual"""
+        amenazas = self.proyecciones / self.distancias
+        indice = int(np.argmax(amenazas))
+        return amenazas[indice], indice
+
+    def recalcular(self):
+        """Recalcula las proyecciones desde cero para eliminar el error acumulado"""
+        indices = np.flatnonzero(self.perturbacion)
+        self.proyecciones = self.perturbacion[indices] @ self._columnas(indices)
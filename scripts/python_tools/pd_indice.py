@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de poda (branch-and-bound) para la amenaza PD
+Agrupa el banco de direcciones en clusters y usa cotas de Cauchy-Schwarz
+para descartar clusters enteros que no pueden contener el máximo
+"""
+
+import os
+
+import numpy as np
+
+from pd import TAM_BLOQUE_POR_DEFECTO, listar_fragmentos_banco
+
+NOMBRE_ARCHIVO_INDICE = 'indice_pd.npz'
+
+# Holgura relativa de las cotas para que el redondeo nunca pode el máximo real
+HOLGURA_RELATIVA = 1e-7
+
+
+class BancoFragmentado:
+    def __init__(self, fragmentos):
+        """
+        Vista de solo lectura de varios fragmentos (n_i, D) como una matriz (N, D)
+        sin copiarlos: cada acceso lee solo las filas pedidas de su fragmento.
+        - fragmentos: arrays (normalmente mapeados en memoria) con el mismo D
+        """
+        self.fragmentos = list(fragmentos)
+        if not self.fragmentos:
+            raise ValueError("Se necesita al menos un fragmento")
+        if len({fragmento.shape[1:] for fragmento in self.fragmentos}) != 1:
+            raise ValueError("Todos los fragmentos deben tener la misma dimensión")
+        # Fila global en la que empieza cada fragmento, más el total al final
+        self.desplazamientos = np.concatenate([[0], np.cumsum([f.shape[0] for f in self.fragmentos])])
+        self.shape = (int(self.desplazamientos[-1]),) + self.fragmentos[0].shape[1:]
+        self.dtype = self.fragmentos[0].dtype
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, indices):
+        """Filas de un slice o de un array de índices globales, en el orden pedido"""
+        if isinstance(indices, slice):
+            indices = np.arange(*indices.indices(self.shape[0]))
+        indices = np.asarray(indices, dtype=np.int64)
+        filas = np.empty((indices.shape[0],) + self.shape[1:], dtype=self.dtype)
+        fragmento = np.searchsorted(self.desplazamientos, indices, side='right') - 1
+        for f in np.unique(fragmento):
+            seleccion = fragmento == f
+            filas[seleccion] = self.fragmentos[f][indices[seleccion] - self.desplazamientos[f]]
+        return filas
+
+
+class IndiceAmenazaPD:
+    def __init__(self, direcciones, distancias, centroides, radios, g_min, g_max, orden, limites):
+        """Inicializa el índice a partir de sus arrays (usar construir o cargar)"""
+        self.direcciones = direcciones
+        self.distancias = np.asarray(distancias, dtype=np.float64).ravel()
+        self.centroides = centroides
+        self.radios = radios
+        self.g_min = g_min
+        self.g_max = g_max
+        self.orden = orden
+        self.limites = limites
+
+    @property
+    def num_clusters(self):
+        return self.centroides.shape[0]
+
+    @classmethod
+    def construir(cls, direcciones, distancias, num_clusters=256, iteraciones=10, semilla=0,
+                  tam_bloque=TAM_BLOQUE_POR_DEFECTO):
+        """
+        Construye el índice agrupando las direcciones con k-means.
+        - direcciones: matriz (N, D) de direcciones inseguras u_i
+        - distancias: vector (N,) de g(x, u_i), todas positivas
+        - num_clusters: número de clusters (se recorta a N)
+        """
+        U = direcciones
+        g = np.asarray(distancias, dtype=np.float64).ravel()
+        N = U.shape[0]
+        if N == 0:
+            raise ValueError("Se necesita al menos una dirección insegura")
+        if g.shape[0] != N:
+            raise ValueError(f"{N} direcciones pero {g.shape[0]} distancias")
+        if np.any(g <= 0):
+            raise ValueError("Las distancias g(x, u) deben ser positivas para acotar la amenaza")
+
+        k = min(num_clusters, N)
+        rng = np.random.default_rng(semilla)
+        centroides = np.asarray(U[np.sort(rng.choice(N, size=k, replace=False))], dtype=np.float64)
+
+        for _ in range(iteraciones):
+            etiquetas = _asignar_clusters(U, centroides, tam_bloque)
+            centroides = _recalcular_centroides(U, etiquetas, centroides, tam_bloque)
+        etiquetas = _asignar_clusters(U, centroides, tam_bloque)
+
+        # Miembros de cada cluster contiguos y en orden original dentro del cluster
+        orden = np.argsort(etiquetas, kind='stable')
+        limites = np.concatenate([[0], np.cumsum(np.bincount(etiquetas, minlength=k))])
+
+        radios = np.zeros(k)
+        g_min = np.full(k, np.inf)
+        g_max = np.full(k, np.inf)
+        for c in range(k):
+            miembros = orden[limites[c]:limites[c + 1]]
+            if miembros.size == 0:
+                continue
+            diferencia = np.asarray(U[miembros], dtype=np.float64) - centroides[c]
+            radios[c] = np.sqrt(np.max(np.einsum('ij,ij->i', diferencia, diferencia)))
+            g_min[c] = g[miembros].min()
+            g_max[c] = g[miembros].max()
+
+        return cls(U, g, centroides, radios, g_min, g_max, orden, limites)
+
+    def guardar(self, directorio):
+        """Guarda los arrays del índice junto al banco de direcciones"""
+        ruta = os.path.join(directorio, NOMBRE_ARCHIVO_INDICE)
+        np.savez(ruta, centroides=self.centroides, radios=self.radios, g_min=self.g_min,
+                 g_max=self.g_max, orden=self.orden, limites=self.limites)
+        return ruta
+
+    @classmethod
+    def cargar(cls, directorio, ruta_distancias=None):
+        """
+        Carga un índice guardado y su banco de direcciones.
+        - directorio: directorio del banco (fragmentos e indice_pd.npz), o archivo
+          .npy de direcciones con el índice guardado en su mismo directorio
+        Las direcciones quedan mapeadas en memoria (mmap); con varios fragmentos
+        se accede a ellas con un BancoFragmentado, sin juntarlas en RAM.
+        """
+        fragmentos = listar_fragmentos_banco(directorio, ruta_distancias)
+        if len(fragmentos) == 1:
+            U = np.load(fragmentos[0][0], mmap_mode='r')
+        else:
+            U = BancoFragmentado([np.load(ruta_u, mmap_mode='r') for ruta_u, _ in fragmentos])
+        g = np.concatenate([np.load(ruta_g) for _, ruta_g in fragmentos])
+
+        carpeta = directorio if os.path.isdir(directorio) else os.path.dirname(directorio)
+        with np.load(os.path.join(carpeta, NOMBRE_ARCHIVO_INDICE)) as datos:
+            if datos['orden'].shape[0] != U.shape[0]:
+                raise ValueError("El índice no corresponde al banco de direcciones")
+            return cls(U, g, datos['centroides'], datos['radios'], datos['g_min'],
+                       datos['g_max'], datos['orden'], datos['limites'])
+
+    def cotas_superiores(self, perturbacion):
+        """
+        Cota superior de la amenaza <δ, u>/g en cada cluster.
+        <δ, u> <= <δ, c> + ||δ||·r por Cauchy-Schwarz; el numerador se divide por
+        g_min si es positivo y por g_max si es negativo.
+        """
+        delta = np.asarray(perturbacion, dtype=np.float64)
+        proyeccion = self.centroides @ delta
+        numerador = proyeccion + np.linalg.norm(delta) * self.radios
+        numerador += HOLGURA_RELATIVA * (np.abs(proyeccion) + np.abs(numerador))
+        cotas = np.where(numerador >= 0, numerador / self.g_min, numerador / self.g_max)
+        # Clusters vacíos nunca se visitan
+        cotas[self.limites[1:] == self.limites[:-1]] = -np.inf
+        return cotas
+
+    def consultar(self, perturbaciones):
+        """
+        Calcula la amenaza PD máxima visitando solo los clusters necesarios.
+        - perturbaciones: array (B, D) (o (D,)) con las perturbaciones delta
+
+        Retorna (amenaza_max, indice_max, podadas): el mismo índice que la búsqueda
+        exhaustiva en float64 (el valor solo difiere por el orden de suma del
+        producto escalar) y el número de direcciones no evaluadas por perturbación.
+        """
+        deltas = np.atleast_2d(np.asarray(perturbaciones, dtype=np.float64))
+        B, N = deltas.shape[0], self.orden.shape[0]
+        mejor_valor = np.full(B, -np.inf)
+        mejor_indice = np.zeros(B, dtype=np.int64)
+        podadas = np.zeros(B, dtype=np.int64)
+
+        for b, delta in enumerate(deltas):
+            cotas = self.cotas_superiores(delta)
+            evaluadas = 0
+            for c in np.argsort(-cotas, kind='stable'):
+                # Cotas ordenadas: si esta no alcanza al mejor, ninguna de las siguientes
+                if cotas[c] < mejor_valor[b]:
+                    break
+                miembros = self.orden[self.limites[c]:self.limites[c + 1]]
+                amenazas = (np.asarray(self.direcciones[miembros], dtype=np.float64) @ delta) / self.distancias[miembros]
+                evaluadas += miembros.size
+
+                i = np.argmax(amenazas)
+                valor, indice = amenazas[i], miembros[i]
+                # Ante empates gana el índice menor, como en la búsqueda exhaustiva
+                if valor > mejor_valor[b] or (valor == mejor_valor[b] and indice < mejor_indice[b]):
+                    mejor_valor[b] = valor
+                    mejor_indice[b] = indice
+            podadas[b] = N - evaluadas
+
+        return mejor_valor, mejor_indice, podadas
+
+
+def _asignar_clusters(U, centroides, tam_bloque):
+    """Asigna cada dirección al centroide más cercano, por bloques de filas"""
+    etiquetas = np.empty(U.shape[0], dtype=np.int64)
+    norma_centroides = np.einsum('ij,ij->i', centroides, centroides)
+    for inicio in range(0, U.shape[0], tam_bloque):
+        bloque = np.asarray(U[inicio:inicio + tam_bloque], dtype=np.float64)
+        # ||u - c||² = ||u||² - 2<u, c> + ||c||²; ||u||² no cambia el argmin
+        etiquetas[inicio:inicio + bloque.shape[0]] = np.argmin(norma_centroides - 2 * bloque @ centroides.T, axis=1)
+    return etiquetas
+
+
+def _recalcular_centroides(U, etiquetas, centroides, tam_bloque):
+    """Media de cada cluster; los clusters vacíos conservan su centroide"""
+    sumas = np.zeros_like(centroides)
+    for inicio in range(0, U.shape[0], tam_bloque):
+        bloque = np.asarray(U[inicio:inicio + tam_bloque], dtype=np.float64)
+        # Filas ordenadas por cluster: una suma por tramo con reduceat (np.add.at es muy lento)
+        etiquetas_bloque = etiquetas[inicio:inicio + bloque.shape[0]]
+        orden = np.argsort(etiquetas_bloque, kind='stable')
+        ordenadas = etiquetas_bloque[orden]
+        inicios = np.flatnonzero(np.concatenate([[True], ordenadas[1:] != ordenadas[:-1]]))
+        sumas[ordenadas[inicios]] += np.add.reduceat(bloque[orden], inicios, axis=0)
+    conteos = np.bincount(etiquetas, minlength=centroides.shape[0])
+    llenos = conteos > 0
+    nuevos = centroides.copy()
+    nuevos[llenos] = sumas[llenos] / conteos[llenos, None]
+    return nuevos
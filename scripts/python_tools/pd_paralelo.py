@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cálculo de la amenaza PD en varios procesos
+El banco de direcciones vive una sola vez en memoria compartida y los
+procesos trabajadores se adjuntan a él en lugar de recibir copias
+"""
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pd import TAM_BLOQUE_POR_DEFECTO, calcular_amenaza_pd_lote
+
+# Perturbaciones por tarea. Es fijo (no depende del número de procesos) para que
+# todas las rutas hagan exactamente las mismas multiplicaciones: BLAS no da los
+# mismos float32 para sub-lotes de formas distintas (gemv frente a gemm)
+TAM_FRAGMENTO_POR_DEFECTO = 64
+
+# Estado de cada proceso trabajador: segmentos adjuntos y vistas sobre ellos
+_TRABAJADOR = {}
+
+
+def _inicializar_trabajador(especificaciones, tam_bloque):
+    """Adjunta U y g en el proceso trabajador (se ejecuta una vez por proceso)"""
+    _TRABAJADOR['segmentos'] = []
+    for clave, (nombre, forma, dtype) in especificaciones.items():
+        # Los trabajadores comparten el resource_tracker del proceso principal,
+        # que es quien libera el segmento en cerrar()
+        segmento = shared_memory.SharedMemory(name=nombre)
+        _TRABAJADOR['segmentos'].append(segmento)
+        _TRABAJADOR[clave] = np.ndarray(forma, dtype=dtype, buffer=segmento.buf)
+    _TRABAJADOR['tam_bloque'] = tam_bloque
+
+
+def _procesar_fragmento(argumentos):
+    """Calcula la amenaza de un fragmento de perturbaciones contra el banco compartido"""
+    deltas, top_k = argumentos
+    U = _TRABAJADOR['direcciones']
+    return calcular_amenaza_pd_lote(deltas, U, _TRABAJADOR['distancias'], top_k=top_k,
+                                    tam_bloque=_TRABAJADOR['tam_bloque'], dtype=U.dtype)
+
+
+class BancoDireccionesCompartido:
+    def __init__(self, direcciones, distancias, dtype=np.float32, tam_bloque=TAM_BLOQUE_POR_DEFECTO):
+        """
+        Copia U (N, D) y g (N,) una sola vez a memoria compartida.
+        Usar como context manager o llamar a cerrar() para liberar los segmentos.
+        """
+        self.dtype = np.dtype(dtype)
+        self.tam_bloque = tam_bloque
+        self.segmentos = {}
+        self.especificaciones = {}
+        self.pool = None
+        self.num_procesos = None
+
+        g = np.asarray(distancias).ravel()
+        if direcciones.shape[0] != g.shape[0]:
+            raise ValueError(f"{direcciones.shape[0]} direcciones pero {g.shape[0]} distancias")
+
+        for clave, array in (('direcciones', direcciones), ('distancias', g)):
+            segmento = shared_memory.SharedMemory(create=True, size=max(array.size * self.dtype.itemsize, 1))
+            vista = np.ndarray(array.shape, dtype=self.dtype, buffer=segmento.buf)
+            vista[...] = array
+            self.segmentos[clave] = segmento
+            self.especificaciones[clave] = (segmento.name, array.shape, self.dtype.str)
+
+        self.direcciones = np.ndarray(direcciones.shape, dtype=self.dtype, buffer=self.segmentos['direcciones'].buf)
+        self.distancias = np.ndarray(g.shape, dtype=self.dtype, buffer=self.segmentos['distancias'].buf)
+
+    def _obtener_pool(self, num_procesos):
+        """Crea (o reutiliza) el pool de trabajadores adjuntos al banco"""
+        if self.pool is not None and self.num_procesos == num_procesos:
+            return self.pool
+        self._cerrar_pool()
+        self.pool = mp.get_context().Pool(num_procesos, initializer=_inicializar_trabajador,
+                                          initargs=(self.especificaciones, self.tam_bloque))
+        self.num_procesos = num_procesos
+        return self.pool
+
+    def calcular(self, perturbaciones, num_procesos=None, tam_fragmento=TAM_FRAGMENTO_POR_DEFECTO, top_k=None):
+        """
+        Calcula la amenaza PD repartiendo las perturbaciones entre procesos.
+        - perturbaciones: array (B, D) (o (D,))
+        - num_procesos: trabajadores (por defecto os.cpu_count()); 1 = sin pool
+        - tam_fragmento: perturbaciones por tarea
+
+        Con el mismo tam_fragmento, el resultado es idéntico bit a bit con
+        cualquier número de procesos: con 1 proceso se recorren en el propio
+        proceso los mismos fragmentos que se reparten al pool.
+        """
+        deltas = np.atleast_2d(np.asarray(perturbaciones, dtype=self.dtype))
+        num_procesos = num_procesos or os.cpu_count() or 1
+        if tam_fragmento < 1:
+            raise ValueError("tam_fragmento debe ser positivo")
+
+        B = deltas.shape[0]
+        fragmentos = [deltas[inicio:inicio + tam_fragmento] for inicio in range(0, B, tam_fragmento)]
+        if num_procesos == 1:
+            resultados = [calcular_amenaza_pd_lote(fragmento, self.direcciones, self.distancias, top_k=top_k,
+                                                   tam_bloque=self.tam_bloque, dtype=self.dtype)
+                          for fragmento in fragmentos]
+        else:
+            # map conserva el orden de las tareas, así que basta con concatenar
+            resultados = self._obtener_pool(num_procesos).map(_procesar_fragmento,
+                                                              [(fragmento, top_k) for fragmento in fragmentos])
+        return tuple(np.concatenate(partes) for partes in zip(*resultados))
+
+    def medir_escalado(self, perturbaciones, procesos=(1, 2, 4), repeticiones=1, top_k=None,
+                       tam_fragmento=TAM_FRAGMENTO_POR_DEFECTO):
+        """
+        Mide el tiempo por número de procesos y verifica que la salida es idéntica
+        (todas las mediciones usan la misma fragmentación).
+        Retorna una lista de dicts con procesos, segundos, aceleracion y eficiencia.
+        """
+        referencia = None
+        informe = []
+        for num_procesos in procesos:
+            # Arrancar el pool fuera de la medición
+            self.calcular(perturbaciones[:1], num_procesos=num_procesos, top_k=top_k)
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                resultado = self.calcular(perturbaciones, num_procesos=num_procesos, top_k=top_k,
+                                          tam_fragmento=tam_fragmento)
+            segundos = (time.perf_counter() - inicio) / repeticiones
+
+            if referencia is None:
+                referencia = (resultado, segundos)
+            identico = all(np.array_equal(a, b) for a, b in zip(resultado, referencia[0]))
+            aceleracion = referencia[1] / segundos if segundos > 0 else float('inf')
+            informe.append({
+                'procesos': num_procesos,
+                'segundos': segundos,
+                'aceleracion': aceleracion,
+                'eficiencia': aceleracion * procesos[0] / num_procesos,
+                'identico': identico,
+            })
+        return informe
+
+    def _cerrar_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            self.num_procesos = None
+
+    def cerrar(self):
+        """Detiene el pool y libera la memoria compartida"""
+        self._cerrar_pool()
+        self.direcciones = None
+        self.distancias = None
+        for segmento in self.segmentos.values():
+            segmento.close()
+            segmento.unlink()
+        self.segmentos = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfilado por etapas del modificador de píxeles
+Mide tiempo de pared, tiempo de CPU y pico de memoria (tracemalloc) de cada
+etapa y exporta las trazas como líneas JSON o en formato Chrome trace-event
+"""
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+
+class StageProfiler:
+    def __init__(self, trace_memory=False, metadata=None):
+        """
+        Registro de etapas.
+        - trace_memory: mide también el pico de memoria con tracemalloc; es opcional
+          porque tracemalloc ralentiza todas las etapas medidas
+        - metadata: campos añadidos a cada registro (p. ej. la imagen procesada)
+        """
+        self.trace_memory = trace_memory
+        self.metadata = dict(metadata or {})
+        self.records = []
+        self._stack = []
+        self._started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def close(self):
+        """Detiene tracemalloc si lo arrancó este perfilador"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def stage(self, name, **args):
+        """
+        Mide el bloque como una etapa. Las etapas se pueden anidar: el pico de
+        memoria de la etapa padre incluye el de sus hijas.
+        """
+        frame = {'peak': 0}
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent['peak'] = max(parent['peak'], peak - parent['base'])
+            frame['base'] = current
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+
+        start_wall = time.time()
+        start_perf = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield frame
+        finally:
+            wall = time.perf_counter() - start_perf
+            cpu = time.process_time() - start_cpu
+            self._stack.pop()
+            record = dict(self.metadata)
+            record.update({
+                'stage': name,
+                'start': start_wall,
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'depth': len(self._stack),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+            if self.trace_memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1] - frame['base'])
+                record['peak_bytes'] = int(peak)
+                # El padre hereda el pico (medido desde su propia base) y sigue midiendo
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['peak'] = max(parent['peak'], frame['base'] + peak - parent['base'])
+                tracemalloc.reset_peak()
+            if args:
+                record['args'] = args
+            self.records.append(record)
+
+    def timed(self, name=None):
+        """Decorador equivalente a envolver la función en stage(name)"""
+        def decorator(function):
+            stage_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+@contextlib.contextmanager
+def maybe_stage(profiler, name, **args):
+    """stage del perfilador, o un bloque sin medir si profiler es None"""
+    if profiler is None:
+        yield None
+    else:
+        with profiler.stage(name, **args) as frame:
+            yield frame
+
+
+def to_chrome_events(records):
+    """Eventos completos ('ph': 'X') del formato Chrome trace-event, en microsegundos"""
+    events = []
+    for record in records:
+        args = {key: value for key, value in record.items()
+                if key not in ('stage', 'start', 'wall_seconds', 'pid', 'tid', 'depth', 'args')}
+        args.update(record.get('args', {}))
+        events.append({
+            'name': record['stage'],
+            'cat': 'stage',
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall_seconds'] * 1e6,
+            'pid': record['pid'],
+            'tid': record['tid'],
+            'args': args,
+        })
+    return events
+
+
+def write_trace(path, records):
+    """
+    Escribe los registros en path: formato Chrome trace-event si termina en
+    .json (se abre en chrome://tracing o Perfetto) y líneas JSON en otro caso.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            json.dump({'traceEvents': to_chrome_events(records), 'displayTimeUnit': 'ms'}, f)
+        else:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+    return path
+
+
+def load_trace(path):
+    """Carga los registros de una traza escrita con write_trace (cualquiera de los dos formatos)"""
+    with open(path, encoding='utf-8') as f:
+        if not path.lower().endswith('.json'):
+            return [json.loads(line) for line in f if line.strip()]
+        events = json.load(f)['traceEvents']
+
+    records = []
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        record = dict(event.get('args', {}))
+        record.update({
+            'stage': event['name'],
+            'start': event['ts'] / 1e6,
+            'wall_seconds': event['dur'] / 1e6,
+            'pid': event['pid'],
+            'tid': event['tid'],
+        })
+        records.append(record)
+    return records
+
+
+def summarize(records, percentiles=(50, 95)):
+    """
+    Agrega los registros por etapa: número de muestras, percentiles de tiempo de
+    pared y de CPU, tiempo total y pico máximo de memoria.
+    """
+    by_stage = {}
+    for record in records:
+        by_stage.setdefault(record['stage'], []).append(record)
+
+    summary = {}
+    for name, stage_records in by_stage.items():
+        wall = np.array([r['wall_seconds'] for r in stage_records])
+        entry = {'count': len(stage_records), 'total_seconds': float(wall.sum())}
+        for p, value in zip(percentiles, np.percentile(wall, percentiles)):
+            entry[f'wall_p{p}'] = float(value)
+        cpu = np.array([r['cpu_seconds'] for r in stage_records if 'cpu_seconds' in r])
+        if cpu.size:
+            for p, value in zip(percentiles, np.percentile(cpu, percentiles)):
+                entry[f'cpu_p{p}'] = float(value)
+        peaks = [r['peak_bytes'] for r in stage_records if 'peak_bytes' in r]
+        if peaks:
+            entry['peak_bytes_max'] = int(max(peaks))
+        summary[name] = entry
+    return summary
+
+
+def print_summary(summary):
+    """Imprime la tabla de latencias por etapa con los percentiles que tenga el resumen"""
+    # Los percentiles salen de las claves wall_pXX que haya generado summarize
+    percentiles = sorted({key[len('wall_p'):] for entry in summary.values() for key in entry
+                          if key.startswith('wall_p')}, key=float)
+    # Una sola columna de CPU: la mediana si está, si no el primer percentil
+    cpu_percentile = '50' if '50' in percentiles else (percentiles[0] if percentiles else None)
+    cpu_key = f'cpu_p{cpu_percentile}'
+    width = 24 + 7 + 12 * len(percentiles) + 11 + 12
+
+    print("\n" + "="*width)
+    print("⏱️ LATENCIAS POR ETAPA")
+    print("="*width)
+    header = f"{'Etapa':<24}{'n':>7}" + ''.join(f"{f'p{p} (ms)':>12}" for p in percentiles)
+    print(header + f"{f'CPU p{cpu_percentile}' if percentiles else 'CPU':>11}{'Pico (MB)':>12}")
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]['total_seconds']):
+        walls = ''.join(f"{entry[f'wall_p{p}'] * 1e3:>12.2f}" if f'wall_p{p}' in entry else f"{'-':>12}"
+                        for p in percentiles)
+        cpu = f"{entry[cpu_key] * 1e3:.2f}" if cpu_key in entry else '-'
+        peak = f"{entry['peak_bytes_max'] / 1e6:.2f}" if 'peak_bytes_max' in entry else '-'
+        print(f"{name:<24}{entry['count']:>7}{walls}{cpu:>11}{peak:>12}")
+    print("="*width)
+
+
+def main():
+    """Resume una o varias trazas: python perfil_etapas.py traza.jsonl [traza2.json ...]"""
+    if len(sys.argv) < 2:
+        print("Uso: python perfil_etapas.py TRAZA [TRAZA ...]")
+        return
+    records = [record for path in sys.argv[1:] for record in load_trace(path)]
+    print_summary(summarize(records))
+
+
+if __name__ == "__main__":
+    main()
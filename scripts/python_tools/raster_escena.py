@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de frames raster para los GIF de demostración, sin matplotlib
+La escena fija se rasteriza una vez; cada frame copia ese fondo en un buffer
+uint8 preasignado y compone encima sprites RGBA y textos renderizados con PIL,
+que se guardan en una caché para no volver a rasterizar los que se repiten
+"""
+
+import collections
+import functools
+import math
+
+import numpy as np
+import PIL
+from PIL import Image, ImageColor, ImageDraw
+
+from comparacion_rapida import load_font
+
+# Motores de render de los generadores de GIF
+RENDERERS = ('matplotlib', 'raster')
+
+# Versión del rasterizado; forma parte de la huella de las escenas en caché,
+# así que hay que subirla al cambiar cómo se dibujan sprites o textos
+RASTER_VERSION = 2
+
+# Alineación estilo matplotlib -> ancla de texto de PIL
+HORIZONTAL_ANCHORS = {'left': 'l', 'center': 'm', 'right': 'r'}
+VERTICAL_ANCHORS = {'baseline': 's', 'center': 'm', 'top': 't', 'bottom': 'b'}
+
+# Factor de supermuestreo para suavizar los bordes de polígonos y círculos
+SUPERSAMPLING = 4
+
+# Memoria máxima por defecto de la caché de textos rasterizados
+TEXT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Punto de código de uso privado que ninguna fuente define: se dibuja con el glifo de reserva
+MISSING_CODEPOINT = '\U0010FFFD'
+
+# Selectores de variación y unión de ancho cero: sin glifo propio, acompañan a un emoji
+EMOJI_JOINERS = {'\uFE0E', '\uFE0F', '\u200D'}
+
+
+def to_rgba(color, alpha=1.0):
+    """Color de matplotlib/PIL ('#rrggbb', 'white', tupla) como tupla RGBA de 0-255"""
+    if isinstance(color, str):
+        rgb = ImageColor.getrgb(color)[:3]
+    else:
+        rgb = tuple(int(c) for c in color[:3])
+    return rgb + (int(round(255 * alpha)),)
+
+
+def _fill(region, rgb):
+    """Rellena region (H, W, 3) con un color; copiar filas enteras es mucho más rápido que difundir el color"""
+    region[0] = rgb
+    region[1:] = region[0]
+
+
+class Sprite:
+    def __init__(self, rgba, anchor=(0, 0)):
+        """
+        Imagen RGBA lista para componer.
+        - anchor: píxel (x, y) del sprite que se coloca sobre el punto de destino
+        """
+        rgba = np.asarray(rgba, dtype=np.uint8)
+        alpha = rgba[..., 3:4].astype(np.uint16)
+        # Se guarda premultiplicado para que componer sea una suma y un producto
+        self.premultiplied = rgba[..., :3].astype(np.uint16) * alpha
+        self.inverse_alpha = 255 - alpha
+        self.anchor = (int(round(anchor[0])), int(round(anchor[1])))
+        self.height, self.width = rgba.shape[:2]
+
+    @property
+    def nbytes(self):
+        return self.premultiplied.nbytes + self.inverse_alpha.nbytes
+
+    def blit(self, target, x, y):
+        """Compone el sprite sobre target (H, W, 3) con su ancla en el píxel (x, y), recortando"""
+        left = int(round(x)) - self.anchor[0]
+        top = int(round(y)) - self.anchor[1]
+        x0, y0 = max(left, 0), max(top, 0)
+        x1, y1 = min(left + self.width, target.shape[1]), min(top + self.height, target.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return
+        sx, sy = x0 - left, y0 - top
+        region = target[y0:y1, x0:x1]
+        blended = self.premultiplied[sy:sy + y1 - y0, sx:sx + x1 - x0] \
+            + region * self.inverse_alpha[sy:sy + y1 - y0, sx:sx + x1 - x0] + 127
+        region[...] = blended // 255
+
+
+class TextCache:
+    def __init__(self, max_bytes=TEXT_CACHE_BYTES):
+        """
+        Caché LRU de textos rasterizados con un presupuesto de memoria.
+        Guarda dos tipos de entrada: sprites de líneas completas (texto + estilo)
+        y máscaras alfa de tramos de texto (palabras) con las que se componen las
+        líneas que cambian poco entre frames.
+        - max_bytes: al pasarse, se descartan las entradas usadas hace más tiempo
+          (0 desactiva la caché)
+        """
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'strip_hits': 0, 'strip_misses': 0, 'evictions': 0}
+        self._entries = collections.OrderedDict()
+
+    def get(self, key, kind=''):
+        """Valor guardado bajo key, o None; kind es el prefijo de los contadores ('' o 'strip_')"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.counters[kind + 'misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.counters[kind + 'hits'] += 1
+        return entry[0]
+
+    def put(self, key, value, nbytes):
+        if nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (value, nbytes)
+        self.bytes += nbytes
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.counters['evictions'] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def summary(self):
+        """Resumen de una línea para la consola"""
+        stats = self.stats()
+        return (f"{stats['hit_rate']:.0%} aciertos ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+                f"{stats['entries']} entradas, {stats['bytes'] / 1e6:.1f} MB")
+
+    def stats(self):
+        """Contadores de aciertos, fallos y desalojos, más entradas y bytes en uso"""
+        stats = dict(self.counters)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+        })
+        return stats
+
+
+@functools.lru_cache(maxsize=None)
+def _has_glyph(font, char):
+    """Indica si la fuente tiene glifo propio para el carácter (no el de reserva)"""
+    if char.isspace():
+        return True
+    missing = font.getmask(MISSING_CODEPOINT)
+    mask = font.getmask(char)
+    return (mask.size != missing.size or bytes(mask) != bytes(missing)
+            or font.getlength(char) != font.getlength(MISSING_CODEPOINT))
+
+
+def drawable_text(text, font):
+    """
+    Texto sin los caracteres que la fuente no tiene (p. ej. los emoji de los
+    iconos con DejaVu). Se quitan antes de maquetar: el glifo de reserva se dibuja
+    con un avance que no siempre coincide con el medido y pisa las letras vecinas.
+    """
+    kept, dropped = [], False
+    for char in text:
+        if char in EMOJI_JOINERS and dropped:
+            continue
+        dropped = not _has_glyph(font, char)
+        if not dropped:
+            kept.append(char)
+    cleaned = ''.join(kept)
+    if len(cleaned) == len(text):
+        return text
+    # El espacio que separaba el emoji del resto ya no separa nada
+    return ' '.join(part for part in cleaned.split(' ') if part)
+
+
+class RasterCanvas:
+    def __init__(self, screen_size, frame_size, axes_box, figure_color='white', axes_color='white', dpi=100,
+                 text_cache=None):
+        """
+        Lienzo que imita una figura de matplotlib con unos ejes.
+        - screen_size: (ancho, alto) de la pantalla simulada en unidades de datos
+        - frame_size: (ancho, alto) del frame en píxeles
+        - axes_box: (izquierda, arriba, ancho, alto) de los ejes en píxeles
+        - dpi: para convertir tamaños en puntos (fuentes, grosores) a píxeles
+        - text_cache: TextCache de los textos (por defecto una propia de TEXT_CACHE_BYTES)
+        """
+        self.screen_width, self.screen_height = screen_size
+        self.frame_width, self.frame_height = frame_size
+        self.axes_box = axes_box
+        self.dpi = dpi
+        self.colors = (figure_color, axes_color)
+        self.text_cache = TextCache() if text_cache is None else text_cache
+        self.scale_x = axes_box[2] / self.screen_width
+        self.scale_y = axes_box[3] / self.screen_height
+
+        self.background = np.empty((self.frame_height, self.frame_width, 3), dtype=np.uint8)
+        _fill(self.background, to_rgba(figure_color)[:3])
+        left, top, width, height = axes_box
+        _fill(self.background[top:top + height, left:left + width], to_rgba(axes_color)[:3])
+        self.buffer = np.empty_like(self.background)
+
+    # Conversión de unidades
+
+    def to_pixels(self, x, y):
+        """Punto de la pantalla simulada (y hacia arriba) -> píxel del frame"""
+        return (self.axes_box[0] + x * self.scale_x,
+                self.axes_box[1] + (self.screen_height - y) * self.scale_y)
+
+    def points_to_pixels(self, points):
+        return points * self.dpi / 72
+
+    def font(self, points, bold=False, monospace=False):
+        return load_font(max(1, int(round(self.points_to_pixels(points)))), bold, monospace)
+
+    # Sprites
+
+    def _shape_sprite(self, width, height, anchor, draw_shape):
+        """Rasteriza una forma con supermuestreo; draw_shape(draw, factor) dibuja a escala factor"""
+        factor = SUPERSAMPLING
+        image = Image.new('RGBA', (max(1, width) * factor, max(1, height) * factor), (0, 0, 0, 0))
+        draw_shape(ImageDraw.Draw(image), factor)
+        image = image.resize((max(1, width), max(1, height)), Image.BOX)
+        return Sprite(np.asarray(image), anchor)
+
+    def rectangle_sprite(self, width, height, facecolor, edgecolor=None, linewidth=1.0, alpha=1.0):
+        """Rectángulo de width x height unidades de datos; ancla en la esquina inferior izquierda"""
+        w, h = int(round(width * self.scale_x)), int(round(height * self.scale_y))
+        line = int(round(self.points_to_pixels(linewidth))) if edgecolor else 0
+        pad = line // 2
+        image = Image.new('RGBA', (w + 2 * pad + 1, h + 2 * pad + 1), (0, 0, 0, 0))
+        ImageDraw.Draw(image).rectangle([pad, pad, pad + w, pad + h], fill=to_rgba(facecolor, alpha),
+                                        outline=to_rgba(edgecolor, alpha) if edgecolor else None,
+                                        width=line)
+        return Sprite(np.asarray(image), (pad, pad + h))
+
+    def polygon_sprite(self, points, facecolor, edgecolor=None, linewidth=1.0, alpha=1.0):
+        """Polígono con vértices relativos a su ancla, en unidades de datos"""
+        pixels = np.array([(px * self.scale_x, -py * self.scale_y) for px, py in points])
+        line = self.points_to_pixels(linewidth) if edgecolor else 0
+        origin = np.floor(pixels.min(axis=0) - line)
+        size = np.ceil(pixels.max(axis=0) + line - origin).astype(int) + 1
+
+        def draw_shape(draw, factor):
+            vertices = [tuple((p - origin) * factor) for p in pixels]
+            draw.polygon(vertices, fill=to_rgba(facecolor, alpha))
+            if edgecolor:
+                draw.line(vertices + vertices[:1], fill=to_rgba(edgecolor, alpha),
+                          width=max(1, int(round(line * factor))), joint='curve')
+        return self._shape_sprite(size[0], size[1], -origin, draw_shape)
+
+    def circle_sprite(self, radius, facecolor, edgecolor=None, linewidth=1.0, alpha=1.0):
+        """Círculo en unidades de datos (elipse si la escala de los ejes no es igual); ancla en el centro"""
+        rx, ry = radius * self.scale_x, radius * self.scale_y
+        line = self.points_to_pixels(linewidth) if edgecolor else 0
+        half_w, half_h = int(math.ceil(rx + line)) + 1, int(math.ceil(ry + line)) + 1
+
+        def draw_shape(draw, factor):
+            box = [(half_w - rx) * factor, (half_h - ry) * factor,
+                   (half_w + rx) * factor, (half_h + ry) * factor]
+            draw.ellipse(box, fill=to_rgba(facecolor, alpha),
+                         outline=to_rgba(edgecolor, alpha) if edgecolor else None,
+                         width=int(round(line * factor)) if edgecolor else 0)
+        return self._shape_sprite(2 * half_w, 2 * half_h, (half_w, half_h), draw_shape)
+
+    def text_sprite(self, text, fontsize=10, color='black', ha='left', va='baseline', bold=False,
+                    monospace=False, boxcolor=None, boxalpha=1.0, boxpad=0.3, boxedge=None):
+        """
+        Texto renderizado con PIL; ancla en el punto de alineación (ha, va) como en matplotlib.
+        - boxcolor: fondo redondeado opcional, con boxpad en fracciones del tamaño de fuente
+
+        Los caracteres sin glifo en la fuente no se dibujan (ver drawable_text).
+        Cada texto y estilo se rasteriza una sola vez (ver TextCache). Las líneas
+        nuevas alineadas a la izquierda sobre la línea base y sin caja se componen
+        con las máscaras de sus palabras, que sí suelen repetirse.
+        """
+        key = ('line', text, fontsize, color, ha, va, bold, monospace, boxcolor, boxalpha, boxpad, boxedge)
+        sprite = self.text_cache.get(key)
+        if sprite is None:
+            font = self.font(fontsize, bold, monospace)
+            drawable = drawable_text(text, font)
+            if not boxcolor and ha == 'left' and va == 'baseline':
+                sprite = self._strip_sprite(drawable, font, (fontsize, bold, monospace), color)
+            if sprite is None:
+                sprite = self._render_text_sprite(drawable, font, color, ha, va, boxcolor, boxalpha, boxpad, boxedge)
+            self.text_cache.put(key, sprite, sprite.nbytes)
+        return sprite
+
+    def _strip_mask(self, word, font, style):
+        """Máscara alfa de una palabra y su desplazamiento (x, y) respecto al origen en la línea base"""
+        key = ('strip', word, style)
+        strip = self.text_cache.get(key, 'strip_')
+        if strip is None:
+            left, top, right, bottom = font.getbbox(word, anchor='ls')
+            image = Image.new('L', (max(1, right - left), max(1, bottom - top)), 0)
+            ImageDraw.Draw(image).text((-left, -top), word, font=font, fill=255, anchor='ls')
+            strip = (np.asarray(image), left, top)
+            self.text_cache.put(key, strip, strip[0].nbytes)
+        return strip
+
+    def _strip_sprite(self, text, font, style, color):
+        """
+        Línea compuesta con las máscaras de sus palabras. Solo es idéntica al
+        texto renderizado de una vez si todos los avances son píxeles enteros
+        (fuentes monoespaciadas con hinting); si no, retorna None.
+        """
+        words = text.split(' ')
+        space = font.getlength(' ')
+        advances = [font.getlength(word) for word in words]
+        if not float(space).is_integer() or not all(float(advance).is_integer() for advance in advances):
+            return None
+
+        strips, pen = [], 0
+        for word, advance in zip(words, advances):
+            if word:
+                mask, left, top = self._strip_mask(word, font, style)
+                strips.append((mask, pen + left, top))
+            pen += int(advance) + int(space)
+        if not strips:
+            return None
+
+        x0 = min(x for _, x, _ in strips)
+        y0 = min(y for _, _, y in strips)
+        x1 = max(x + mask.shape[1] for mask, x, _ in strips)
+        y1 = max(y + mask.shape[0] for mask, _, y in strips)
+        rgba = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        rgba[..., :3] = to_rgba(color)[:3]
+        alpha = rgba[..., 3]
+        for mask, x, y in strips:
+            region = alpha[y - y0:y - y0 + mask.shape[0], x - x0:x - x0 + mask.shape[1]]
+            np.maximum(region, mask, out=region)
+        return Sprite(rgba, (-x0, -y0))
+
+    def _render_text_sprite(self, text, font, color, ha, va, boxcolor, boxalpha, boxpad, boxedge):
+        """Rasteriza el texto completo (con su caja, si la tiene) en un sprite"""
+        anchor = HORIZONTAL_ANCHORS[ha] + VERTICAL_ANCHORS[va]
+        left, top, right, bottom = font.getbbox(text, anchor=anchor)
+        pad = int(math.ceil(boxpad * font.size)) if boxcolor else 1
+        width, height = right - left + 2 * pad, bottom - top + 2 * pad
+
+        # Sin caja, el fondo transparente lleva el color del texto para no oscurecer los bordes
+        fill = to_rgba(color)
+        image = Image.new('RGBA', (width, height), fill[:3] + (0,))
+        draw = ImageDraw.Draw(image)
+        if boxcolor:
+            draw.rounded_rectangle([0, 0, width - 1, height - 1], radius=pad, fill=to_rgba(boxcolor, boxalpha),
+                                   outline=to_rgba(boxedge) if boxedge else None)
+        draw.text((pad - left, pad - top), text, font=font, fill=fill, anchor=anchor)
+        return Sprite(np.asarray(image), (pad - left, pad - top))
+
+    # Capa fija
+
+    def add_static(self, sprite, x, y):
+        """Compone un sprite en el fondo, en coordenadas de la pantalla simulada"""
+        sprite.blit(self.background, *self.to_pixels(x, y))
+
+    def add_static_text(self, x, y, text, **style):
+        self.add_static(self.text_sprite(text, **style), x, y)
+
+    def add_static_pixels(self, sprite, px, py):
+        """Compone un sprite en el fondo, en píxeles del frame (títulos fuera de los ejes)"""
+        sprite.blit(self.background, px, py)
+
+    def fingerprint(self):
+        """Todo lo que, además de lo dibujado, determina los píxeles de la capa fija"""
+        return {
+            'raster_version': RASTER_VERSION,
+            'pil_version': PIL.__version__,
+            'fonts': [getattr(load_font(12, bold, monospace), 'path', None)
+                      for bold in (False, True) for monospace in (False, True)],
+            'screen_size': (self.screen_width, self.screen_height),
+            'frame_size': (self.frame_width, self.frame_height),
+            'axes_box': self.axes_box,
+            'dpi': self.dpi,
+            'colors': self.colors,
+        }
+
+    def build_static(self, draw_static, cache=None, **fingerprint):
+        """
+        Prepara la capa fija con draw_static(canvas), que la dibuja con add_static*.
+        - cache: SceneCache opcional; si ya tiene una capa con la misma huella
+          (fingerprint más la del lienzo) se usa esa, mapeada en memoria, sin dibujar
+        """
+        if cache is None:
+            draw_static(self)
+            return self.background
+
+        def build():
+            draw_static(self)
+            return self.background
+        fingerprint.update(self.fingerprint())
+        self.background = cache.get_or_build(fingerprint, build)
+        return self.background
+
+    def add_axes_border(self, color='white', linewidth=1.0):
+        """Marco de los ejes (los 'spines' de matplotlib)"""
+        left, top, width, height = self.axes_box
+        line = max(1, int(round(self.points_to_pixels(linewidth))))
+        image = Image.new('RGBA', (width + line, height + line), (0, 0, 0, 0))
+        ImageDraw.Draw(image).rectangle([0, 0, width + line - 1, height + line - 1],
+                                        outline=to_rgba(color), width=line)
+        self.add_static_pixels(Sprite(np.asarray(image), (line // 2, line // 2)), left, top)
+
+    # Frames
+
+    def begin_frame(self):
+        """Copia el fondo en el buffer del frame y lo retorna"""
+        np.copyto(self.buffer, self.background)
+        return self.buffer
+
+    def draw(self, sprite, x, y):
+        """Compone un sprite en el frame actual, en coordenadas de la pantalla simulada"""
+        sprite.blit(self.buffer, *self.to_pixels(x, y))
+
+    def draw_text(self, x, y, text, **style):
+        """Renderiza y compone un texto en el frame actual"""
+        self.draw(self.text_sprite(text, **style), x, y)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repetición de ejecuciones reales del agente como GIF
+Lee en streaming un export JSONL del historial de una ejecución (los mensajes
+de runHistory o registros {action, reasoning} ya extraídos), pasa las
+coordenadas del espacio de la IA a la pantalla simulada como hace runAgent.ts
+y comprime el tiempo para que cualquier ejecución quepa en un número acotado
+de frames, con memoria constante
+"""
+
+import argparse
+import gzip
+import json
+import math
+
+import numpy as np
+
+from cache_escenas import SceneCache
+from flujo_gif import write_gif_stream
+from generar_gif_agente import AgentGifGenerator
+from raster_escena import RENDERERS
+from trayectoria_cursor import EASINGS
+
+# Tamaño máximo de las capturas que ve el modelo (getAiScaledScreenDimensions)
+AI_MAX_WIDTH = 1280
+AI_MAX_HEIGHT = 800
+
+# Nombres de las acciones de NextAction en la animación
+ACTION_LABELS = {
+    'key': 'Key Press',
+    'type': 'Type Text',
+    'mouse_move': 'Moving Mouse',
+    'left_click': 'Left Click',
+    'left_click_drag': 'Drag',
+    'right_click': 'Right Click',
+    'middle_click': 'Middle Click',
+    'double_click': 'Double Click',
+    'screenshot': 'Taking Screenshot',
+    'cursor_position': 'Cursor Position',
+    'finish': 'Finish',
+    'error': 'Error',
+}
+
+# Acciones sin efecto visible: las rachas seguidas se reducen a un solo tramo
+IDLE_ACTIONS = {'screenshot', 'cursor_position'}
+
+# Acciones de computer con coordenada (opcional salvo en mouse_move y el arrastre)
+POINTER_ACTIONS = {'mouse_move', 'left_click', 'left_click_drag', 'right_click', 'middle_click', 'double_click'}
+
+# Caracteres visibles del razonamiento en la consola
+MAX_REASONING_CHARS = 90
+
+
+def _js_round(value):
+    """Math.round de JavaScript (los .5 redondean hacia arriba)"""
+    return int(math.floor(value + 0.5))
+
+
+def ai_scaled_dimensions(width, height):
+    """Tamaño de las capturas que recibe el modelo para una pantalla de width x height (como en runAgent.ts)"""
+    aspect_ratio = width / height
+    if aspect_ratio > AI_MAX_WIDTH / AI_MAX_HEIGHT:
+        return AI_MAX_WIDTH, _js_round(AI_MAX_WIDTH / aspect_ratio)
+    return _js_round(AI_MAX_HEIGHT * aspect_ratio), AI_MAX_HEIGHT
+
+
+def map_from_ai_space(x, y, ai_size, screen_size):
+    """Coordenadas del modelo -> coordenadas de una pantalla de screen_size (mapFromAiSpace)"""
+    return x * screen_size[0] / ai_size[0], y * screen_size[1] / ai_size[1]
+
+
+def extract_action(message):
+    """
+    Acción y razonamiento de un mensaje del asistente, como extractAction.ts.
+    Retorna (dict NextAction, razonamiento).
+    """
+    content = message.get('content', [])
+    if isinstance(content, str):
+        return {'type': 'error', 'message': 'No tool called'}, content
+    reasoning = ' '.join(item.get('text', '') for item in content if item.get('type') == 'text')
+
+    last = content[-1] if content else None
+    if not isinstance(last, dict) or last.get('type') != 'tool_use':
+        return {'type': 'error', 'message': 'No tool called'}, reasoning
+    tool_input = last.get('input') or {}
+    if last.get('name') == 'finish_run':
+        if not tool_input.get('success'):
+            return {'type': 'error',
+                    'message': tool_input.get('error') or 'Agent encountered unknown error'}, reasoning
+        return {'type': 'finish'}, reasoning
+    if last.get('name') != 'computer':
+        return {'type': 'error', 'message': f"Wrong tool called: {last.get('name')}"}, reasoning
+
+    action_type = tool_input.get('action')
+    coordinate = tool_input.get('coordinate')
+    text = tool_input.get('text')
+    if action_type in ('type', 'key'):
+        if not text:
+            return {'type': 'error', 'message': f"No text provided for {action_type}"}, reasoning
+        return {'type': action_type, 'text': text}, reasoning
+    if action_type in POINTER_ACTIONS:
+        if coordinate:
+            return {'type': action_type, 'x': coordinate[0], 'y': coordinate[1]}, reasoning
+        if action_type in ('mouse_move', 'left_click_drag'):
+            return {'type': 'error', 'message': 'No coordinate provided'}, reasoning
+        return {'type': action_type}, reasoning
+    if action_type in ('screenshot', 'cursor_position', 'finish'):
+        return {'type': action_type}, reasoning
+    return {'type': 'error', 'message': f"Unsupported computer action: {action_type}"}, reasoning
+
+
+def iter_log_steps(path):
+    """
+    Lee el registro línea a línea (también .jsonl.gz) y genera un dict por
+    acción del agente: el NextAction más 'reasoning'. Las líneas de otros roles
+    (capturas, resultados de herramientas) se ignoran.
+    """
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Línea {line_number} de {path} no es JSON válido: {e}") from e
+
+            if 'role' in record:
+                if record['role'] != 'assistant':
+                    continue
+                action, reasoning = extract_action(record)
+            elif isinstance(record.get('action'), dict):
+                action, reasoning = record['action'], record.get('reasoning', '')
+            else:
+                continue
+            step = dict(action)
+            step['reasoning'] = reasoning or ''
+            yield step
+
+
+def iter_frame_demand(steps, action_frames, idle_frames):
+    """
+    Frames que pide cada paso sin comprimir: action_frames las acciones
+    visibles e idle_frames el primer paso de cada racha sin efecto visible
+    (capturas, posición del cursor); el resto de la racha pide 0. Genera
+    (paso, frames).
+    """
+    idle_run = False
+    for step in steps:
+        if step.get('type') in IDLE_ACTIONS:
+            yield step, 0 if idle_run else idle_frames
+            idle_run = True
+        else:
+            yield step, action_frames
+            idle_run = False
+
+
+class ReplayGifGenerator(AgentGifGenerator):
+    def __init__(self, renderer='matplotlib', easing='ease_in_out', display_size=(AI_MAX_WIDTH, AI_MAX_HEIGHT),
+                 fps=5, action_seconds=1.0, idle_frames=1, max_frames=300, scene_cache=None):
+        """
+        Generador de GIF que repite una ejecución registrada en lugar de una simulada.
+        - display_size: (ancho, alto) de la pantalla real de la ejecución; de él
+          sale el espacio de coordenadas del modelo
+        - fps: frames por segundo del GIF
+        - action_seconds: duración de cada acción visible antes de comprimir
+        - idle_frames: frames de cada racha de pasos sin efecto visible
+        - max_frames: tope de frames del GIF; si la ejecución no cabe, el tiempo
+          se comprime y los pasos que no reciben frame se saltan
+        - scene_cache: SceneCache opcional (ver AgentGifGenerator)
+        """
+        super().__init__(renderer=renderer, easing=easing, scene_cache=scene_cache)
+        if max_frames < 1 or fps <= 0:
+            raise ValueError("max_frames y fps deben ser positivos")
+        self.title = 'AGENT.EXE - Repetición de ejecución'
+        self.ai_size = ai_scaled_dimensions(*display_size)
+        self.fps = fps
+        self.action_frames = max(1, _js_round(action_seconds * fps))
+        self.idle_frames = idle_frames
+        self.max_frames = max_frames
+        self.total_steps = 0
+        self.compression = 1.0
+
+    def to_scene(self, x, y):
+        """Coordenadas del modelo -> pantalla simulada (y hacia arriba), dentro de sus límites"""
+        scene_x, scene_y = map_from_ai_space(x, y, self.ai_size, (self.screen_width, self.screen_height))
+        return (min(max(scene_x, 0), self.screen_width),
+                min(max(self.screen_height - scene_y, 0), self.screen_height))
+
+    def action_label(self, step):
+        label = ACTION_LABELS.get(step.get('type'), str(step.get('type')))
+        if step.get('text'):
+            text = step['text'] if len(step['text']) <= 20 else step['text'][:19] + '…'
+            label += f': "{text}"'
+        return label
+
+    def console_lines(self, step_info):
+        """Líneas de la consola con el razonamiento real y las coordenadas del modelo"""
+        step = step_info['step']
+        reasoning = ' '.join(step_info['reasoning'].split())
+        if len(reasoning) > MAX_REASONING_CHARS:
+            reasoning = reasoning[:MAX_REASONING_CHARS - 1] + '…'
+        coordinates = step_info['coordinates']
+        return [
+            f"[{step}] REASONING: {reasoning}",
+            f"[{step}] ACTION: {step_info['action']}",
+            f"[{step}] COORDINATES: {coordinates if coordinates else '-'}",
+            f"[{step}] STATUS: {step_info['status']}"
+        ]
+
+    def info_line(self, step):
+        return f"Paso: {step}/{self.total_steps} | Repetición x{self.compression:.1f} | Agente: ACTIVO"
+
+    def replay_states(self, log_path):
+        """
+        Genera los datos de paso de cada frame de la repetición. Recorre el
+        registro dos veces en streaming: la primera solo cuenta pasos y frames
+        pedidos para fijar la compresión; la segunda reparte los frames con un
+        acumulador, así que el total nunca pasa de max_frames.
+        """
+        demand_total = 0
+        self.total_steps = 0
+        for _, demand in iter_frame_demand(iter_log_steps(log_path), self.action_frames, self.idle_frames):
+            self.total_steps += 1
+            demand_total += demand
+        if self.total_steps == 0:
+            raise ValueError(f"El registro {log_path} no tiene acciones del agente")
+        if demand_total == 0:
+            raise ValueError(f"El registro {log_path} no tiene pasos que pidan frames "
+                             f"(solo pasos sin efecto visible y idle_frames={self.idle_frames})")
+        scale = min(1.0, self.max_frames / demand_total)
+        self.compression = 1 / scale
+
+        cursor_x, cursor_y = self.mouse_x, self.mouse_y
+        allotted = 0.0
+        emitted = 0
+        skipped = 0
+        for number, (step, demand) in enumerate(
+                iter_frame_demand(iter_log_steps(log_path), self.action_frames, self.idle_frames), 1):
+            allotted += demand * scale
+            frames = min(int(allotted + 1e-9), self.max_frames) - emitted
+            emitted += frames
+
+            has_target = step.get('x') is not None and step.get('y') is not None
+            target_x, target_y = self.to_scene(step['x'], step['y']) if has_target else (cursor_x, cursor_y)
+            if frames == 0:
+                # Paso saltado: el estado avanza aunque no se dibuje
+                cursor_x, cursor_y = target_x, target_y
+                skipped += 1
+                continue
+
+            # Primera mitad desplazamiento con la curva elegida, segunda mitad la acción
+            move_frames = frames // 2 if has_target else 0
+            progress = EASINGS[self.easing](np.arange(1, move_frames + 1) / (move_frames + 1))
+            idle = step.get('type') in IDLE_ACTIONS
+            status = 'Error: ' + step.get('message', '') if step.get('type') == 'error' else 'Completado ✓'
+            if skipped:
+                status += f' (+{skipped} pasos omitidos)'
+            state = {
+                'action': self.action_label(step),
+                'reasoning': step['reasoning'],
+                'coordinates': (step['x'], step['y']) if has_target else None,
+                'target_x': target_x,
+                'target_y': target_y,
+                'step': number,
+            }
+            for i in range(frames):
+                acting = i >= move_frames
+                t = 1.0 if acting else float(progress[i])
+                yield dict(state, x=cursor_x + (target_x - cursor_x) * t, y=cursor_y + (target_y - cursor_y) * t,
+                           acting=acting and not idle, status=status if acting else 'Ejecutando...')
+            cursor_x, cursor_y = target_x, target_y
+            skipped = 0
+
+    def create_replay_gif(self, log_path, filename='agent_replay.gif'):
+        """Crea el GIF de la repetición sin cargar el registro ni los frames en memoria"""
+        print("🎬 Generando repetición de la ejecución...")
+        print(f"📜 Registro: {log_path}")
+        print(f"📁 Archivo: {filename}")
+        print(f"🖌️  Motor de render: {self.renderer}")
+
+        try:
+            stats = write_gif_stream(self.iter_states(self.replay_states(log_path)), filename,
+                                     duration=int(1000 / self.fps))
+        except Exception as e:
+            print(f"❌ Error creando GIF: {e}")
+            return None
+
+        print(f"✅ GIF creado: {filename} ({stats['bytes'] / 1e6:.2f} MB en {stats['seconds']:.1f}s)")
+        print(f"📊 {self.total_steps} pasos en {stats['frames']} frames (compresión x{self.compression:.1f}), "
+              f"{stats['bytes_per_frame'] / 1e3:.1f} KB/frame")
+        if self.raster_canvas is not None:
+            print(f"🔤 Caché de textos: {self.raster_canvas.text_cache.summary()}")
+        return stats
+
+
+def _display_size(value):
+    """'1920x1080' -> (1920, 1080)"""
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Tamaño de pantalla no válido: {value} (usa ANCHOxALTO)")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Tamaño de pantalla no válido: {value}")
+    return width, height
+
+
+def main(argv=None):
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Repetición de una ejecución del agente como GIF - Agent.exe")
+    parser.add_argument('log', help="Historial de la ejecución en JSONL (admite .jsonl.gz)")
+    parser.add_argument('-o', '--output', default='agent_replay.gif', help="GIF de salida")
+    parser.add_argument('--renderer', choices=RENDERERS, default='matplotlib',
+                        help="Motor de render de los frames")
+    parser.add_argument('--easing', choices=tuple(EASINGS), default='ease_in_out',
+                        help="Curva de aceleración del cursor entre objetivos")
+    parser.add_argument('--display', type=_display_size, default=(AI_MAX_WIDTH, AI_MAX_HEIGHT),
+                        help="Pantalla real de la ejecución, ANCHOxALTO (por defecto 1280x800)")
+    parser.add_argument('--fps', type=int, default=5, help="Frames por segundo del GIF")
+    parser.add_argument('--action-seconds', type=float, default=1.0,
+                        help="Segundos por acción visible antes de comprimir")
+    parser.add_argument('--idle-frames', type=int, default=1,
+                        help="Frames de cada racha de capturas sin cambios visibles")
+    parser.add_argument('--max-frames', type=int, default=300, help="Tope de frames del GIF")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Carpeta de la caché de escenas (por defecto $AGENT_GIF_CACHE o ~/.cache/agent_gif)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Dibujar siempre la escena fija, sin caché en disco")
+    args = parser.parse_args(argv)
+
+    try:
+        generator = ReplayGifGenerator(renderer=args.renderer, easing=args.easing, display_size=args.display,
+                                       fps=args.fps, action_seconds=args.action_seconds,
+                                       idle_frames=args.idle_frames, max_frames=args.max_frames,
+                                       scene_cache=None if args.no_cache else SceneCache(args.cache_dir))
+        generator.create_replay_gif(args.log, args.output)
+    except KeyboardInterrupt:
+        print("\n⏹️  Generación cancelada por el usuario")
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Selección de regiones de interés por saliencia con imágenes integrales
+Puntúa todas las posiciones de una ventana en O(H·W) con tablas de áreas
+sumadas y devuelve las k mejores ventanas sin solapamiento
+"""
+
+import numpy as np
+
+ROI_STRATEGIES = ('gradient', 'variance')
+
+# Pesos de luminancia ITU-R BT.601
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def luminance(image):
+    """Luminancia float32 (H, W) de una imagen RGB o en escala de grises"""
+    if image.ndim == 2:
+        return image.astype(np.float32)
+    return image[..., :3].astype(np.float32) @ LUMA_WEIGHTS
+
+
+def integral_image(values):
+    """Tabla de áreas sumadas con una fila y columna de ceros delante: (H+1, W+1)"""
+    sat = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.float64)
+    np.cumsum(values, axis=1, dtype=np.float64, out=sat[1:, 1:])
+    # Acumular fila a fila recorre la memoria en orden; cumsum(axis=0) salta
+    # de fila en fila y es más lento en imágenes grandes
+    for row in range(2, sat.shape[0]):
+        sat[row] += sat[row - 1]
+    return sat
+
+
+def window_sums(sat, size):
+    """Suma de cada ventana size x size; elemento [y, x] = ventana con esquina en (x, y)"""
+    sums = np.subtract(sat[size:, size:], sat[:-size, size:])
+    sums -= sat[size:, :-size]
+    sums += sat[:-size, :-size]
+    return sums
+
+
+def gradient_magnitude(gray):
+    """Magnitud de gradiente |gx| + |gy| con diferencias hacia delante"""
+    magnitude = np.zeros_like(gray)
+    np.abs(np.subtract(gray[:, 1:], gray[:, :-1], out=magnitude[:, :-1]), out=magnitude[:, :-1])
+    vertical = np.abs(np.subtract(gray[1:], gray[:-1]))
+    magnitude[:-1] += vertical
+    return magnitude
+
+
+def block_sums(values, step):
+    """Suma de bloques step x step (se descartan las filas y columnas sobrantes)"""
+    if step == 1:
+        return values
+    rows, cols = values.shape[0] // step, values.shape[1] // step
+    return values[:rows * step, :cols * step].reshape(rows, step, cols, step).sum(axis=(1, 3), dtype=np.float64)
+
+
+def window_scores(image, size, strategy='gradient', step=1):
+    """
+    Puntuación de las posiciones de una ventana size x size.
+    - gradient: energía de gradiente media en la ventana
+    - variance: varianza local de la luminancia, E[x²] - E[x]²
+    - step: solo se puntúan esquinas múltiplo de step, con la tabla integral
+      construida sobre bloques step x step (exacto si size es múltiplo de step)
+    Retorna un array cuyo elemento [i, j] es la ventana con esquina (j·step, i·step);
+    solo incluye esquinas cuya ventana size x size cabe entera en la imagen.
+    """
+    if strategy not in ROI_STRATEGIES:
+        raise ValueError(f"Estrategia desconocida: {strategy} (usa una de {ROI_STRATEGIES})")
+    gray = luminance(image)
+    if size > min(gray.shape):
+        raise ValueError(f"La ventana {size} no cabe en la imagen {gray.shape}")
+
+    blocks = max(1, size // step)
+    area = float((blocks * step) ** 2)
+    # Con size no múltiplo de step la tabla de bloques tiene esquinas de más cuya
+    # ventana real se saldría por el borde: se recortan
+    rows = (gray.shape[0] - size) // step + 1
+    cols = (gray.shape[1] - size) // step + 1
+    if strategy == 'gradient':
+        scores = window_sums(integral_image(block_sums(gradient_magnitude(gray), step)), blocks)[:rows, :cols]
+        scores /= area
+        return scores
+
+    mean = window_sums(integral_image(block_sums(gray, step)), blocks)[:rows, :cols]
+    mean /= area
+    np.square(gray, out=gray)
+    mean_sq = window_sums(integral_image(block_sums(gray, step)), blocks)[:rows, :cols]
+    mean_sq /= area
+    mean_sq -= np.square(mean, out=mean)
+    return np.maximum(mean_sq, 0, out=mean_sq)
+
+
+def select_top_windows(scores, size, top_k=1, step=1):
+    """
+    Elige de forma voraz las top_k ventanas de mayor puntuación que no se solapan.
+    - scores: puntuaciones de window_scores calculadas con el mismo step
+    Retorna una lista de (x, y, puntuación).
+    """
+    candidates = scores.copy()
+    windows = []
+    # Dos ventanas de lado size se solapan si sus esquinas están a menos de size en ambos ejes
+    reach = -(-size // step)
+    for _ in range(top_k):
+        flat = int(np.argmax(candidates))
+        row, col = divmod(flat, candidates.shape[1])
+        score = candidates[row, col]
+        if not np.isfinite(score):
+            break
+        windows.append((col * step, row * step, float(score)))
+        candidates[max(0, row - reach + 1):row + reach, max(0, col - reach + 1):col + reach] = -np.inf
+    return windows
+
+
+def select_salient_areas(image, area_size=50, top_k=1, strategy='gradient', step=1):
+    """Retorna las top_k áreas (start_x, start_y, end_x, end_y) más salientes sin solapamiento"""
+    scores = window_scores(image, area_size, strategy, step)
+    return [(x, y, x + area_size, y + area_size)
+            for x, y, _ in select_top_windows(scores, area_size, top_k, step)]
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+Configuración común de las pruebas de scripts/python_tools
+Los scripts se importan entre sí por nombre (from pd import ...), así que su
+carpeta se añade al path; matplotlib usa el backend sin ventana.
+"""
+
+import os
+import sys
+
+os.environ.setdefault('MPLBACKEND', 'Agg')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la caché persistente de escenas"""
+
+import os
+
+import numpy as np
+
+from cache_escenas import SceneCache, scene_key
+from raster_escena import RasterCanvas
+
+
+def _layer(value, shape=(20, 30, 3)):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_get_or_build_builds_once_and_maps_the_stored_layer(tmp_path):
+    cache = SceneCache(str(tmp_path))
+    calls = []
+
+    def build():
+        calls.append(1)
+        return _layer(7)
+
+    first = cache.get_or_build({'scene': 'a', 'size': (30, 20)}, build)
+    second = SceneCache(str(tmp_path)).get_or_build({'size': (30, 20), 'scene': 'a'}, build)
+    assert len(calls) == 1
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+    assert np.array_equal(first, second)
+    assert scene_key({'scene': 'a'}) != scene_key({'scene': 'b'})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SceneCache(str(tmp_path), max_bytes=10 ** 9)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.store(key, _layer(i))
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    # 'a' se usa después de las demás: la menos usada pasa a ser 'b'
+    cache.load('a')
+
+    cache.max_bytes = 2 * os.path.getsize(cache.path('a'))
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == ['a.npy', 'c.npy']
+
+    cache.max_bytes = 0
+    cache.store('d', _layer(3))
+    assert os.listdir(tmp_path) == ['d.npy']
+
+
+def test_corrupt_entries_are_rebuilt(tmp_path):
+    cache = SceneCache(str(tmp_path))
+    key = scene_key({'scene': 'rota'})
+    with open(cache.path(key), 'wb') as f:
+        f.write(b'no es un npy')
+    layer = cache.get_or_build({'scene': 'rota'}, lambda: _layer(9))
+    assert np.array_equal(layer, _layer(9))
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert np.array_equal(cache.load(key), _layer(9))
+
+
+def test_cached_static_layer_matches_drawing_it(tmp_path):
+    def draw(canvas):
+        canvas.add_static_text(100, 700, 'Documentos', fontsize=12, color='white')
+        canvas.add_axes_border()
+
+    def canvas():
+        return RasterCanvas((1280, 800), (320, 200), (10, 10, 300, 180), axes_color='#2b2b2b')
+
+    drawn = canvas().build_static(draw)
+    cache = SceneCache(str(tmp_path))
+    canvas().build_static(draw, cache, scene='prueba')
+    cached = canvas().build_static(lambda c: None, cache, scene='prueba')
+    assert cache.hits == 1
+    assert np.array_equal(cached, drawn)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del compositor de comparaciones sin matplotlib"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+from comparacion_rapida import MARGIN, render_comparison
+
+
+def _find_panel(canvas, panel):
+    """Posición (y, x) donde aparece panel copiado tal cual en el lienzo"""
+    h, w = panel.shape[:2]
+    matches = np.argwhere(np.all(canvas == panel[0, 0], axis=2))
+    for y, x in matches:
+        if np.array_equal(canvas[y:y + h, x:x + w], panel):
+            return int(y), int(x)
+    return None
+
+
+def test_render_comparison_copies_panels_exactly():
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (40, 60, 3), dtype=np.uint8) for _ in range(3)]
+    buffer = io.BytesIO()
+    result = render_comparison(images, caption='Área modificada: 10x10 píxeles', zoom_area=(5, 5, 15, 15),
+                               output=buffer)
+
+    canvas = np.asarray(result)
+    positions = [_find_panel(canvas, img) for img in images]
+    assert None not in positions
+    assert [x for _, x in positions] == [MARGIN + i * (60 + MARGIN) for i in range(3)]
+    # El recorte ampliado es la región repetida por vecino más cercano
+    zoom = min(8, 60 // 10)
+    crop = np.repeat(np.repeat(images[1][5:15, 5:15], zoom, axis=0), zoom, axis=1)
+    assert _find_panel(canvas, crop) is not None
+
+    buffer.seek(0)
+    assert np.array_equal(np.asarray(Image.open(buffer)), canvas)
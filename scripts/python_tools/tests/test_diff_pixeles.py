@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del formato de diferencias dispersas"""
+
+import numpy as np
+import pytest
+
+from diff_pixeles import PixelDiff
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    modified = base.copy()
+    mask = rng.random(base.shape) < 0.2
+    modified[mask] = np.clip(base[mask].astype(np.int16) + rng.integers(-40, 41, mask.sum()), 0, 255)
+    return base, modified
+
+
+def test_apply_and_revert_round_trip(images):
+    base, modified = images
+    diff = PixelDiff.from_images(base, modified)
+    assert len(diff) == np.count_nonzero(base != modified)
+
+    image = base.copy()
+    assert diff.apply(image) is image
+    assert np.array_equal(image, modified)
+    assert np.array_equal(diff.revert(image), base)
+
+
+@pytest.mark.parametrize('layout', ['rgba_view', 'fortran'])
+def test_apply_writes_through_non_contiguous_images(images, layout):
+    base, modified = images
+    diff = PixelDiff.from_images(base, modified)
+    if layout == 'rgba_view':
+        storage = np.dstack([base, np.full(base.shape[:2], 255, np.uint8)])
+        image = storage[..., :3]
+    else:
+        storage = image = np.asfortranarray(base)
+
+    diff.apply(image)
+    assert np.array_equal(image, modified)
+    diff.revert(image)
+    assert np.array_equal(image, base)
+    if layout == 'rgba_view':
+        assert np.all(storage[..., 3] == 255)
+
+
+def test_save_many_round_trip(images, tmp_path):
+    base, modified = images
+    diffs = [PixelDiff.from_images(base, modified),
+             PixelDiff.from_patch(base, (5, 5, 10, 8), modified[5:8, 5:10])]
+    path = tmp_path / 'diffs.npz'
+    PixelDiff.save_many(path, diffs)
+    for original, loaded in zip(diffs, PixelDiff.load_many(path)):
+        assert loaded.shape == original.shape
+        assert np.array_equal(loaded.applied_to(base), original.applied_to(base))
+
+
+def test_expanded_moves_region_diff_to_full_image(images):
+    base, modified = images
+    region = PixelDiff.from_images(base[4:12, 6:20], modified[4:12, 6:20])
+    full = region.expanded(base.shape, (6, 4))
+    expected = base.copy()
+    expected[4:12, 6:20] = modified[4:12, 6:20]
+    assert np.array_equal(full.applied_to(base), expected)
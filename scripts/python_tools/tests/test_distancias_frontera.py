@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del oráculo de distancia a la frontera de decisión"""
+
+import numpy as np
+import pytest
+
+from distancias_frontera import ModeloSoftmaxLocal, OraculoDistancias
+
+
+def _modelo_umbral(umbral):
+    """Clase 1 mientras x0 > -umbral: la frontera a lo largo de -e0 está a distancia umbral"""
+    return ModeloSoftmaxLocal(np.array([[0.0, 1.0], [0.0, 0.0]]), np.array([0.0, umbral]))
+
+
+@pytest.mark.parametrize('umbral', [0.3, 1.0, 800.0, 999.9])
+def test_distancia_hasta_distancia_max(umbral):
+    oraculo = OraculoDistancias(_modelo_umbral(umbral), tolerancia=1e-4)
+    distancias = oraculo.distancias(np.zeros(2), np.array([[-1.0, 0.0], [1.0, 0.0]]))
+    assert distancias[0] == pytest.approx(umbral, abs=1e-4)
+    assert distancias[0] >= umbral
+    assert distancias[1] == np.inf
+
+
+def test_sin_frontera_antes_del_maximo():
+    oraculo = OraculoDistancias(_modelo_umbral(1000.5))
+    assert oraculo.distancias(np.zeros(2), np.array([[-1.0, 0.0]]))[0] == np.inf
+
+
+def test_cache_por_contenido_de_la_direccion():
+    rng = np.random.default_rng(0)
+    modelo = ModeloSoftmaxLocal(rng.normal(size=(6, 3)))
+    x = rng.normal(size=6)
+    banco_a, banco_b = rng.normal(size=(5, 6)), rng.normal(size=(5, 6))
+
+    oraculo = OraculoDistancias(modelo)
+    primera = oraculo.distancias(x, banco_a)
+    # Otro banco con el mismo x no debe reutilizar las distancias del primero
+    assert np.array_equal(oraculo.distancias(x, banco_b), OraculoDistancias(modelo).distancias(x, banco_b))
+    llamadas = oraculo.llamadas_clasificador
+    assert np.array_equal(oraculo.distancias(x, banco_a[::-1]), primera[::-1])
+    assert oraculo.llamadas_clasificador == llamadas
+
+
+def test_tramos_de_tam_lote_no_cambian_el_resultado():
+    rng = np.random.default_rng(1)
+    modelo = ModeloSoftmaxLocal(rng.normal(size=(8, 4)))
+    x, U = rng.normal(size=8), rng.normal(size=(50, 8)).astype(np.float32)
+    assert np.array_equal(OraculoDistancias(modelo, tam_lote=7).distancias(x, U),
+                          OraculoDistancias(modelo, tam_lote=1000).distancias(x, U))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la escritura de GIF en streaming"""
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from flujo_gif import GifStreamWriter, write_gif_stream
+
+
+def _frames(count, size=(48, 64)):
+    """Fondo fijo con un cuadrado que se desplaza y colores de una paleta pequeña"""
+    background = np.zeros(size + (3,), dtype=np.uint8)
+    background[:, :, 2] = 120
+    for i in range(count):
+        frame = background.copy()
+        frame[10:20, 4 * i:4 * i + 10] = (250, 200, 0)
+        yield frame
+
+
+def _decoded(path):
+    with Image.open(path) as gif:
+        frames = [np.asarray(frame.convert('RGB')) for frame in ImageSequence.Iterator(gif)]
+        durations = [frame.info['duration'] for frame in ImageSequence.Iterator(gif)]
+    return frames, durations
+
+
+@pytest.mark.parametrize('optimize', [True, False])
+def test_stream_round_trip(tmp_path, optimize):
+    path = str(tmp_path / 'demo.gif')
+    expected = [frame.copy() for frame in _frames(6)]
+    seen = []
+    stats = write_gif_stream(_frames(6), path, duration=80, window=2, progress=seen.append, optimize=optimize)
+
+    frames, durations = _decoded(path)
+    assert stats['frames'] == 6 and seen == list(range(1, 7))
+    assert stats['bytes'] == os.path.getsize(path)
+    assert durations == [80] * 6
+    for frame, original in zip(frames, expected):
+        assert np.array_equal(frame, original)
+
+
+def test_repeated_frames_are_merged_into_longer_durations(tmp_path):
+    path = str(tmp_path / 'repetidos.gif')
+    frames = list(_frames(3))
+    sequence = [frames[0], frames[0], frames[0], frames[1], frames[2], frames[2]]
+    stats = write_gif_stream(sequence, path, duration=50)
+
+    decoded, durations = _decoded(path)
+    assert stats['dropped_frames'] == 3 and stats['written_frames'] == 3
+    assert durations == [150, 50, 100]
+    for frame, original in zip(decoded, frames):
+        assert np.array_equal(frame, original)
+    assert stats['palettes'] == 1
+
+
+def test_optimized_stream_is_smaller(tmp_path):
+    sizes = [write_gif_stream(_frames(12), str(tmp_path / f'{optimize}.gif'), optimize=optimize)['bytes']
+             for optimize in (True, False)]
+    assert sizes[0] < sizes[1]
+
+
+def test_failed_producer_leaves_the_destination_untouched(tmp_path):
+    path = tmp_path / 'demo.gif'
+    path.write_bytes(b'anterior')
+
+    def failing():
+        yield from _frames(2)
+        raise RuntimeError('fallo del renderizador')
+
+    with pytest.raises(RuntimeError):
+        write_gif_stream(failing(), str(path))
+    assert path.read_bytes() == b'anterior'
+    assert os.listdir(tmp_path) == ['demo.gif']
+
+
+def test_writer_rejects_frames_of_another_size(tmp_path):
+    path = tmp_path / 'demo.gif'
+    with pytest.raises(ValueError):
+        with GifStreamWriter(str(path), (64, 48)) as writer:
+            writer.write(next(_frames(1)))
+            writer.write(np.zeros((10, 10, 3), dtype=np.uint8))
+    assert not path.exists() and os.listdir(tmp_path) == []
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del generador de GIF del agente"""
+
+import numpy as np
+import pytest
+
+from generar_gif_agente import AgentGifGenerator
+
+
+@pytest.mark.parametrize('renderer', ['matplotlib', 'raster'])
+def test_frames_do_not_depend_on_the_previous_ones(renderer):
+    generator = AgentGifGenerator(renderer=renderer, seed=3)
+    generator.plan(12, fps=4)
+    in_order = [frame.copy() for frame in generator.iter_frames()]
+    # Con blitting cada frame se dibuja sobre el fondo restaurado: no quedan restos del anterior
+    alone = [next(generator.iter_frames([i])).copy() for i in (0, 7, 11)]
+
+    assert in_order[0].shape == (800, 1200, 3)
+    for i, frame in zip((0, 7, 11), alone):
+        assert np.array_equal(frame, in_order[i])
+    assert not np.array_equal(in_order[0], in_order[7])
+
+
+def test_iter_frames_requires_a_plan():
+    with pytest.raises(ValueError):
+        next(AgentGifGenerator(renderer='raster').iter_frames())
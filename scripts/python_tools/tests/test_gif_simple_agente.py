@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del visualizador simple del agente"""
+
+from datetime import datetime
+
+from gif_simple_agente import SimpleAgentVisualizer
+
+START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _render(folder, monkeypatch, workers):
+    folder.mkdir()
+    monkeypatch.chdir(folder)
+    SimpleAgentVisualizer(renderer='raster').create_static_demo_frames(3, workers=workers, seed=7, start_time=START)
+    return [(folder / 'agent_frames' / f'frame_{i:03d}.png').read_bytes() for i in range(3)]
+
+
+def test_frames_are_identical_with_any_number_of_workers(tmp_path, monkeypatch):
+    serial = _render(tmp_path / 'serie', monkeypatch, workers=1)
+    parallel = _render(tmp_path / 'paralelo', monkeypatch, workers=2)
+    assert serial == parallel
+    assert len(set(serial)) == 3
+
+
+def test_frame_spec_depends_only_on_index_and_seed():
+    visualizer = SimpleAgentVisualizer(renderer='raster')
+    entropy = 1234
+    forward = [visualizer.frame_spec(i, entropy, START) for i in range(5)]
+    backward = [visualizer.frame_spec(i, entropy, START) for i in reversed(range(5))][::-1]
+    assert forward == backward
+    assert forward != [visualizer.frame_spec(i, entropy + 1, START) for i in range(5)]
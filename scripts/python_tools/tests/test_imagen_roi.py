@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la lectura y escritura de regiones de interés"""
+
+import numpy as np
+import pytest
+from PIL import Image, TiffImagePlugin
+
+from imagen_roi import RoiImageSource
+
+BOX = (10, 100, 60, 130)
+
+
+@pytest.fixture
+def pixels():
+    return np.random.default_rng(0).integers(0, 256, (300, 200, 3), dtype=np.uint8)
+
+
+def _save(path, pixels, **params):
+    Image.fromarray(pixels).save(path, **params)
+    return str(path)
+
+
+def _multi_strip_tiff(path, pixels, monkeypatch):
+    """TIFF sin comprimir escrito por libtiff, que lo parte en varias tiras"""
+    monkeypatch.setattr(TiffImagePlugin, 'WRITE_LIBTIFF', True)
+    _save(path, pixels, compression='raw')
+    with Image.open(path) as img:
+        assert len(img.tile) > 1
+    return str(path)
+
+
+@pytest.mark.parametrize('name', ['imagen.bmp', 'imagen.ppm', 'imagen.tif', 'imagen.npy', 'tiras.tif'])
+def test_uncompressed_region_is_memory_mapped(tmp_path, pixels, name, monkeypatch):
+    if name == 'imagen.npy':
+        np.save(tmp_path / name, pixels)
+        path = str(tmp_path / name)
+    elif name == 'tiras.tif':
+        path = _multi_strip_tiff(tmp_path / name, pixels, monkeypatch)
+    else:
+        path = _save(tmp_path / name, pixels)
+
+    source = RoiImageSource(path)
+    assert source.memory_mapped
+    start_x, start_y, end_x, end_y = BOX
+    assert np.array_equal(source.read_region(BOX), pixels[start_y:end_y, start_x:end_x])
+
+    patch = np.zeros((end_y - start_y, end_x - start_x, 3), dtype=np.uint8)
+    output = str(tmp_path / ('salida' + path[path.rindex('.'):]))
+    source.write_region(BOX, patch, output)
+    expected = pixels.copy()
+    expected[start_y:end_y, start_x:end_x] = 0
+    written = np.load(output) if output.endswith('.npy') else np.asarray(Image.open(output).convert('RGB'))
+    assert np.array_equal(written, expected)
+
+
+def test_compressed_region_goes_through_pil(tmp_path, pixels):
+    source = RoiImageSource(_save(tmp_path / 'imagen.png', pixels))
+    assert not source.memory_mapped
+    assert np.array_equal(source.read_region(BOX), pixels[100:130, 10:60])
+
+
+def test_palette_image_keeps_its_own_palette(tmp_path, pixels):
+    palette_image = Image.fromarray(pixels).quantize(16)
+    path = str(tmp_path / 'paleta.png')
+    palette_image.save(path)
+    rgb = np.asarray(palette_image.convert('RGB'))
+
+    # Un parche con colores de la propia paleta debe quedar tal cual
+    patch = rgb[0:30, 0:50].copy()
+    output = str(tmp_path / 'salida.png')
+    RoiImageSource(path).write_region(BOX, patch, output)
+    with Image.open(output) as written:
+        assert written.mode == 'P'
+        assert written.getpalette() == palette_image.getpalette()
+        written_rgb = np.asarray(written.convert('RGB'))
+    assert np.array_equal(written_rgb[100:130, 10:60], patch)
+    untouched = np.ones(rgb.shape[:2], dtype=bool)
+    untouched[100:130, 10:60] = False
+    assert np.array_equal(written_rgb[untouched], rgb[untouched])
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de las métricas de calidad de una perturbación"""
+
+import json
+
+import numpy as np
+
+from diff_pixeles import PixelDiff
+from metricas_pixeles import SSIM_C1, SSIM_C2, compute_metrics, windowed_ssim
+
+
+def _brute_force_ssim(original, modified, window):
+    h, w, channels = original.shape
+    values = []
+    for c in range(channels):
+        for y in range(h - window + 1):
+            for x in range(w - window + 1):
+                a = original[y:y + window, x:x + window, c].astype(np.float64)
+                b = modified[y:y + window, x:x + window, c].astype(np.float64)
+                cov = ((a - a.mean()) * (b - b.mean())).mean()
+                values.append(((2 * a.mean() * b.mean() + SSIM_C1) * (2 * cov + SSIM_C2))
+                              / ((a.mean() ** 2 + b.mean() ** 2 + SSIM_C1) * (a.var() + b.var() + SSIM_C2)))
+    return float(np.mean(values))
+
+
+def _perturbed(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    original = rng.integers(0, 256, shape, dtype=np.uint8)
+    modified = original.copy()
+    modified[5:9, 6:10] = np.clip(modified[5:9, 6:10].astype(np.int16) + 40, 0, 255)
+    return original, modified
+
+
+def test_windowed_ssim_matches_brute_force():
+    original, modified = _perturbed((20, 24, 3))
+    diff = PixelDiff.from_images(original, modified)
+    assert np.isclose(windowed_ssim(original, diff, 7), _brute_force_ssim(original, modified, 7))
+
+
+def test_ssim_falls_back_to_global_on_images_smaller_than_the_window():
+    original, modified = _perturbed((12, 12, 3))
+    small_original, small_modified = original[3:9, 4:10], modified[3:9, 4:10]
+    ssim = windowed_ssim(small_original, PixelDiff.from_images(small_original, small_modified), 7)
+    assert np.isclose(ssim, _brute_force_ssim(small_original, small_modified, 6))
+    assert ssim < 1.0
+
+
+def test_identical_images_give_strict_json():
+    original, _ = _perturbed((16, 16, 3))
+    metrics = compute_metrics(original, modified=original.copy())
+    assert metrics['psnr'] is None
+    assert metrics['ssim'] == 1.0
+    assert metrics['l0_values'] == 0 and metrics['linf'] == 0
+    json.dumps(metrics, allow_nan=False)
+
+
+def test_metrics_report_norms_and_collisions():
+    original, modified = _perturbed((20, 24, 3))
+    pixels = np.array([(6, 5, 40), (6, 5, 10), (7, 5, -3)],
+                      dtype=[('x', np.int32), ('y', np.int32), ('change', np.int16)])
+    metrics = compute_metrics(original, modified=modified, modified_pixels=pixels)
+    deltas = modified.astype(np.int64) - original
+    assert metrics['l0_values'] == np.count_nonzero(deltas)
+    assert np.isclose(metrics['l2'], np.sqrt((deltas ** 2).sum()))
+    assert np.isclose(metrics['psnr'], 10 * np.log10(255 ** 2 / (deltas ** 2).mean()))
+    assert metrics['collisions'] == 1 and metrics['repeated_hits'] == 1
+    assert metrics['negative_changes'] == 1
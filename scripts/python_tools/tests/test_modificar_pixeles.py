@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del modificador de píxeles"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from modificar_pixeles import PixelModifier
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    rng = np.random.default_rng(0)
+    path = tmp_path / 'imagen.png'
+    Image.fromarray(rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def _loaded(path, seed=0, lazy=False):
+    modifier = PixelModifier(path, seed=seed)
+    assert modifier.load_image(lazy=lazy)
+    return modifier
+
+
+def _expected(original, pixels):
+    """Suma uno a uno los cambios sorteados y satura al final, como el bucle original"""
+    changes = np.zeros(original.shape[:2], dtype=np.int64)
+    for pixel in pixels:
+        changes[pixel['y'], pixel['x']] += pixel['change']
+    return np.clip(original.astype(np.int64) + changes[..., None], 0, 255).astype(np.uint8)
+
+
+def test_modify_pixels_randomly_saturates_accumulated_changes(image_path):
+    modifier = _loaded(image_path, seed=3)
+    area = (40, 30, 90, 80)
+    assert modifier.modify_pixels_randomly(area, modification_percentage=60, intensity_range=(100, 200))
+
+    assert len(modifier.modified_pixels) == int(50 * 50 * 0.6)
+    assert np.array_equal(modifier.modified_image, _expected(modifier.original_image, modifier.modified_pixels))
+    outside = np.ones(modifier.original_image.shape[:2], dtype=bool)
+    outside[30:80, 40:90] = False
+    assert np.array_equal(modifier.modified_image[outside], modifier.original_image[outside])
+
+    again = _loaded(image_path, seed=3)
+    again.modify_pixels_randomly(area, modification_percentage=60, intensity_range=(100, 200))
+    assert np.array_equal(again.modified_image, modifier.modified_image)
+
+
+def test_generate_variants_modes_agree(image_path):
+    area = (10, 20, 60, 70)
+    variants, pixels = _loaded(image_path, seed=5).generate_variants(4, area, 20)
+    lazy, _ = _loaded(image_path, seed=5).generate_variants(4, area, 20, lazy=True)
+    diffs, _ = _loaded(image_path, seed=5).generate_variants(4, area, 20, as_diffs=True)
+
+    original = np.asarray(Image.open(image_path))
+    assert variants.shape == (4,) + original.shape
+    for variant, lazy_variant, diff, variant_pixels in zip(variants, lazy, diffs, pixels):
+        assert np.array_equal(variant, _expected(original, variant_pixels))
+        assert np.array_equal(lazy_variant, variant)
+        assert np.array_equal(diff.applied_to(original), variant)
+
+
+def test_generate_variants_in_region_mode_uses_region_coordinates(image_path):
+    full, _ = _loaded(image_path, seed=2).generate_variants(2)
+    region, pixels = _loaded(image_path, seed=2, lazy=True).generate_variants(2)
+    # Área central de 50x50 de la imagen 160x120
+    assert region.shape == (2, 50, 50, 3)
+    assert pixels['x'].max() < 50 and pixels['y'].max() < 50
+    assert np.array_equal(region, full[:, 35:85, 55:105])
+
+
+def _write_images(folder, names, shape=(120, 160, 3)):
+    rng = np.random.default_rng(1)
+    folder.mkdir(exist_ok=True)
+    for name, size in names:
+        Image.fromarray(rng.integers(0, 256, size or shape, dtype=np.uint8)).save(folder / name)
+
+
+def test_run_batch_reports_failures_and_keeps_going(tmp_path):
+    import json
+
+    from modificar_pixeles import run_batch
+
+    _write_images(tmp_path / 'in', [('small.png', (30, 30, 3)), ('big.png', None)])
+    summary = run_batch([str(tmp_path / 'in' / '*.png')], str(tmp_path / 'out' / '{stem}.png'),
+                        workers=1, roi='gradient')
+    assert summary['images'] == 1
+    assert summary['failed'] == 1
+    with open(tmp_path / 'out' / 'big.json', encoding='utf-8') as f:
+        stats = json.load(f)
+    assert stats['modified_pixels'] == int(50 * 50 * 0.3)
+    assert (tmp_path / 'out' / 'big.npz').exists()
+
+
+def test_run_batch_refuses_colliding_outputs(tmp_path):
+    from modificar_pixeles import run_batch
+
+    _write_images(tmp_path / 'in', [('a.png', None), ('a.bmp', None)])
+    pattern = str(tmp_path / 'in' / 'a.*')
+    assert run_batch([pattern], str(tmp_path / 'out' / '{stem}.png'), workers=1) is None
+    assert not (tmp_path / 'out').exists()
+    summary = run_batch([pattern], str(tmp_path / 'out' / '{stem}{ext}.png'), workers=1)
+    assert summary['images'] == 2
+
+
+def test_modify_tiles_is_independent_of_selection_and_workers(image_path):
+    full = _loaded(image_path, seed=4)
+    report = full.modify_tiles(tile_size=50, modification_percentage=40, intensity_range=(5, 30), workers=3)
+    # Imagen 160x120: 4 columnas por 3 filas, las del borde más pequeñas
+    assert report['tiles'] == 12
+    assert np.array_equal(full.modified_image, _expected(full.original_image, full.modified_pixels))
+    assert np.array_equal(full.diff.applied_to(full.original_image), full.modified_image)
+
+    single = _loaded(image_path, seed=4)
+    single.modify_tiles(tile_size=50, modification_percentage=40, intensity_range=(5, 30),
+                        tiles=[(1, 2)], workers=1)
+    assert np.array_equal(single.modified_image[50:100, 100:150], full.modified_image[50:100, 100:150])
+    assert np.array_equal(single.modified_image[:50], single.original_image[:50])
+    assert single.area_coords == (100, 50, 150, 100)
+    assert single._comparison_caption().startswith('Teselas modificadas: 1 de 50x50 píxeles')
+
+    with pytest.raises(ValueError):
+        single.modify_tiles(tiles=[])
+    with pytest.raises(ValueError):
+        single.modify_tiles(tiles=[(9, 9)])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del cálculo matricial de la amenaza PD"""
+
+import numpy as np
+
+from pd import calcular_amenaza_pd, calcular_amenaza_pd_lote
+
+
+def _banco(semilla=0, B=5, N=300, D=16):
+    rng = np.random.default_rng(semilla)
+    U = rng.normal(size=(N, D))
+    U /= np.linalg.norm(U, axis=1, keepdims=True)
+    return rng.normal(size=(B, D)), U, rng.uniform(0.5, 2.0, N)
+
+
+def _amenaza_directa(delta, U, g):
+    """Definición de la amenaza con un bucle: max_i <δ, u_i> / g_i"""
+    amenazas = [np.dot(delta, u) / d for u, d in zip(U, g)]
+    return max(amenazas), int(np.argmax(amenazas))
+
+
+def test_lote_por_bloques_coincide_con_la_definicion():
+    deltas, U, g = _banco()
+    valores, indices = calcular_amenaza_pd_lote(deltas, U, g, tam_bloque=37, dtype=np.float64)
+    for delta, valor, indice in zip(deltas, valores, indices):
+        esperado, indice_esperado = _amenaza_directa(delta, U, g)
+        assert indice == indice_esperado
+        assert np.isclose(valor, esperado)
+
+
+def test_top_k_ordenado_y_encabezado_por_el_maximo():
+    deltas, U, g = _banco(1)
+    valores, indices, top_valores, top_indices = calcular_amenaza_pd_lote(deltas, U, g, top_k=4, tam_bloque=50,
+                                                                          dtype=np.float64)
+    amenazas = deltas @ U.T / g
+    assert top_valores.shape == (5, 4)
+    assert np.all(np.diff(top_valores, axis=1) <= 0)
+    assert np.array_equal(top_indices[:, 0], indices)
+    assert np.allclose(np.sort(amenazas, axis=1)[:, ::-1][:, :4], top_valores)
+
+
+def test_amenaza_de_una_perturbacion():
+    deltas, U, g = _banco(2, B=1)
+    assert np.isclose(calcular_amenaza_pd(deltas[0], list(U), list(g)), _amenaza_directa(deltas[0], U, g)[0])
+
+
+def test_streaming_sobre_fragmentos_coincide_con_el_lote(tmp_path):
+    from pd import calcular_amenaza_pd_streaming, guardar_banco_direcciones
+
+    deltas, U, g = _banco(3)
+    guardar_banco_direcciones(str(tmp_path), U.astype(np.float32), g, filas_por_fragmento=70)
+    valores, indices, estadisticas = calcular_amenaza_pd_streaming(deltas, str(tmp_path), tam_bloque=16)
+    esperados, indices_esperados = calcular_amenaza_pd_lote(deltas, U.astype(np.float32), g, tam_bloque=16)
+    assert estadisticas['direcciones'] == U.shape[0]
+    assert np.array_equal(indices, indices_esperados)
+    assert np.allclose(valores, esperados, rtol=1e-5)
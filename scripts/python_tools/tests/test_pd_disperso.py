@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la amenaza PD dispersa e incremental"""
+
+import numpy as np
+
+from pd_disperso import AmenazaPDIncremental, calcular_amenaza_pd_dispersa, perturbacion_desde_imagenes
+
+
+def _banco(N=200, D=48):
+    rng = np.random.default_rng(0)
+    return rng, rng.normal(size=(N, D)), rng.uniform(0.5, 2.0, N)
+
+
+def test_dispersa_igual_a_la_densa_con_indices_repetidos():
+    rng, U, g = _banco()
+    indices = np.array([3, 7, 3, 40])
+    valores = np.array([0.5, -1.0, 0.25, 2.0])
+    delta = np.zeros(U.shape[1])
+    np.add.at(delta, indices, valores)
+    amenazas = U @ delta / g
+
+    valor, indice = calcular_amenaza_pd_dispersa(indices, valores, U, g)
+    assert indice == np.argmax(amenazas)
+    assert np.isclose(valor, amenazas.max())
+
+
+def test_incrementos_acumulados_igual_a_recalcular():
+    rng, U, g = _banco()
+    amenaza = AmenazaPDIncremental(U, g)
+    for _ in range(20):
+        indices = rng.integers(0, U.shape[1], 3)
+        propuesta = amenaza.probar_incrementos(indices, rng.normal(size=3))
+        amenaza.aplicar_incrementos(indices, rng.normal(size=3))
+        assert np.isfinite(propuesta[0])
+    amenaza.fijar_valores([0, 1], [0.0, 1.5])
+
+    amenazas = U @ amenaza.perturbacion / g
+    assert amenaza.amenaza()[1] == np.argmax(amenazas)
+    assert np.isclose(amenaza.amenaza()[0], amenazas.max())
+    antes = amenaza.proyecciones.copy()
+    amenaza.recalcular()
+    assert np.allclose(antes, amenaza.proyecciones)
+
+
+def test_perturbacion_desde_imagenes_solo_en_las_coordenadas():
+    original = np.zeros((4, 5, 3), dtype=np.uint8)
+    modificada = original.copy()
+    modificada[1, 2] = [10, 0, 3]
+    modificada[3, 4, 1] = 7
+    indices, valores = perturbacion_desde_imagenes(original, modificada, coordenadas=[(2, 1)])
+    assert indices.tolist() == [(1 * 5 + 2) * 3, (1 * 5 + 2) * 3 + 2]
+    assert valores.tolist() == [10, 3]
+    assert perturbacion_desde_imagenes(original, modificada)[0].size == 3
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del índice de poda de la amenaza PD"""
+
+import numpy as np
+
+from pd import guardar_banco_direcciones
+from pd_indice import BancoFragmentado, IndiceAmenazaPD
+
+
+def _banco(N=2000, D=32):
+    rng = np.random.default_rng(0)
+    U = rng.normal(size=(N, D)).astype(np.float32)
+    return U, rng.uniform(0.5, 2.0, N), rng.normal(size=(6, D))
+
+
+def test_consulta_coincide_con_la_busqueda_exhaustiva():
+    U, g, deltas = _banco()
+    indice = IndiceAmenazaPD.construir(U, g, num_clusters=16)
+    valores, indices, podadas = indice.consultar(deltas)
+    amenazas = deltas @ U.astype(np.float64).T / g
+    assert np.array_equal(indices, np.argmax(amenazas, axis=1))
+    assert np.allclose(valores, amenazas.max(axis=1))
+    assert np.all((podadas >= 0) & (podadas < U.shape[0]))
+
+
+def test_cargar_banco_fragmentado_sin_juntarlo_en_memoria(tmp_path):
+    U, g, deltas = _banco()
+    guardar_banco_direcciones(str(tmp_path), U, g, filas_por_fragmento=600)
+    original = IndiceAmenazaPD.construir(U, g, num_clusters=16)
+    original.guardar(str(tmp_path))
+
+    cargado = IndiceAmenazaPD.cargar(str(tmp_path))
+    assert isinstance(cargado.direcciones, BancoFragmentado)
+    assert all(isinstance(fragmento, np.memmap) for fragmento in cargado.direcciones.fragmentos)
+    for esperado, obtenido in zip(original.consultar(deltas), cargado.consultar(deltas)):
+        assert np.array_equal(esperado, obtenido)
+
+
+def test_banco_fragmentado_lee_filas_en_el_orden_pedido():
+    U, _, _ = _banco(N=50, D=3)
+    banco = BancoFragmentado([U[:20], U[20:21], U[21:]])
+    filas = np.array([49, 0, 20, 21, 19, 20])
+    assert banco.shape == U.shape
+    assert np.array_equal(banco[filas], U[filas])
+    assert np.array_equal(banco[5:45:7], U[5:45:7])
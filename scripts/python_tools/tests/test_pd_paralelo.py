@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del cálculo de la amenaza PD con varios procesos"""
+
+import numpy as np
+
+from pd import calcular_amenaza_pd_lote
+from pd_paralelo import BancoDireccionesCompartido
+
+
+def test_un_proceso_y_varios_dan_el_mismo_resultado_bit_a_bit():
+    rng = np.random.default_rng(0)
+    U = rng.normal(size=(500, 40)).astype(np.float32)
+    g = rng.uniform(0.5, 2.0, 500)
+    deltas = rng.normal(size=(37, 40)).astype(np.float32)
+
+    with BancoDireccionesCompartido(U, g, tam_bloque=128) as banco:
+        secuencial = banco.calcular(deltas, num_procesos=1, tam_fragmento=8, top_k=3)
+        paralelo = banco.calcular(deltas, num_procesos=2, tam_fragmento=8, top_k=3)
+    for a, b in zip(secuencial, paralelo):
+        assert np.array_equal(a, b)
+
+    valores, indices = calcular_amenaza_pd_lote(deltas, U, g, tam_bloque=128)
+    assert np.array_equal(secuencial[1], indices)
+    assert np.allclose(secuencial[0], valores, rtol=1e-5)
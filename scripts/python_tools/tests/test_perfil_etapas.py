@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del perfilado por etapas"""
+
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from perfil_etapas import StageProfiler, load_trace, print_summary, summarize, write_trace
+
+
+def test_nested_stages_and_decorator():
+    profiler = StageProfiler(metadata={'image': 'a.png'})
+
+    @profiler.timed()
+    def build(n):
+        """Construye un array"""
+        return np.ones(n)
+
+    with profiler.stage('total', size=3):
+        assert build(3).sum() == 3
+    assert build.__name__ == 'build' and build.__doc__ == 'Construye un array'
+    assert build.__wrapped__(2).sum() == 2
+
+    inner, outer = profiler.records
+    assert (inner['stage'], inner['depth']) == ('build', 1)
+    assert (outer['stage'], outer['depth'], outer['args']) == ('total', 0, {'size': 3})
+    assert outer['image'] == 'a.png'
+    assert outer['wall_seconds'] >= inner['wall_seconds']
+    assert 'peak_bytes' not in outer
+
+
+def test_memory_tracing_is_opt_in():
+    was_tracing = tracemalloc.is_tracing()
+    StageProfiler()
+    assert tracemalloc.is_tracing() == was_tracing
+
+    profiler = StageProfiler(trace_memory=True)
+    try:
+        with profiler.stage('outer'):
+            with profiler.stage('inner'):
+                block = np.ones(1_000_000)
+            del block
+    finally:
+        profiler.close()
+    inner, outer = profiler.records
+    assert inner['peak_bytes'] >= 8_000_000
+    assert outer['peak_bytes'] >= inner['peak_bytes']
+    assert tracemalloc.is_tracing() == was_tracing
+
+
+@pytest.mark.parametrize('name', ['traza.jsonl', 'traza.json'])
+def test_trace_round_trip(tmp_path, name):
+    records = [{'stage': 'load', 'start': 10.0 + i, 'wall_seconds': 0.001 * (i + 1), 'cpu_seconds': 0.001,
+                'depth': 0, 'pid': 1, 'tid': 2} for i in range(4)]
+    loaded = load_trace(write_trace(str(tmp_path / name), records))
+    assert [r['stage'] for r in loaded] == ['load'] * 4
+    assert np.allclose([r['wall_seconds'] for r in loaded], [r['wall_seconds'] for r in records])
+    assert np.allclose([r['cpu_seconds'] for r in loaded], 0.001)
+
+
+def test_print_summary_uses_the_requested_percentiles(capsys):
+    records = [{'stage': 'encode', 'wall_seconds': s, 'cpu_seconds': s / 2} for s in (0.01, 0.02, 0.03, 0.04)]
+    summary = summarize(records, percentiles=(90, 99))
+    assert set(summary['encode']) == {'count', 'total_seconds', 'wall_p90', 'wall_p99', 'cpu_p90', 'cpu_p99'}
+    print_summary(summary)
+    output = capsys.readouterr().out
+    assert 'p90 (ms)' in output and 'p99 (ms)' in output and 'CPU p90' in output
+    assert 'p50' not in output
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del motor de frames raster"""
+
+import numpy as np
+
+from raster_escena import RasterCanvas, Sprite, TextCache, drawable_text
+
+
+def _canvas():
+    return RasterCanvas((1280, 800), (640, 400), (20, 10, 600, 380), figure_color='white', axes_color='#2b2b2b')
+
+
+def test_sprite_blit_matches_alpha_compositing_and_clips():
+    rng = np.random.default_rng(0)
+    rgba = rng.integers(0, 256, (6, 5, 4), dtype=np.uint8)
+    target = rng.integers(0, 256, (10, 10, 3), dtype=np.uint8)
+    alpha = rgba[..., 3:4] / 255.0
+
+    inside = target.copy()
+    Sprite(rgba, anchor=(2, 3)).blit(inside, 5, 6)
+    expected = np.round(rgba[..., :3] * alpha + target[3:9, 3:8] * (1 - alpha))
+    assert np.abs(inside[3:9, 3:8].astype(int) - expected).max() <= 1
+    outside = np.ones(target.shape[:2], dtype=bool)
+    outside[3:9, 3:8] = False
+    assert np.array_equal(inside[outside], target[outside])
+
+    # Parcialmente fuera por la esquina superior izquierda: solo se compone lo visible
+    clipped = target.copy()
+    Sprite(rgba).blit(clipped, -2, -4)
+    reference = np.round(rgba[4:, 2:, :3] * alpha[4:, 2:] + target[:2, :3] * (1 - alpha[4:, 2:]))
+    assert np.abs(clipped[:2, :3].astype(int) - reference).max() <= 1
+    assert np.array_equal(clipped[2:], target[2:])
+
+    untouched = target.copy()
+    Sprite(rgba).blit(untouched, 50, 50)
+    assert np.array_equal(untouched, target)
+
+
+def test_frames_start_from_the_static_layer():
+    canvas = _canvas()
+    canvas.build_static(lambda c: c.add_static_text(100, 700, 'Escritorio', fontsize=12, color='white'))
+    static = canvas.background.copy()
+    assert not np.array_equal(static[10:390, 20:620], np.full((380, 600, 3), 0x2b, dtype=np.uint8))
+
+    first = canvas.begin_frame()
+    canvas.draw(canvas.circle_sprite(40, 'red'), 640, 400)
+    assert not np.array_equal(first, static)
+    assert np.array_equal(canvas.begin_frame(), static)
+    assert np.array_equal(canvas.background, static)
+
+
+def test_characters_without_glyph_are_not_drawn():
+    canvas = _canvas()
+    font = canvas.font(12)
+    assert drawable_text('📁 Documentos', font) == 'Documentos'
+    assert drawable_text('🖼️ Imagen.png', font) == 'Imagen.png'
+    assert drawable_text('Añadir ✓', font) == 'Añadir ✓'
+
+    with_icon, plain = (np.zeros((60, 300, 3), dtype=np.uint8) for _ in range(2))
+    canvas.text_sprite('📁 Documentos', color='white').blit(with_icon, 10, 40)
+    canvas.text_sprite('Documentos', color='white').blit(plain, 10, 40)
+    assert np.array_equal(with_icon, plain)
+
+
+def test_text_cache_is_lru_within_its_byte_budget():
+    cache = TextCache(max_bytes=100)
+    cache.put('a', 'A', 40)
+    cache.put('b', 'B', 40)
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C', 40)
+    assert cache.get('b') is None and cache.get('a') == 'A' and cache.get('c') == 'C'
+    cache.put('grande', 'G', 101)
+    assert cache.get('grande') is None
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (3, 2, 1)
+    assert (stats['entries'], stats['bytes']) == (2, 80)
+
+    disabled = TextCache(max_bytes=0)
+    disabled.put('a', 'A', 1)
+    assert disabled.get('a') is None
+
+
+def test_console_lines_reuse_word_strips_and_match_full_rendering():
+    canvas = _canvas()
+    style = {'fontsize': 10, 'color': '#00ff00', 'monospace': True}
+    lines = ['[3] ACTION: Left Click', '[4] ACTION: Left Click', '[4] ACTION: Left Click']
+    for line in lines:
+        composed = np.zeros((40, 400, 3), dtype=np.uint8)
+        canvas.text_sprite(line, **style).blit(composed, 10, 30)
+        rendered = np.zeros_like(composed)
+        font = canvas.font(10, monospace=True)
+        canvas._render_text_sprite(line, font, '#00ff00', 'left', 'baseline', None, 1.0, 0.3, None) \
+            .blit(rendered, 10, 30)
+        assert np.array_equal(composed, rendered)
+
+    stats = canvas.text_cache.stats()
+    # La tercera línea sale entera de la caché; la segunda solo rasteriza '[4]'
+    assert (stats['hits'], stats['misses']) == (1, 2)
+    assert (stats['strip_hits'], stats['strip_misses']) == (3, 5)
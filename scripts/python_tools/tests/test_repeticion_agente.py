@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la repetición de ejecuciones registradas"""
+
+import gzip
+import json
+
+import pytest
+
+from repeticion_agente import ReplayGifGenerator, ai_scaled_dimensions, extract_action, iter_log_steps
+
+
+def _assistant(name, tool_input, text='Pienso'):
+    return {'role': 'assistant', 'content': [{'type': 'text', 'text': text},
+                                             {'type': 'tool_use', 'name': name, 'input': tool_input}]}
+
+
+def _write_log(path, records):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    return str(path)
+
+
+RUN = [
+    {'role': 'user', 'content': 'Abre el navegador'},
+    _assistant('computer', {'action': 'screenshot'}),
+    {'role': 'user', 'content': [{'type': 'tool_result'}]},
+    _assistant('computer', {'action': 'left_click', 'coordinate': [640, 400]}, 'Clic en el centro'),
+    _assistant('computer', {'action': 'type', 'text': 'hola'}),
+    _assistant('computer', {'action': 'screenshot'}),
+    _assistant('computer', {'action': 'cursor_position'}),
+    _assistant('finish_run', {'success': True}),
+]
+
+
+def test_extract_action_follows_the_agent_contract():
+    assert extract_action(_assistant('computer', {'action': 'left_click', 'coordinate': [3, 4]})) == \
+        ({'type': 'left_click', 'x': 3, 'y': 4}, 'Pienso')
+    assert extract_action(_assistant('computer', {'action': 'mouse_move'}))[0]['type'] == 'error'
+    assert extract_action(_assistant('computer', {'action': 'key'}))[0]['type'] == 'error'
+    assert extract_action(_assistant('finish_run', {'success': False, 'error': 'x'}))[0] == \
+        {'type': 'error', 'message': 'x'}
+    assert extract_action(_assistant('otra', {}))[0]['message'] == 'Wrong tool called: otra'
+    assert extract_action({'role': 'assistant', 'content': 'solo texto'})[0]['type'] == 'error'
+
+
+def test_ai_scaled_dimensions_keep_the_aspect_ratio():
+    assert ai_scaled_dimensions(1280, 800) == (1280, 800)
+    assert ai_scaled_dimensions(1920, 1080) == (1280, 720)
+    assert ai_scaled_dimensions(1000, 1000) == (800, 800)
+
+
+@pytest.mark.parametrize('name', ['run.jsonl', 'run.jsonl.gz'])
+def test_log_steps_skip_other_roles(tmp_path, name):
+    steps = list(iter_log_steps(_write_log(tmp_path / name, RUN)))
+    assert [step['type'] for step in steps] == ['screenshot', 'left_click', 'type', 'screenshot',
+                                                'cursor_position', 'finish']
+    assert steps[1]['reasoning'] == 'Clic en el centro'
+
+
+@pytest.mark.parametrize('max_frames', [2, 5, 300])
+def test_replay_never_exceeds_max_frames(tmp_path, max_frames):
+    log = _write_log(tmp_path / 'run.jsonl', RUN)
+    generator = ReplayGifGenerator(renderer='raster', fps=4, action_seconds=1.0, max_frames=max_frames)
+    states = list(generator.replay_states(log))
+
+    # 3 acciones visibles de 4 frames y 2 rachas sin efecto visible de 1 frame
+    assert len(states) == min(max_frames, 14)
+    assert generator.total_steps == 6
+    assert all(earlier['step'] <= later['step'] for earlier, later in zip(states, states[1:]))
+    if max_frames == 300:
+        click = [state for state in states if state['step'] == 2]
+        assert (click[-1]['x'], click[-1]['y']) == (640, 400) and click[-1]['acting']
+        assert click[0]['coordinates'] == (640, 400)
+
+
+def test_replay_without_frames_raises(tmp_path):
+    idle = [_assistant('computer', {'action': 'screenshot'})] * 3
+    generator = ReplayGifGenerator(renderer='raster', idle_frames=0)
+    with pytest.raises(ValueError):
+        list(generator.replay_states(_write_log(tmp_path / 'run.jsonl', idle)))
+    with pytest.raises(ValueError):
+        list(generator.replay_states(_write_log(tmp_path / 'vacio.jsonl', [RUN[0]])))
+
+
+def test_replay_gif_is_written(tmp_path):
+    log = _write_log(tmp_path / 'run.jsonl', RUN)
+    output = tmp_path / 'replay.gif'
+    stats = ReplayGifGenerator(renderer='raster', fps=2, max_frames=6).create_replay_gif(log, str(output))
+    assert stats['frames'] == 6 and output.stat().st_size == stats['bytes']
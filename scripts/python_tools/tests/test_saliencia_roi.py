@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la selección de regiones por saliencia"""
+
+import numpy as np
+import pytest
+
+from saliencia_roi import ROI_STRATEGIES, luminance, select_salient_areas, window_scores
+
+
+def _brute_force_scores(image, size, strategy):
+    gray = luminance(image).astype(np.float64)
+    if strategy == 'gradient':
+        values = np.zeros_like(gray)
+        values[:, :-1] += np.abs(np.diff(gray, axis=1))
+        values[:-1, :] += np.abs(np.diff(gray, axis=0))
+    rows, cols = gray.shape[0] - size + 1, gray.shape[1] - size + 1
+    scores = np.empty((rows, cols))
+    for y in range(rows):
+        for x in range(cols):
+            if strategy == 'gradient':
+                scores[y, x] = values[y:y + size, x:x + size].mean()
+            else:
+                scores[y, x] = gray[y:y + size, x:x + size].var()
+    return scores
+
+
+@pytest.mark.parametrize('strategy', ROI_STRATEGIES)
+def test_window_scores_match_brute_force(strategy):
+    image = np.random.default_rng(0).integers(0, 256, (24, 31, 3), dtype=np.uint8)
+    assert np.allclose(window_scores(image, 7, strategy), _brute_force_scores(image, 7, strategy), atol=1e-6)
+
+
+def test_salient_area_finds_textured_patch():
+    image = np.full((120, 160, 3), 128, dtype=np.uint8)
+    image[60:90, 100:130] = np.random.default_rng(1).integers(0, 256, (30, 30, 3), dtype=np.uint8)
+    for strategy in ROI_STRATEGIES:
+        (start_x, start_y, end_x, end_y), = select_salient_areas(image, 30, strategy=strategy)
+        assert (start_x, start_y) == (100, 60)
+
+
+@pytest.mark.parametrize('step', [1, 3, 4, 7, 60])
+def test_strided_windows_stay_inside_the_image(step):
+    image = np.random.default_rng(2).integers(0, 256, (100, 100, 3), dtype=np.uint8)
+    for strategy in ROI_STRATEGIES:
+        areas = select_salient_areas(image, 50, top_k=5, strategy=strategy, step=step)
+        assert areas
+        for start_x, start_y, end_x, end_y in areas:
+            assert start_x % step == 0 and start_y % step == 0
+            assert end_x <= 100 and end_y <= 100
+        # Sin solapamiento entre las áreas elegidas
+        for i, a in enumerate(areas):
+            for b in areas[i + 1:]:
+                assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]
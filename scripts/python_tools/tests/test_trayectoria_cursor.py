@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del planificador de trayectorias del cursor"""
+
+import numpy as np
+import pytest
+
+from trayectoria_cursor import EASINGS, plan_trajectory
+
+KEYFRAMES = [('click', 900, 400, 0.5), ('type', 100, 700, 0.25), ('scroll', 100, 100, 1.0)]
+
+
+@pytest.mark.parametrize('easing', sorted(EASINGS))
+def test_cursor_reaches_each_target_and_waits_there(easing):
+    trajectory = plan_trajectory(KEYFRAMES, fps=10, start=(0, 0), speed=900, easing=easing)
+    for index, (action, target_x, target_y, hold) in enumerate(KEYFRAMES):
+        frames = np.flatnonzero((trajectory.keyframe == index) & trajectory.acting)
+        assert frames.size == max(1, round(hold * 10))
+        assert np.allclose(trajectory.x[frames], target_x) and np.allclose(trajectory.y[frames], target_y)
+        state = trajectory.state(int(frames[0]))
+        assert (state['action'], state['step'], state['acting']) == (action, index + 1, True)
+
+    assert np.all(np.diff(trajectory.step) >= 0)
+    assert trajectory.progress.min() > 0 and trajectory.progress.max() == 1.0
+
+
+def test_move_lasts_as_long_as_distance_over_speed():
+    trajectory = plan_trajectory([('click', 900, 0, 0.1)], fps=10, start=(0, 0), speed=300, easing='linear')
+    moving = np.flatnonzero(~trajectory.acting)
+    # 900 unidades a 300 por segundo: 3 s = 30 frames, el último ya en el objetivo
+    assert moving.size == 30
+    assert np.allclose(trajectory.x[moving], np.arange(1, 31) * 30)
+
+
+def test_frames_trims_or_repeats_the_last_state():
+    full = plan_trajectory(KEYFRAMES, fps=10)
+    short = plan_trajectory(KEYFRAMES, fps=10, frames=5)
+    long = plan_trajectory(KEYFRAMES, fps=10, frames=len(full) + 7)
+    assert len(short) == 5 and np.array_equal(short.x, full.x[:5])
+    assert len(long) == len(full) + 7
+    assert np.all(long.x[len(full) - 1:] == full.x[-1]) and np.all(long.acting[len(full) - 1:])
+
+
+@pytest.mark.parametrize('arguments', [
+    {'keyframes': KEYFRAMES, 'fps': 10, 'easing': 'bounce'},
+    {'keyframes': [], 'fps': 10},
+    {'keyframes': KEYFRAMES, 'fps': 0},
+])
+def test_invalid_arguments_raise(arguments):
+    with pytest.raises(ValueError):
+        plan_trajectory(**arguments)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador de trayectorias del cursor para las animaciones
+A partir de una lista de fotogramas clave (acción, x, y, espera) calcula de una
+vez, como arrays de NumPy, la posición del cursor y el estado de la acción en
+todos los frames. Los renderizadores solo indexan: cada frame se puede generar
+en cualquier orden o en paralelo.
+"""
+
+import numpy as np
+
+# Curvas de aceleración: t en [0, 1] -> progreso en [0, 1], vectorizadas
+EASINGS = {
+    'linear': lambda t: t,
+    'ease_in': lambda t: t * t * t,
+    'ease_out': lambda t: 1 - (1 - t) ** 3,
+    'ease_in_out': lambda t: np.where(t < 0.5, 4 * t * t * t, 1 - (-2 * t + 2) ** 3 / 2),
+    'sine': lambda t: (1 - np.cos(np.pi * t)) / 2,
+}
+
+# Velocidad del cursor en unidades de pantalla por segundo
+DEFAULT_SPEED = 900.0
+
+
+class CursorTrajectory:
+    def __init__(self, keyframes, x, y, keyframe, acting, step, progress):
+        """
+        Trayectoria ya calculada; todos los arrays tienen un elemento por frame.
+        - keyframes: lista de (acción, x, y, espera) de la que sale la trayectoria
+        - x, y: posición del cursor
+        - keyframe: índice del fotograma clave hacia el que va (o en el que está) el cursor
+        - acting: True mientras el cursor espera en el objetivo ejecutando la acción
+        - step: acciones alcanzadas hasta el frame, incluido
+        - progress: avance ya suavizado del desplazamiento hacia el objetivo (1 al llegar)
+        """
+        self.keyframes = list(keyframes)
+        self.x = x
+        self.y = y
+        self.keyframe = keyframe
+        self.acting = acting
+        self.step = step
+        self.progress = progress
+
+    def __len__(self):
+        return len(self.x)
+
+    def state(self, frame):
+        """Estado del frame como dict: acción y objetivo actuales, cursor, paso y si se ejecuta"""
+        action, target_x, target_y, _ = self.keyframes[self.keyframe[frame]]
+        return {
+            'action': action,
+            'target_x': target_x,
+            'target_y': target_y,
+            'x': float(self.x[frame]),
+            'y': float(self.y[frame]),
+            'acting': bool(self.acting[frame]),
+            'step': int(self.step[frame]),
+        }
+
+
+def plan_trajectory(keyframes, fps, start=(0, 0), speed=DEFAULT_SPEED, easing='ease_in_out', frames=None):
+    """
+    Calcula la trayectoria completa del cursor.
+    - keyframes: secuencia de (acción, x, y, espera en segundos); el cursor va de
+      un objetivo al siguiente y se queda quieto la espera ejecutando la acción
+    - fps: frames por segundo de la animación
+    - start: posición inicial del cursor
+    - speed: unidades de pantalla por segundo; cada desplazamiento dura al menos un frame
+    - easing: nombre de la curva de EASINGS
+    - frames: número de frames a generar; se recorta o se alarga con el último estado
+
+    Retorna un CursorTrajectory.
+    """
+    if easing not in EASINGS:
+        raise ValueError(f"Curva desconocida: {easing} (usa una de {tuple(EASINGS)})")
+    if not keyframes:
+        raise ValueError("Se necesita al menos un fotograma clave")
+    if fps <= 0 or speed <= 0:
+        raise ValueError("fps y speed deben ser positivos")
+
+    targets = np.array([(kx, ky) for _, kx, ky, _ in keyframes], dtype=np.float64)
+    holds = np.array([hold for *_, hold in keyframes], dtype=np.float64)
+    origins = np.vstack([np.asarray(start, dtype=np.float64)[None], targets[:-1]])
+
+    # Frames de desplazamiento y de espera de cada tramo
+    distances = np.hypot(*(targets - origins).T)
+    move_frames = np.maximum(1, np.ceil(distances / speed * fps)).astype(np.int64)
+    hold_frames = np.maximum(1, np.round(holds * fps)).astype(np.int64)
+    segment_frames = move_frames + hold_frames
+
+    total = int(segment_frames.sum())
+    segment = np.repeat(np.arange(len(keyframes)), segment_frames)
+    local = np.arange(total) - np.repeat(np.cumsum(segment_frames) - segment_frames, segment_frames)
+
+    # El último frame del desplazamiento ya está en el objetivo
+    moves = move_frames[segment]
+    progress = EASINGS[easing](np.minimum((local + 1) / moves, 1.0))
+    position = origins[segment] + (targets - origins)[segment] * progress[:, None]
+    acting = local >= moves
+    step = segment + acting
+
+    if frames is not None:
+        # Recorta, o repite el último frame si los fotogramas clave no llegan
+        index = np.minimum(np.arange(frames), total - 1)
+        segment, position, acting, step, progress = (segment[index], position[index], acting[index],
+                                                     step[index], progress[index])
+
+    return CursorTrajectory(keyframes, position[:, 0], position[:, 1], segment, acting, step, progress)